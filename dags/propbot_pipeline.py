@@ -87,6 +87,13 @@ def data_preprocessing():
         else:
             raise Exception("Cleaning failed")
         
+        logger.info("Running geo-enrichment...")
+        result = subprocess.run(['python', 'scripts/Boston/calculate_distances.py'], capture_output=True, text=True)
+        if result.returncode == 0:
+            logger.info("✅ Enrichment completed")
+        else:
+            raise Exception("Enrichment failed")
+        
         logger.info("Running validation...")
         subprocess.run(['python', 'scripts/datasets_validation.py'], capture_output=True, text=True)
         
@@ -124,10 +131,50 @@ def chromadb_ingestion():
         logger.error(f"❌ Failed: {str(e)}")
         raise
 
+def build_analytics():
+    """Task 4: Materialize serving artifacts from the processed data"""
+    logger.info("="*50)
+    logger.info("TASK 4: Analytics Build Started")
+    logger.info("="*50)
+    
+    try:
+        import subprocess
+        
+        results_dir = 'milestone2/backend/results'
+        builds = [
+            ['milestone2/backend/src/market_analytics.py', '--output', f'{results_dir}/analytics_snapshot.json'],
+            ['milestone2/backend/src/geocoder.py', '--output', f'{results_dir}/geocoder_index.parquet'],
+            ['milestone2/backend/src/property_store.py', '--output', f'{results_dir}/property_store.parquet'],
+            ['milestone2/backend/src/knn_graph.py', '--output', f'{results_dir}/knn_graph.npz'],
+            ['milestone2/backend/src/crime_grid.py', '--output', f'{results_dir}/crime_grid.npz'],
+            ['milestone2/backend/src/crime_cube.py', '--output', f'{results_dir}/crime_cube.parquet'],
+            ['milestone2/backend/src/price_model.py', '--output', f'{results_dir}/price_model.joblib'],
+            ['milestone2/backend/src/value_scoring.py', '--model', f'{results_dir}/price_model.joblib',
+             '--output', f'{results_dir}/value_scores.parquet'],
+        ]
+        
+        for script, *args in builds:
+            logger.info(f"Running {script}...")
+            result = subprocess.run(
+                ['python', script, '--data-path', 'data/processed', *args],
+                capture_output=True, text=True
+            )
+            if result.returncode == 0:
+                logger.info(f"✅ {script} completed")
+            else:
+                raise Exception(f"{script} failed: {result.stderr[-500:]}")
+        
+        logger.info("✅ Analytics artifacts built")
+        return "Success"
+        
+    except Exception as e:
+        logger.error(f"❌ Failed: {str(e)}")
+        raise
+
 def data_validation():
-    """Task 4: Final Validation"""
+    """Task 5: Final Validation"""
     logger.info("="*50)
-    logger.info("TASK 4: Validation Started")
+    logger.info("TASK 5: Validation Started")
     logger.info("="*50)
     
     try:
@@ -175,10 +222,16 @@ task3 = PythonOperator(
 )
 
 task4 = PythonOperator(
+    task_id='build_analytics',
+    python_callable=build_analytics,
+    dag=dag,
+)
+
+task5 = PythonOperator(
     task_id='data_validation',
     python_callable=data_validation,
     dag=dag,
 )
 
 # Set task dependencies - creates the pipeline flow
-task1 >> task2 >> task3 >> task4
+task1 >> task2 >> task3 >> task4 >> task5
@@ -0,0 +1,137 @@
+"""
+Durable checkpoints for resumable ChromaDB ingestion
+
+Ingestion works on row batches of the source CSV ([start, end) row positions
+on a fixed grid, clipped at chunk edges). After every successful write the batch is merged into the
+committed ranges and the checkpoint file is replaced atomically; batches that
+fail are recorded with their error instead of being dropped. A checkpoint only
+applies to the exact file it was written for (content fingerprint).
+
+    --resume        skip committed batches, process everything else
+    --retry-failed  process only the recorded failed batches
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+CHECKPOINT_DIR = os.getenv('INGEST_CHECKPOINT_DIR', str(Path(__file__).resolve().parent.parent / 'ingest_checkpoints'))
+
+MODES = ('fresh', 'resume', 'retry-failed')
+
+
+def file_fingerprint(path) -> str:
+    """Size plus a content hash, so a re-exported identical file still matches"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return f"{os.path.getsize(path)}-{digest.hexdigest()}"
+
+
+def row_positions(index: pd.Index, prefix: str, ids: List[str], start: int) -> np.ndarray:
+    """Source row position of each document id built from a chunk starting at row `start`"""
+    return start + pd.Index(prefix + '_' + index.astype(str)).get_indexer(ids)
+
+
+def row_batches(start: int, stop: int, positions: np.ndarray, batch_rows: int) -> Iterator[Tuple[int, int, slice]]:
+    """(first row, end row, document slice) per grid-aligned batch of rows in [start, stop)"""
+    lo = start
+    while lo < stop:
+        hi = min((lo // batch_rows + 1) * batch_rows, stop)
+        i0, i1 = np.searchsorted(positions, [lo, hi])
+        yield lo, hi, slice(int(i0), int(i1))
+        lo = hi
+
+
+def merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class Checkpoint:
+    """Committed and failed row ranges of one collection's ingestion from one file"""
+
+    def __init__(self, collection: str, source, mode: str = 'fresh', checkpoint_dir: str = None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.path = Path(checkpoint_dir or CHECKPOINT_DIR) / f"{collection}.json"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        fingerprint = file_fingerprint(source)
+        state = json.loads(self.path.read_text()) if self.path.exists() else None
+        self.resumed = mode != 'fresh' and state is not None and state.get('fingerprint') == fingerprint
+        if mode != 'fresh' and state is not None and not self.resumed:
+            print(f"⚠️ Checkpoint for '{collection}' was written for a different file, starting over")
+        if not self.resumed:
+            state = {'collection': collection, 'source': str(source), 'fingerprint': fingerprint,
+                     'committed': [], 'failed': [], 'last_batch': None, 'complete': False}
+        self.mode = mode if self.resumed else 'fresh'
+        self.state = state
+        # Ranges to redo in retry-failed mode (cleared from 'failed' once they succeed)
+        self.retry = [tuple(f['rows']) for f in state['failed']] if self.mode == 'retry-failed' else []
+
+    @property
+    def watermark(self) -> int:
+        """Rows committed contiguously from the start of the file"""
+        committed = self.state['committed']
+        return committed[0][1] if committed and committed[0][0] == 0 else 0
+
+    @property
+    def failed(self) -> List[Tuple[int, int]]:
+        return [tuple(f['rows']) for f in self.state['failed']]
+
+    def is_committed(self, start: int, end: int) -> bool:
+        return any(lo <= start and end <= hi for lo, hi in self.state['committed'])
+
+    def wanted(self, start: int, end: int) -> bool:
+        """Whether this run should process the batch (boundaries may differ between runs)"""
+        if self.mode == 'retry-failed':
+            return any(start < hi and lo < end for lo, hi in self.retry)
+        if self.mode == 'resume':
+            return not self.is_committed(start, end)
+        return True
+
+    def commit(self, start: int, end: int):
+        with self._lock:
+            self.state['committed'] = merge_ranges(self.state['committed'] + [[start, end]])
+            self.state['failed'] = [f for f in self.state['failed'] if not self.is_committed(*f['rows'])]
+            self.state['last_batch'] = [start, end]
+            self._save()
+
+    def fail(self, start: int, end: int, error: Exception):
+        with self._lock:
+            self.state['failed'] = [f for f in self.state['failed'] if f['rows'] != [start, end]]
+            self.state['failed'].append({'rows': [start, end], 'error': str(error)[:500]})
+            self._save()
+
+    def finish(self, total_rows: int) -> Dict:
+        """Mark the run complete when every row is committed and nothing failed"""
+        with self._lock:
+            self.state['complete'] = not self.state['failed'] and self.watermark >= total_rows
+            self._save()
+            return self.summary()
+
+    def summary(self) -> Dict:
+        return {'watermark': self.watermark, 'failed_batches': len(self.state['failed']),
+                'failed_rows': sum(f['rows'][1] - f['rows'][0] for f in self.state['failed']),
+                'complete': self.state['complete']}
+
+    def _save(self):
+        self.state['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        tmp_path = self.path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(self.state, indent=2))
+        os.replace(tmp_path, self.path)
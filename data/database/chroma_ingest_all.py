@@ -1,71 +1,136 @@
+import os
+import sys
+import argparse
 import pandas as pd
 from tqdm import tqdm
-from openai import OpenAI
 import chromadb
 
-# Initialize clients
-client = OpenAI()
-chroma = chromadb.HttpClient(host="localhost", port=8000)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'milestone2', 'backend'))
 
+from documents import build_documents
+from embedding_cache import EmbeddingCache
+from incremental import IncrementalSync, keyed, natural_key, write_manifest
+from streaming import CsvStream
+from checkpoint import Checkpoint, row_batches, row_positions
+from dedup import TextDedup
+from pipeline import EMBED_WORKERS, QUEUE_SIZE, WRITE_WORKERS, Pipeline, Stage, summary
+from src.collection_aliases import CollectionAliases, ValidationError
+from src.embeddings import PROVIDERS, EmbeddingMismatch, check_collection, collection_metadata, get_provider
 
-# Helper function to rebuild clean collections
-def recreate_collection(name: str):
-    """Deletes old collection if exists, then creates a new one"""
-    try:
-        chroma.delete_collection(name)
-        print(f"🗑️ Deleted old collection: {name}")
-    except Exception:
-        pass
-    return chroma.get_or_create_collection(name)
+# Initialize clients
+chroma = chromadb.HttpClient(host="localhost", port=8000)
+# Rebuilds go into versioned collections; the API reads through these aliases
+aliases = CollectionAliases(chroma)
 
 
 # Function to store any CSV into ChromaDB
-def store_to_chroma(csv_path, collection_name, text_columns, meta_columns, batch_size=50):
-    print(f"\n📂 Reading file: {csv_path}")
-    df = pd.read_csv(csv_path, low_memory=False)
-    print(f"✅ Loaded {len(df)} records for collection '{collection_name}'")
-
-    # Recreate collection cleanly
-    collection = recreate_collection(collection_name)
-
-    # Iterate in batches
-    texts, metas, ids = [], [], []
-    for i, row in tqdm(df.iterrows(), total=len(df), desc=f"Embedding {collection_name}"):
-        text_parts = [str(row.get(col, "")) for col in text_columns]
-        text = ". ".join([t for t in text_parts if t.strip()])
-
-        # Skip empty rows
-        if not text.strip():
-            continue
-
-        meta = {col: str(row.get(col, "")) for col in meta_columns}
-
-        texts.append(text)
-        metas.append(meta)
-        ids.append(f"{collection_name}_{i}")
-
-        # Process in batches
-        if len(texts) >= batch_size:
-            try:
-                emb_response = client.embeddings.create(
-                    model="text-embedding-3-small",
-                    input=texts
-                )
-                embeddings = [d.embedding for d in emb_response.data]
-                collection.add(ids=ids, embeddings=embeddings, metadatas=metas, documents=texts)
-            except Exception as e:
-                print(f"⚠️ Batch error: {e}")
-            texts, metas, ids = [], [], []
-
-    # Handle remaining records
-    if texts:
-        emb_response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=texts
-        )
-        embeddings = [d.embedding for d in emb_response.data]
-        collection.add(ids=ids, embeddings=embeddings, metadatas=metas, documents=texts)
-
+def store_to_chroma(csv_path, collection_name, text_columns, meta_columns, batch_size=500, full_refresh=False,
+                    chunk_rows=None, max_rss_mb=None, embed_workers=None, write_workers=None, queue_size=None,
+                    mode='fresh', provider=None, dedup=True):
+    # Local MiniLM by default; only texts missing from the on-disk cache reach the model
+    provider = provider or get_provider()
+    embedding_cache = EmbeddingCache(provider.model)
+    print(f"\n📂 Streaming file: {csv_path}")
+    stream = CsvStream(csv_path, chunk_rows=chunk_rows, max_rss_mb=max_rss_mb)
+    print(f"✅ Scanned {stream.profile['rows']} records for collection '{collection_name}'")
+
+    # Committed/failed row ranges survive crashes; resume and retry-failed pick up from them
+    checkpoint = Checkpoint(collection_name, csv_path, mode)
+    if checkpoint.resumed:
+        print(f"↩️ {checkpoint.mode}: {checkpoint.watermark} rows committed, {len(checkpoint.failed)} failed batches")
+
+    # Upsert into the live collection, or build a new version (resumable) that goes live only once validated
+    collection, building = aliases.open_build(collection_name, rebuild=full_refresh,
+                                              resume=checkpoint.state.get('target') if checkpoint.resumed else None,
+                                              metadata=collection_metadata(provider))
+    try:
+        check_collection(collection, provider)
+    except EmbeddingMismatch as e:
+        print(f"❌ {e}; rerun with --full-refresh or re-embed it (milestone2/backend/src/embeddings.py --reembed)")
+        return
+    checkpoint.state['target'] = collection.name
+    sync = IncrementalSync(collection, source=csv_path, name=collection_name)
+    # Each distinct document text is embedded and stored once; repeats become references on it
+    texts_seen = TextDedup(enabled=dedup)
+    key, key_counts = natural_key(profile=stream.profile), {}
+    progress = tqdm(total=stream.profile['rows'], desc=f"Embedding {collection_name}")
+
+    # Build documents column-wise (IDs from the natural key), then keep the new texts that changed per row batch
+    def build(chunk):
+        if chunk.empty:
+            return
+        start = int(chunk.index[0])
+        chunk = keyed(chunk, key_counts, key)
+        texts, metas, ids = build_documents(chunk, collection_name, text_columns, meta_columns)
+        positions = row_positions(chunk.index, collection_name, ids, start)
+        for lo, hi, docs in row_batches(start, start + len(chunk), positions, batch_size):
+            batch = texts_seen.unique(texts[docs], metas[docs], ids[docs])
+            if not checkpoint.wanted(lo, hi):
+                sync.skip(batch[2])
+                continue
+            batch = sync.changed(*batch)
+            if batch[2]:
+                yield (lo, hi), batch
+            else:
+                checkpoint.commit(lo, hi)
+        progress.update(len(chunk))
+
+    def embed(item):
+        rows, batch = item
+        try:
+            return rows, batch, embedding_cache.embed(batch[0], provider.encode).tolist()
+        except Exception as e:
+            print(f"⚠️ Batch error (rows {rows[0]}-{rows[1]}): {e}")
+            checkpoint.fail(*rows, e)
+
+    def write(item):
+        rows, (texts, metas, ids), embeddings = item
+        try:
+            sync.write(texts, metas, ids, embeddings)
+            checkpoint.commit(*rows)
+        except Exception as e:
+            print(f"⚠️ Batch error (rows {rows[0]}-{rows[1]}): {e}")
+            checkpoint.fail(*rows, e)
+
+    # Read, build, embed and write overlap, joined by bounded queues
+    metrics = Pipeline([
+        Stage('build', build, fan_out=True),
+        Stage('embed', embed, workers=embed_workers or EMBED_WORKERS),
+        Stage('write', write, workers=write_workers or WRITE_WORKERS)
+    ], queue_size=queue_size or QUEUE_SIZE).run(stream)
+    progress.close()
+    print(f"⏱️ {summary(metrics)}")
+
+    state = checkpoint.finish(stream.profile['rows'])
+    if state['failed_batches']:
+        print(f"❗ {state['failed_batches']} batches ({state['failed_rows']} rows) failed, "
+              f"rerun with --retry-failed (checkpoint: {checkpoint.path})")
+
+    # Only a pass over every row can tell which records disappeared
+    manifest = sync.finish(delete=checkpoint.mode != 'retry-failed')
+    annotated = texts_seen.annotate(collection)
+    manifest['dedup'] = {**texts_seen.stats(), 'annotated': annotated}
+    counts = manifest['counts']
+    print(f"🔁 {counts['added']} added, {counts['updated']} updated, {counts['deleted']} deleted, "
+          f"{counts['unchanged']} unchanged (manifest: {write_manifest(manifest)})")
+    print(f"🧬 {texts_seen.summary()}, {annotated} duplicate references updated")
+    print(f"🧠 {stream.monitor.summary()}")
+
+    if building and state['failed_batches']:
+        print(f"⏸️ {collection.name} not promoted, '{collection_name}' still serves the previous version "
+              f"(--retry-failed continues the build)")
+    elif building:
+        try:
+            result = aliases.promote(collection_name, collection, expected=len(sync.seen))
+            print(f"🔀 '{collection_name}' -> {collection.name} ({result['count']} records, "
+                  f"{result['sample_queries']} sample queries ok, expired: {result['deleted'] or 'none'})")
+        except ValidationError as e:
+            print(f"❌ Validation failed, '{collection_name}' still serves the previous version: {e}")
+
+    embedding_cache.flush()
+    stats = embedding_cache.stats()
+    print(f"💾 Embedding cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
     print(f"🏁 Finished storing '{collection_name}' data in ChromaDB!\n")
 
 
@@ -73,8 +138,34 @@ def store_to_chroma(csv_path, collection_name, text_columns, meta_columns, batch
 # Ingestion starts here
 # =============================
 if __name__ == "__main__":
-
-    🏠 Properties
+    parser = argparse.ArgumentParser(description="Embed the processed Boston datasets into ChromaDB")
+    parser.add_argument('--full-refresh', action='store_true',
+                        help="Rebuild each collection into a new version and switch to it once validated")
+    parser.add_argument('--chunk-rows', type=int, default=None,
+                        help="CSV rows read per chunk (default: $INGEST_CHUNK_ROWS or 50000)")
+    parser.add_argument('--max-rss-mb', type=float, default=None,
+                        help="Shrink chunks when RSS exceeds this (default: $INGEST_MAX_RSS_MB or 2048)")
+    parser.add_argument('--embed-workers', type=int, default=None,
+                        help="Concurrent embedding calls (default: $PIPELINE_EMBED_WORKERS or 1)")
+    parser.add_argument('--write-workers', type=int, default=None,
+                        help="Concurrent Chroma writes (default: $PIPELINE_WRITE_WORKERS or 2)")
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help="Batches buffered between stages (default: $PIPELINE_QUEUE_SIZE or 4)")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Store every row, even when its document text repeats an earlier one")
+    parser.add_argument('--provider', choices=sorted(PROVIDERS), default=None,
+                        help="Embedding provider (default: $EMBEDDING_PROVIDER or minilm)")
+    resume = parser.add_mutually_exclusive_group()
+    resume.add_argument('--resume', action='store_true', help="Skip batches committed by the previous run")
+    resume.add_argument('--retry-failed', action='store_true', help="Reprocess only the batches that failed")
+    args = parser.parse_args()
+    stream_options = dict(full_refresh=args.full_refresh, chunk_rows=args.chunk_rows, max_rss_mb=args.max_rss_mb,
+                          embed_workers=args.embed_workers, write_workers=args.write_workers,
+                          queue_size=args.queue_size, provider=get_provider(args.provider),
+                          dedup=not args.no_dedup,
+                          mode='resume' if args.resume else 'retry-failed' if args.retry_failed else 'fresh')
+
+    # 🏠 Properties
     store_to_chroma(
         csv_path="data/processed/Boston/properties_CLEAN_20251025.csv",
         collection_name="propbot_properties",
@@ -86,7 +177,8 @@ if __name__ == "__main__":
         meta_columns=[
             "zip_code", "CITY", "TOTAL_VALUE", "LAND_VALUE",
             "BLDG_VALUE", "BED_RMS", "FULL_BTH", "NUM_PARKING", "year_built"
-        ]
+        ],
+        **stream_options
     )
 
     # 🚓 Crime
@@ -98,7 +190,8 @@ if __name__ == "__main__":
         ],
         meta_columns=[
             "YEAR","MONTH","HOUR","SHOOTING","Lat","Long"
-        ]
+        ],
+        **stream_options
     )
 
     # 👨‍👩‍👧 Demographics
@@ -112,11 +205,11 @@ if __name__ == "__main__":
         meta_columns = [
         "zip_code","population","median_income",
         "median_age","employment_rate","education_level"
-    ]
-
+    ],
+        **stream_options
     )
 
-    🏪 Amenities
+    # 🏪 Amenities
     store_to_chroma(
         csv_path="data/processed/Boston/amenities_CLEAN_20251025.csv",
         collection_name="propbot_amenities",
@@ -125,11 +218,12 @@ if __name__ == "__main__":
         ],
         meta_columns=[
             "zip_code", "category", "rating", "latitude", "longitude"
-        ]
+        ],
+        **stream_options
     )
 
 
-    🚉 Transit
+    # 🚉 Transit
     store_to_chroma(
         csv_path="data/processed/Boston/transit_CLEAN_20251025.csv",
         collection_name="propbot_transit",
@@ -141,7 +235,8 @@ if __name__ == "__main__":
         ],
         meta_columns=[
             "station_id", "latitude", "longitude", "location_type"
-        ]
+        ],
+        **stream_options
     )
 
     print("✅ All datasets stored successfully in ChromaDB!")
@@ -0,0 +1,145 @@
+"""
+Text-level deduplication of documents before embedding
+
+Crime rows built from the same offense / street / location, or Yelp rows
+repeated across neighborhood searches, produce identical document strings.
+Only the first row with a given text (by hash) is embedded and stored; later
+rows with the same text become references on it. Once the whole file has been
+read the stored record gets, as metadata:
+
+    duplicate_count    exact number of other rows with the same text
+    duplicate_ids      their IDs, only the first INGEST_DEDUP_MAX_IDS of them
+    duplicate_values   metadata fields whose values differ across the rows
+                       (e.g. YEAR, HOUR, DISTRICT of collapsed crime incidents)
+                       -> the distinct values, at most INGEST_DEDUP_MAX_VALUES each
+
+The record's own metadata fields are still those of the first row, so
+filters on them (where YEAR = 2024) only see that row; duplicate_values is
+what tells a reader the text also occurred with other values.
+
+    INGEST_DEDUP_MAX_IDS     duplicate IDs kept per record (default 100)
+    INGEST_DEDUP_MAX_VALUES  distinct values kept per differing field (default 32)
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Sequence, Tuple
+
+COUNT_FIELD = 'duplicate_count'
+IDS_FIELD = 'duplicate_ids'
+VALUES_FIELD = 'duplicate_values'
+FIELDS = (COUNT_FIELD, IDS_FIELD, VALUES_FIELD)
+MAX_IDS = int(os.getenv('INGEST_DEDUP_MAX_IDS', 100))
+MAX_VALUES = int(os.getenv('INGEST_DEDUP_MAX_VALUES', 32))
+PAGE_SIZE = 10000
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class TextDedup:
+    """First-seen record per distinct text, with counts and IDs of the rows sharing it
+
+    Batches must go through unique() in source order from a single thread
+    (the pipeline's build stage), including batches a resumed run skips.
+    """
+
+    def __init__(self, enabled: bool = True, max_ids: int = MAX_IDS, max_values: int = MAX_VALUES):
+        self.enabled = enabled
+        self.max_ids = max_ids
+        self.max_values = max_values
+        # text hash -> [record id, duplicate count, duplicate ids, {field: values seen on duplicates}]
+        self.groups: Dict[bytes, list] = {}
+        self.documents = 0
+
+    def unique(self, texts: Sequence[str], metas: Sequence[Dict], ids: Sequence[str]) -> Tuple[List, List, List]:
+        """The documents whose text has not been seen before; the rest are recorded as duplicates"""
+        self.documents += len(ids)
+        if not self.enabled:
+            return list(texts), list(metas), list(ids)
+        keep = []
+        for i, (text, record_id) in enumerate(zip(texts, ids)):
+            key = text_hash(text)
+            group = self.groups.get(key)
+            if group is None:
+                self.groups[key] = [record_id, 0, [], None]
+                keep.append(i)
+                continue
+            group[1] += 1
+            if len(group[2]) < self.max_ids:
+                group[2].append(record_id)
+            if metas[i]:
+                values = group[3] = group[3] or {}
+                for field, value in metas[i].items():
+                    seen = values.setdefault(field, set())
+                    # One over the cap marks the field as truncated
+                    if len(seen) <= self.max_values:
+                        seen.add(value)
+        return [texts[i] for i in keep], [metas[i] for i in keep], [ids[i] for i in keep]
+
+    def _differing(self, first: Dict, values: Dict) -> str:
+        """JSON of the fields whose duplicates' values differ from (or are missing on) the first row"""
+        differing = {}
+        for field, seen in (values or {}).items():
+            seen = seen | {first.get(field)}
+            if len(seen) > 1:
+                differing[field] = sorted(seen, key=str)[:self.max_values]
+        return json.dumps(differing, sort_keys=True) if differing else None
+
+    def stats(self) -> Dict:
+        distinct = len(self.groups) if self.enabled else self.documents
+        duplicates = self.documents - distinct
+        return {
+            'documents': self.documents,
+            'distinct': distinct,
+            'duplicates': duplicates,
+            'duplicate_ratio': round(duplicates / self.documents, 4) if self.documents else 0.0,
+            # Each duplicate is one text neither sent to the model nor written to Chroma
+            'embeddings_saved': duplicates
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"{stats['duplicates']} of {stats['documents']} documents were duplicate text "
+                f"({stats['duplicate_ratio']:.1%}), {stats['embeddings_saved']} embeddings saved")
+
+    def annotate(self, collection, batch_size: int = 5000) -> int:
+        """Write duplicate counts / IDs onto stored records (and clear stale ones); returns records updated"""
+        if not self.enabled:
+            return 0
+        stored, offset = {}, 0
+        while True:
+            page = collection.get(where={COUNT_FIELD: {'$gt': 0}}, include=['metadatas'],
+                                  limit=PAGE_SIZE, offset=offset)
+            for record_id, meta in zip(page['ids'], page['metadatas']):
+                stored[record_id] = tuple(meta.get(field) for field in FIELDS)
+            if len(page['ids']) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+
+        # The first row's own metadata is what the stored record carries
+        grouped = [group for group in self.groups.values() if group[1]]
+        firsts = {}
+        for start in range(0, len(grouped), batch_size):
+            chunk = [group[0] for group in grouped[start:start + batch_size]]
+            page = collection.get(ids=chunk, include=['metadatas'])
+            firsts.update(zip(page['ids'], page['metadatas']))
+
+        updates = {}
+        for record_id, count, refs, values in grouped:
+            first = {k: v for k, v in (firsts.get(record_id) or {}).items() if k not in FIELDS}
+            value = (count, json.dumps(refs), self._differing(first, values))
+            if stored.pop(record_id, None) != value:
+                updates[record_id] = dict(zip(FIELDS, value))
+        # Records whose duplicates have all disappeared (None removes the key)
+        for record_id in stored:
+            updates[record_id] = dict.fromkeys(FIELDS)
+
+        record_ids = list(updates)
+        for start in range(0, len(record_ids), batch_size):
+            chunk = record_ids[start:start + batch_size]
+            collection.update(ids=chunk, metadatas=[updates[record_id] for record_id in chunk])
+        return len(record_ids)
+
@@ -0,0 +1,257 @@
+"""
+Content-addressed on-disk embedding cache shared by the ingestion scripts
+
+Embeddings are keyed by hash(model name + document text) and stored as
+append-only float32 shards (read through np.memmap) with an index file per
+model. EmbeddingCache.embed() returns cached vectors and calls the encoder
+only for new or changed texts. compact() rewrites live entries into fresh
+shards, evicting the least recently used ones beyond a size cap.
+
+    python data/database/embedding_cache.py --stats
+    python data/database/embedding_cache.py --compact --max-gb 5
+
+Single writer: run one ingestion against a cache directory at a time (threads
+within it may share one EmbeddingCache).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', str(Path(__file__).resolve().parent.parent / 'embedding_cache'))
+MAX_BYTES = int(float(os.getenv('EMBEDDING_CACHE_MAX_GB', 0)) * 1024 ** 3) or None
+SHARD_ROWS = 262144
+
+KEY_DTYPE = 'S16'
+
+
+def text_key(model_name: str, text: str) -> bytes:
+    return hashlib.blake2b(f"{model_name}\n{text}".encode('utf-8'), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Embeddings of one model, keyed by content hash"""
+
+    def __init__(self, model_name: str, cache_dir: str = None, max_bytes: int = None, shard_rows: int = SHARD_ROWS):
+        self.model_name = model_name
+        self.dir = Path(cache_dir or CACHE_DIR) / re.sub(r'[^\w.-]+', '_', model_name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else MAX_BYTES
+        self.shard_rows = shard_rows
+        self.hits = 0
+        self.misses = 0
+        self._maps = {}
+        self._lock = threading.RLock()
+
+        meta_path = self.dir / 'meta.json'
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        self.dim = meta.get('dim')
+        self.clock = meta.get('clock', 0) + 1
+
+        index_path = self.dir / 'index.npz'
+        if index_path.exists():
+            data = np.load(index_path)
+            keys, self.shard, self.row, self.stamp = data['keys'], data['shard'], data['row'], data['stamp']
+        else:
+            keys = np.empty(0, dtype=KEY_DTYPE)
+            self.shard = np.empty(0, dtype=np.int32)
+            self.row = np.empty(0, dtype=np.int32)
+            self.stamp = np.empty(0, dtype=np.int64)
+        self.keys = keys
+        self.slots = {key: i for i, key in enumerate(keys.tolist())}
+        self.size = len(keys)
+
+    def __len__(self):
+        return self.size
+
+    def _shard_path(self, shard: int) -> Path:
+        return self.dir / f"{shard:06d}.f32"
+
+    def _map(self, shard: int, rows_needed: int) -> np.ndarray:
+        mapped = self._maps.get(shard)
+        if mapped is None or len(mapped) < rows_needed:
+            mapped = np.memmap(self._shard_path(shard), dtype=np.float32, mode='r').reshape(-1, self.dim)
+            self._maps[shard] = mapped
+        return mapped
+
+    def _grow(self, extra: int):
+        capacity = len(self.shard)
+        if self.size + extra <= capacity:
+            return
+        capacity = max(self.size + extra, capacity * 2, 1024)
+        self.keys = np.resize(self.keys, capacity)
+        self.shard = np.resize(self.shard, capacity)
+        self.row = np.resize(self.row, capacity)
+        self.stamp = np.resize(self.stamp, capacity)
+
+    def lookup(self, keys: Sequence[bytes]) -> np.ndarray:
+        """Slot of each key, -1 when missing"""
+        return np.fromiter((self.slots.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    def read(self, slots: np.ndarray) -> np.ndarray:
+        """Vectors of existing slots, shard by shard"""
+        out = np.empty((len(slots), self.dim), dtype=np.float32)
+        shards = self.shard[slots]
+        for shard in np.unique(shards):
+            mask = shards == shard
+            rows = self.row[slots[mask]]
+            out[mask] = self._map(int(shard), int(rows.max()) + 1)[rows]
+        return out
+
+    def append(self, keys: List[bytes], vectors: np.ndarray):
+        """Write new vectors to the tail shard(s) and index them"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} != cached {self.dim} for {self.model_name}")
+
+        self._grow(len(keys))
+        shard = int(self.shard[:self.size].max()) if self.size else 0
+        written = 0
+        while written < len(keys):
+            path = self._shard_path(shard)
+            # Rows are counted from the file so bytes from an unflushed run are never reused
+            start = path.stat().st_size // (4 * self.dim) if path.exists() else 0
+            take = min(self.shard_rows - start, len(keys) - written)
+            if take <= 0:
+                shard += 1
+                continue
+            with open(path, 'ab') as f:
+                f.write(vectors[written:written + take].tobytes())
+            for i, key in enumerate(keys[written:written + take]):
+                slot = self.size
+                self.keys[slot], self.shard[slot], self.row[slot], self.stamp[slot] = key, shard, start + i, self.clock
+                self.slots[key] = slot
+                self.size += 1
+            written += take
+
+    def embed(self, texts: Sequence[str], encode: Callable[[List[str]], Sequence]) -> np.ndarray:
+        """Vectors for texts (n x dim float32), encoding only texts not yet cached
+
+        The encoder runs outside the lock, so threads can encode concurrently.
+        """
+        if not len(texts):
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        keys = [text_key(self.model_name, t) for t in texts]
+        with self._lock:
+            slots = self.lookup(keys)
+            self.hits += int((slots >= 0).sum())
+            self.misses += int((slots < 0).sum())
+
+        missing = {}
+        for i in np.flatnonzero(slots < 0):
+            missing.setdefault(keys[i], texts[i])
+        vectors = np.asarray(encode(list(missing.values())), dtype=np.float32) if missing else None
+
+        with self._lock:
+            if missing:
+                # Another thread may have cached some of these meanwhile
+                fresh = [i for i, key in enumerate(missing) if key not in self.slots]
+                if fresh:
+                    self.append([list(missing)[i] for i in fresh], vectors[fresh])
+                slots = self.lookup(keys)
+            self.stamp[slots] = self.clock
+            return self.read(slots)
+
+    def disk_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.dir.glob('*.f32'))
+
+    def flush(self):
+        """Persist the index (atomic replace), compacting first when over the size cap"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self.max_bytes and self.disk_bytes() > self.max_bytes:
+            self.compact(self.max_bytes)
+            return
+        n = self.size
+        tmp_path = self.dir / 'index.tmp.npz'
+        np.savez(tmp_path, keys=self.keys[:n], shard=self.shard[:n], row=self.row[:n], stamp=self.stamp[:n])
+        os.replace(tmp_path, self.dir / 'index.npz')
+        meta_tmp = self.dir / 'meta.json.tmp'
+        meta_tmp.write_text(json.dumps({'model': self.model_name, 'dim': self.dim, 'clock': self.clock}))
+        os.replace(meta_tmp, self.dir / 'meta.json')
+
+    def compact(self, max_bytes: int = None) -> Dict:
+        """Rewrite live entries into new shards, keeping the most recently used within max_bytes"""
+        with self._lock:
+            return self._compact(max_bytes)
+
+    def _compact(self, max_bytes: int = None) -> Dict:
+        before = self.disk_bytes()
+        n = self.size
+        order = np.argsort(-self.stamp[:n], kind='stable')
+        if max_bytes and self.dim:
+            order = order[:max_bytes // (4 * self.dim)]
+        # Oldest first so shard order follows recency
+        keep = order[::-1]
+
+        old_shards = sorted(self.dir.glob('*.f32'))
+        next_shard = max((int(p.stem) for p in old_shards), default=-1) + 1
+        keys, stamps = self.keys[keep], self.stamp[keep]
+        vectors = self.read(keep) if len(keep) else np.empty((0, self.dim or 0), dtype=np.float32)
+
+        self._maps = {}
+        self.keys = np.empty(0, dtype=KEY_DTYPE)
+        self.shard = np.empty(0, dtype=np.int32)
+        self.row = np.empty(0, dtype=np.int32)
+        self.stamp = np.empty(0, dtype=np.int64)
+        self.slots, self.size = {}, 0
+        self._grow(len(keep))
+        for start in range(0, len(keep), self.shard_rows):
+            shard = next_shard + start // self.shard_rows
+            block = slice(start, start + self.shard_rows)
+            with open(self._shard_path(shard), 'wb') as f:
+                f.write(np.ascontiguousarray(vectors[block]).tobytes())
+            count = len(keys[block])
+            self.keys[self.size:self.size + count] = keys[block]
+            self.shard[self.size:self.size + count] = shard
+            self.row[self.size:self.size + count] = np.arange(count)
+            self.stamp[self.size:self.size + count] = stamps[block]
+            self.size += count
+        self.slots = {key: i for i, key in enumerate(self.keys[:self.size].tolist())}
+
+        max_bytes, self.max_bytes = self.max_bytes, None
+        self.flush()
+        self.max_bytes = max_bytes
+        for path in old_shards:
+            path.unlink()
+
+        return {'entries': self.size, 'evicted': n - self.size, 'bytes_before': before,
+                'bytes_after': self.disk_bytes()}
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {'model': self.model_name, 'entries': self.size, 'dim': self.dim, 'bytes': self.disk_bytes(),
+                'hits': self.hits, 'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or compact the embedding cache")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--model', default=None, help="Model directory (default: all)")
+    parser.add_argument('--compact', action='store_true')
+    parser.add_argument('--max-gb', type=float, default=None, help="Size cap per model when compacting")
+    parser.add_argument('--stats', action='store_true')
+    args = parser.parse_args()
+
+    root = Path(args.cache_dir)
+    models = [args.model] if args.model else sorted(
+        json.loads((p / 'meta.json').read_text())['model'] for p in root.glob('*') if (p / 'meta.json').exists()
+    )
+    for model in models:
+        cache = EmbeddingCache(model, args.cache_dir)
+        if args.compact:
+            cap = int(args.max_gb * 1024 ** 3) if args.max_gb else None
+            print(f"🗜️  {model}: {cache.compact(cap)}")
+        print(f"📦 {cache.stats()}")
@@ -0,0 +1,162 @@
+"""
+Incremental ChromaDB ingestion keyed on stable row IDs
+
+Rows are identified by their natural key (property_id, INCIDENT_NUMBER,
+business_id, station_id, ...) and every stored record carries a content hash
+of its document and metadata. A sync upserts only new or changed rows,
+deletes rows that disappeared from the source and skips the rest, then writes
+a manifest of the changed IDs so downstream caches can invalidate precisely.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+MANIFEST_DIR = os.getenv('INGEST_MANIFEST_DIR', str(Path(__file__).resolve().parent.parent / 'ingest_manifests'))
+
+# Natural keys in preference order; the first one present (and fully populated) is used
+ID_COLUMNS = ['property_id', 'PID', 'Parcel ID', 'INCIDENT_NUMBER', 'business_id', 'station_id']
+HASH_FIELD = 'content_hash'
+PAGE_SIZE = 10000
+
+
+def natural_key(df: pd.DataFrame = None, profile: Dict = None) -> Optional[str]:
+    """First fully populated ID column, from the frame or from a streaming.scan_csv profile"""
+    for col in ID_COLUMNS:
+        if profile is not None:
+            if col in profile['columns'] and col not in profile['nullable']:
+                return col
+        elif col in df.columns and df[col].notna().all():
+            return col
+    return None
+
+
+def keyed(df: pd.DataFrame, counts: Dict[str, int] = None, key: str = '') -> pd.DataFrame:
+    """df indexed by its natural key, or by a hash of the row values when there is none
+
+    Repeated keys get a '#n' suffix so every row keeps a distinct, stable ID.
+    For a streamed file pass the key column chosen once for the file
+    (None for row hashes) and the same counts dict for every chunk, so repeats
+    are numbered across chunks.
+    """
+    col = natural_key(df) if key == '' else key
+    if col is not None:
+        keys = df[col].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    else:
+        keys = pd.util.hash_pandas_object(df, index=False).map('{:016x}'.format)
+    keys = keys.reset_index(drop=True)
+    repeat = keys.groupby(keys).cumcount()
+    if counts is not None:
+        repeat = repeat + keys.map(counts).fillna(0).astype(int)
+        for value, n in keys.value_counts().items():
+            counts[value] = counts.get(value, 0) + int(n)
+    keys = keys.where(repeat == 0, keys + '#' + repeat.astype(str))
+    return df.set_axis(pd.Index(keys.to_numpy(), name=None), axis=0)
+
+
+def content_hash(text: str, meta: Dict) -> str:
+    payload = text + '\x1f' + json.dumps(meta, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def stored_hashes(collection) -> Dict[str, Optional[str]]:
+    """ID -> content hash of every record already in the collection"""
+    hashes, offset = {}, 0
+    while True:
+        page = collection.get(include=['metadatas'], limit=PAGE_SIZE, offset=offset)
+        for record_id, meta in zip(page['ids'], page['metadatas']):
+            hashes[record_id] = (meta or {}).get(HASH_FIELD)
+        if len(page['ids']) < PAGE_SIZE:
+            return hashes
+        offset += PAGE_SIZE
+
+
+class IncrementalSync:
+    """Diffs batches of documents against one collection and applies the changes"""
+
+    def __init__(self, collection, source: str = None, name: str = None):
+        self.collection = collection
+        self.source = source
+        # Logical name for the manifest when writing into a versioned collection
+        self.name = name or collection.name
+        self.existing = stored_hashes(collection)
+        self.seen = set()
+        self.added: List[str] = []
+        self.updated: List[str] = []
+        self.deleted: List[str] = []
+        self.unchanged = 0
+        self._lock = threading.Lock()
+
+    def changed(self, texts: List[str], metas: List[Dict], ids: List[str]) -> Tuple[List[str], List[Dict], List[str]]:
+        """The new or changed documents of a batch, with their content hash added to the metadata"""
+        out_texts, out_metas, out_ids = [], [], []
+        for text, meta, record_id in zip(texts, metas, ids):
+            self.seen.add(record_id)
+            digest = content_hash(text, meta)
+            if self.existing.get(record_id) == digest:
+                self.unchanged += 1
+                continue
+            out_texts.append(text)
+            out_metas.append({**meta, HASH_FIELD: digest})
+            out_ids.append(record_id)
+        return out_texts, out_metas, out_ids
+
+    def skip(self, ids: List[str]):
+        """Mark rows as present without diffing them (already committed by an earlier run)"""
+        self.seen.update(ids)
+
+    def upsert(self, texts: List[str], metas: List[Dict], ids: List[str],
+               embed: Callable[[List[str]], List[List[float]]]) -> int:
+        """Embed and upsert the changed part of a batch; returns how many rows were written"""
+        texts, metas, ids = self.changed(texts, metas, ids)
+        if ids:
+            self.write(texts, metas, ids, embed(texts))
+        return len(ids)
+
+    def write(self, texts: List[str], metas: List[Dict], ids: List[str], embeddings: List[List[float]]):
+        """Upsert an already diffed and embedded batch (safe to call from several threads)"""
+        self.collection.upsert(ids=ids, embeddings=embeddings, metadatas=metas, documents=texts)
+        # Recorded only once written, so a failed batch never reaches the manifest
+        with self._lock:
+            for record_id in ids:
+                (self.updated if record_id in self.existing else self.added).append(record_id)
+
+    def finish(self, batch_size: int = 5000, delete: bool = True) -> Dict:
+        """Delete records missing from this run (unless only part of the file was read) and return the manifest"""
+        stale = [record_id for record_id in self.existing if record_id not in self.seen] if delete else []
+        for start in range(0, len(stale), batch_size):
+            self.collection.delete(ids=stale[start:start + batch_size])
+        self.deleted = stale
+        return self.manifest()
+
+    def manifest(self) -> Dict:
+        return {
+            'collection': self.name,
+            'target': self.collection.name,
+            'source': self.source,
+            'run_at': datetime.now().isoformat(timespec='seconds'),
+            'counts': {'added': len(self.added), 'updated': len(self.updated),
+                       'deleted': len(self.deleted), 'unchanged': self.unchanged},
+            'added': self.added,
+            'updated': self.updated,
+            'deleted': self.deleted
+        }
+
+
+def write_manifest(manifest: Dict, manifest_dir: str = None) -> Path:
+    """<collection>_<timestamp>.json plus <collection>_latest.json, both written atomically"""
+    out_dir = Path(manifest_dir or MANIFEST_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = manifest['run_at'].replace(':', '').replace('-', '')
+    path = out_dir / f"{manifest['collection']}_{stamp}.json"
+    for target in (path, out_dir / f"{manifest['collection']}_latest.json"):
+        tmp_path = target.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp_path, target)
+    return path
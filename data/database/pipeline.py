@@ -0,0 +1,179 @@
+"""
+Pipelined ingestion stages connected by bounded queues
+
+Each stage runs in its own worker threads (embedding releases the GIL inside
+torch / while waiting on the network, Chroma writes wait on HTTP), and the
+stages are joined by bounded queues so a slow stage applies backpressure
+instead of letting batches pile up in memory. Wall time approaches that of
+the slowest stage rather than the sum of all of them.
+
+    Pipeline([Stage('build', build, fan_out=True),
+              Stage('embed', embed, workers=2),
+              Stage('write', write, workers=2)]).run(chunks)
+
+run() returns per-stage metrics: items, busy seconds, throughput, time
+blocked on a full downstream queue, and input queue depth.
+
+    PIPELINE_QUEUE_SIZE      items buffered between stages (default 4)
+    PIPELINE_EMBED_WORKERS   embedding threads (default 1)
+    PIPELINE_WRITE_WORKERS   Chroma write threads (default 2)
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 4))
+EMBED_WORKERS = int(os.getenv('PIPELINE_EMBED_WORKERS', 1))
+WRITE_WORKERS = int(os.getenv('PIPELINE_WRITE_WORKERS', 2))
+
+_DONE = object()
+
+
+class Stage:
+    """A step applied to every item; fan_out stages return an iterable of items"""
+
+    def __init__(self, name: str, fn: Callable, workers: int = 1, fan_out: bool = False):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self.fan_out = fan_out
+        self._lock = threading.Lock()
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.depth_max = 0
+
+    def record(self, busy: float = 0.0, blocked: float = 0.0, depth: int = None):
+        with self._lock:
+            self.busy += busy
+            self.blocked += blocked
+            if depth is not None:
+                self.items += 1
+                self.depth_samples += 1
+                self.depth_total += depth
+                self.depth_max = max(self.depth_max, depth)
+
+    def metrics(self, wall: float) -> Dict:
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'busy_s': round(self.busy, 3),
+            'items_per_s': round(self.items / self.busy, 2) if self.busy else None,
+            'utilization': round(self.busy / (wall * self.workers), 3) if wall else None,
+            'blocked_s': round(self.blocked, 3),
+            'queue_depth_avg': round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0,
+            'queue_depth_max': self.depth_max
+        }
+
+
+class Pipeline:
+    """Runs items from a source through stages, each fed by a bounded queue"""
+
+    def __init__(self, stages: List[Stage], queue_size: int = QUEUE_SIZE):
+        self.read = Stage('read', None)
+        self.stages = stages
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _put(self, q: queue.Queue, item, stage: Stage = None):
+        """Blocking put that gives up once the pipeline is stopping"""
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        if stage is not None:
+            stage.record(blocked=time.perf_counter() - started)
+
+    def _feed(self, source: Iterable, out: queue.Queue):
+        try:
+            items = iter(source)
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                self.read.record(busy=time.perf_counter() - started, depth=0)
+                self._put(out, item, self.read)
+        except Exception as e:
+            self._fail(self.read, e)
+
+    def _work(self, stage: Stage, inbox: queue.Queue, out: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            depth = inbox.qsize()
+            started = time.perf_counter()
+            try:
+                result = stage.fn(item)
+                results = list(result) if stage.fan_out else [result]
+            except Exception as e:
+                self._fail(stage, e)
+                return
+            stage.record(busy=time.perf_counter() - started, depth=depth)
+            for result in results:
+                # None means the stage consumed the item (filtered or handled an error itself)
+                if result is not None and out is not None:
+                    self._put(out, result, stage)
+
+    def _fail(self, stage: Stage, error: Exception):
+        logger.error(f"❌ Stage '{stage.name}' failed: {error}")
+        self._errors.append(error)
+        self._stop.set()
+
+    def run(self, source: Iterable) -> Dict:
+        """Drain the source through every stage; raises the first stage error"""
+        started = time.perf_counter()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        feeder = threading.Thread(target=self._feed, args=(source, queues[0]), daemon=True)
+        feeder.start()
+
+        groups = []
+        for i, stage in enumerate(self.stages):
+            out = queues[i + 1] if i + 1 < len(self.stages) else None
+            threads = [threading.Thread(target=self._work, args=(stage, queues[i], out), daemon=True)
+                       for _ in range(stage.workers)]
+            for thread in threads:
+                thread.start()
+            groups.append(threads)
+
+        # Shut down front to back: once a stage's producers finish, tell each of its workers
+        feeder.join()
+        for inbox, threads in zip(queues, groups):
+            for _ in threads:
+                self._put(inbox, _DONE)
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return self.metrics(time.perf_counter() - started)
+
+    def metrics(self, wall: float) -> Dict:
+        stages = {stage.name: stage.metrics(wall) for stage in [self.read] + self.stages}
+        # The stage with the most busy time per worker bounds the wall time
+        bottleneck = max(stages, key=lambda name: stages[name]['busy_s'] / stages[name]['workers'])
+        return {'wall_s': round(wall, 3), 'bottleneck': bottleneck, 'stages': stages}
+
+
+def summary(metrics: Dict) -> str:
+    parts = [f"{name} {m['items']} items, {m['busy_s']}s busy x{m['workers']}, queue max {m['queue_depth_max']}"
+             for name, m in metrics['stages'].items()]
+    return f"wall {metrics['wall_s']}s, bottleneck {metrics['bottleneck']} | " + " | ".join(parts)
@@ -0,0 +1,156 @@
+"""
+Chunked CSV reading with explicit dtypes and a bounded memory footprint
+
+CsvStream reads a CSV in row chunks instead of materializing it. A first pass
+over the file fixes one dtype per column (what a whole-file read would infer),
+so every chunk parses identically and per-chunk documents match a full read.
+After each chunk the process RSS is sampled; above the configured cap the
+chunk size is halved for the rest of the file.
+
+    INGEST_CHUNK_ROWS   rows per chunk (default 50000)
+    INGEST_MAX_RSS_MB   RSS cap in MB (default 2048)
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = int(os.getenv('INGEST_CHUNK_ROWS', 50000))
+MAX_RSS_MB = float(os.getenv('INGEST_MAX_RSS_MB', 2048))
+MIN_CHUNK_ROWS = 1000
+
+
+def rss_mb() -> float:
+    """Current resident set size (falls back to the process peak where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if os.uname().sysname == 'Darwin' else peak / 1024
+
+
+def scan_csv(paths, chunk_rows: int = None, **read_kwargs) -> Dict:
+    """Columns, per-column dtypes, columns with gaps, all-empty columns and row count over CSVs
+
+    Kinds seen in chunks with values are merged the way a whole-file read
+    would resolve them: ints stay int64 unless a gap or float appears, numbers
+    widen to float64, anything mixed with text is read as str.
+    """
+    paths = [paths] if isinstance(paths, (str, Path)) else list(paths)
+    columns, kinds, gaps, nullable, rows = {}, {}, set(), set(), 0
+    for path in paths:
+        with pd.read_csv(path, chunksize=chunk_rows or CHUNK_ROWS, low_memory=False, **read_kwargs) as reader:
+            for chunk in reader:
+                rows += len(chunk)
+                for col in chunk.columns:
+                    columns.setdefault(col, None)
+                    values = chunk[col]
+                    missing = values.isna()
+                    if missing.any():
+                        nullable.add(col)
+                    if missing.all():
+                        gaps.add(col)
+                        continue
+                    kinds.setdefault(col, set()).add(getattr(values.dtype, 'kind', 'O'))
+
+    dtypes = {}
+    for col in columns:
+        seen = kinds.get(col, set())
+        if not seen or seen <= {'i', 'u', 'f'} and ('f' in seen or col in gaps):
+            dtypes[col] = 'float64'
+        elif seen <= {'i', 'u'}:
+            dtypes[col] = 'int64'
+        elif seen == {'b'} and col not in gaps:
+            dtypes[col] = 'bool'
+        else:
+            dtypes[col] = str
+    return {
+        'columns': list(columns),
+        'dtypes': dtypes,
+        'nullable': [col for col in columns if col in nullable],
+        'empty': [col for col in columns if col not in kinds],
+        'rows': rows
+    }
+
+
+class RssMonitor:
+    """Tracks peak RSS across chunks and shrinks the chunk size above the cap"""
+
+    def __init__(self, max_rss_mb: float = None, chunk_rows: int = None):
+        self.max_rss_mb = max_rss_mb or MAX_RSS_MB
+        self.chunk_rows = chunk_rows or CHUNK_ROWS
+        self.peak_mb = rss_mb()
+
+    def check(self) -> int:
+        """Sample RSS after a chunk; returns the chunk size to use next"""
+        current = rss_mb()
+        self.peak_mb = max(self.peak_mb, current)
+        if current > self.max_rss_mb and self.chunk_rows > MIN_CHUNK_ROWS:
+            self.chunk_rows = max(MIN_CHUNK_ROWS, self.chunk_rows // 2)
+            logger.warning(f"⚠️ RSS {current:.0f} MB over the {self.max_rss_mb:.0f} MB cap, "
+                           f"chunk size now {self.chunk_rows} rows")
+        return self.chunk_rows
+
+    def summary(self) -> str:
+        return f"peak RSS {self.peak_mb:.0f} MB (cap {self.max_rss_mb:.0f} MB), last chunk size {self.chunk_rows} rows"
+
+
+class CsvStream:
+    """Iterates a CSV as DataFrame chunks with fixed dtypes and a continuous row index"""
+
+    def __init__(self, path, chunk_rows: int = None, max_rss_mb: float = None, profile: Dict = None,
+                 **read_kwargs):
+        self.path = path
+        self.read_kwargs = read_kwargs
+        self.monitor = RssMonitor(max_rss_mb, chunk_rows)
+        self.profile = profile or scan_csv(path, self.monitor.chunk_rows, **read_kwargs)
+        self.rows = 0
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        dtypes = {col: dtype for col, dtype in self.profile['dtypes'].items()
+                  if col in pd.read_csv(self.path, nrows=0, **self.read_kwargs).columns}
+        with pd.read_csv(self.path, dtype=dtypes, iterator=True, **self.read_kwargs) as reader:
+            while True:
+                try:
+                    chunk = reader.get_chunk(self.monitor.chunk_rows)
+                except StopIteration:
+                    break
+                self.rows += len(chunk)
+                yield chunk
+                self.monitor.check()
+
+
+def write_chunks(chunks: Iterator[pd.DataFrame], output_path, columns: List[str] = None) -> int:
+    """Append chunks to one CSV (header once, atomic replace at the end); returns rows written"""
+    tmp_path = f"{output_path}.tmp"
+    rows, header = 0, True
+    with open(tmp_path, 'w', newline='') as f:
+        for chunk in chunks:
+            if columns is not None:
+                chunk = chunk.reindex(columns=columns)
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+            rows += len(chunk)
+        if header and columns is not None:
+            pd.DataFrame(columns=columns).to_csv(f, index=False)
+    os.replace(tmp_path, output_path)
+    return rows
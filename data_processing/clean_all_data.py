@@ -5,11 +5,42 @@ Run this script to clean ALL your data files automatically
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 import json
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'data' / 'database'))
+
+from streaming import CsvStream, scan_csv, write_chunks
+
+
+def clean_chunks(stream: CsvStream, empty_columns, source_name: str, cleaned_date: str):
+    """Universal cleaning steps applied chunk by chunk"""
+    seen = set()
+    for df in stream:
+        # 1. Remove complete duplicates (row hashes carry across chunks)
+        hashes = pd.util.hash_pandas_object(df, index=False)
+        new = np.fromiter((h not in seen for h in hashes.tolist()), dtype=bool, count=len(hashes))
+        keep = new & ~hashes.duplicated().to_numpy()
+        seen.update(hashes[keep].tolist())
+        df = df[keep]
+        
+        # 2. Remove columns that are completely empty (in the whole file)
+        df = df.drop(columns=empty_columns)
+        
+        # 3. Clean string columns (remove extra spaces)
+        for col in df.select_dtypes(include=['object']).columns:
+            df[col] = df[col].astype(str).str.strip()
+            # Replace 'nan' string with actual NaN
+            df[col] = df[col].replace('nan', np.nan)
+        
+        # 4. Add metadata
+        df['source_file'] = source_name
+        df['cleaned_date'] = cleaned_date
+        yield df
+
 def clean_all_files():
     """Main function to clean all CSV files"""
     
@@ -35,45 +66,32 @@ def clean_all_files():
         print(f"{'='*50}")
         
         try:
-            # Read the file
-            df = pd.read_csv(file_path, low_memory=False)
-            original_shape = df.shape
+            # Stream the file in chunks; a first pass fixes dtypes and finds empty columns
+            profile = scan_csv(file_path)
+            stream = CsvStream(file_path, profile=profile)
+            original_shape = (profile['rows'], len(profile['columns']))
             print(f"   Original: {original_shape[0]} rows, {original_shape[1]} columns")
             
-            # ========== UNIVERSAL CLEANING STEPS ==========
-            
-            # 1. Remove complete duplicates
-            df = df.drop_duplicates()
-            
-            # 2. Remove columns that are completely empty
-            df = df.dropna(axis=1, how='all')
-            
-            # 3. Clean string columns (remove extra spaces)
-            for col in df.select_dtypes(include=['object']).columns:
-                df[col] = df[col].astype(str).str.strip()
-                # Replace 'nan' string with actual NaN
-                df[col] = df[col].replace('nan', np.nan)
-            
-            # 4. Add metadata
-            df['source_file'] = file_path.name
-            df['cleaned_date'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-            
             # Save cleaned file
             output_path = cleaned_data_dir / f"cleaned_{file_path.name}"
-            df.to_csv(output_path, index=False)
+            cleaned_date = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+            cleaned_rows = write_chunks(clean_chunks(stream, profile['empty'], file_path.name, cleaned_date), output_path)
+            cleaned_shape = (cleaned_rows, original_shape[1] - len(profile['empty']) + 2)
             
             # Record in report
             cleaning_report[file_path.name] = {
                 'status': 'success',
                 'original_rows': original_shape[0],
                 'original_cols': original_shape[1],
-                'cleaned_rows': df.shape[0],
-                'cleaned_cols': df.shape[1],
-                'rows_removed': original_shape[0] - df.shape[0]
+                'cleaned_rows': cleaned_shape[0],
+                'cleaned_cols': cleaned_shape[1],
+                'rows_removed': original_shape[0] - cleaned_shape[0],
+                'peak_rss_mb': round(stream.monitor.peak_mb)
             }
             
-            print(f"   ✅ Cleaned: {df.shape[0]} rows, {df.shape[1]} columns")
+            print(f"   ✅ Cleaned: {cleaned_shape[0]} rows, {cleaned_shape[1]} columns")
             print(f"   💾 Saved to: {output_path.name}")
+            print(f"   🧠 {stream.monitor.summary()}")
             
         except Exception as e:
             print(f"   ❌ Error: {str(e)}")
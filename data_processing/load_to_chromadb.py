@@ -11,21 +11,92 @@ from pathlib import Path
 import json
 from typing import List, Dict
 import hashlib
-from sentence_transformers import SentenceTransformer
+import os
+import sys
+import argparse
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'data' / 'database'))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'milestone2' / 'backend'))
+
+from documents import as_text, join_parts, row_view
+from embedding_cache import EmbeddingCache
+from incremental import IncrementalSync, keyed, natural_key, write_manifest
+from streaming import CsvStream
+from checkpoint import Checkpoint, row_batches, row_positions
+from dedup import TextDedup
+from pipeline import QUEUE_SIZE, WRITE_WORKERS, Pipeline, Stage, summary
+from src.collection_aliases import CollectionAliases, ValidationError
+from src.embeddings import PROVIDERS, EmbeddingMismatch, check_collection, collection_metadata, get_provider
+
 print("="*60)
 print("🚀 PROPBOT CHROMADB LOADER")
 print("="*60)
 
+_SKIP = object()
+
+# Source rows per checkpointed batch
+BATCH_ROWS = 5000
+
+
+def metadata_value(val):
+    """ChromaDB-compatible metadata value, or _SKIP for missing and non-finite values"""
+    if not pd.notna(val):
+        return _SKIP
+    if isinstance(val, (bool, str)):
+        return val
+    if isinstance(val, (int, float)):
+        return float(val) if np.isfinite(val) else _SKIP
+    return str(val)
+
+
+def metadata_values(values: pd.Series, mixed: bool) -> np.ndarray:
+    """metadata_value() over a column; values of mixed-dtype rows are Python scalars"""
+    dtype = values.dtype
+    out = np.empty(len(values), dtype=object)
+    if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+        data = values.to_numpy()
+        out[:] = data.tolist()
+        out[~np.isfinite(data)] = _SKIP
+    elif isinstance(dtype, np.dtype) and dtype.kind in 'iub':
+        data = values.to_numpy()
+        if not mixed:
+            out[:] = list(map(str, data.tolist()))
+        elif dtype.kind == 'b':
+            out[:] = data.tolist()
+        else:
+            out[:] = data.astype(float).tolist()
+    elif isinstance(dtype, pd.StringDtype):
+        out[:] = values.to_numpy(dtype=object)
+        out[values.isna().to_numpy()] = _SKIP
+    else:
+        out[:] = [metadata_value(v) for v in values.to_numpy(dtype=object)]
+    return out
+
+
 class ChromaDBLoader:
-    def __init__(self, host="localhost", port=8000):
-        """Initialize ChromaDB client and embedding model"""
+    def __init__(self, host="localhost", port=8000, workers=None, threads=None, batch_size=None,
+                 cache_dir=None, use_cache=True, full_refresh=False, chunk_rows=None, max_rss_mb=None,
+                 write_workers=None, queue_size=None, mode='fresh', provider=None, dedup=True, client=None):
+        """Initialize ChromaDB client and embedding model
+        
+        workers > 1 encodes with a sentence-transformers multi-process pool;
+        threads sets intra-op threads per worker (default: cores / workers).
+        Embeddings are cached on disk by content hash unless use_cache is False.
+        Collections are upserted incrementally unless full_refresh rebuilds them
+        into a new version, which replaces the live one only once validated.
+        CSVs are streamed in chunks of chunk_rows, shrunk when RSS passes max_rss_mb.
+        Building, encoding and write_workers Chroma writers run as pipelined stages.
+        mode is 'fresh', 'resume' (skip committed batches) or 'retry-failed'.
+        provider names the embedding provider (default: $EMBEDDING_PROVIDER or minilm).
+        dedup embeds and stores each distinct document text once.
+        client replaces the HTTP client (e.g. an in-process one).
+        """
         print("\n📡 Connecting to ChromaDB...")
         
         # Try to connect to ChromaDB
         try:
-            self.client = chromadb.HttpClient(
+            self.client = client or chromadb.HttpClient(
                 host=host,
                 port=port,
                 settings=Settings(anonymized_telemetry=False)
@@ -35,20 +106,83 @@ class ChromaDBLoader:
             print(f"❌ Could not connect to ChromaDB. Make sure it's running!")
             print(f"   Run: docker-compose up -d chromadb")
             raise e
+        self.aliases = CollectionAliases(self.client)
+        
+        cores = os.cpu_count() or 1
+        self.workers = max(1, int(workers or os.getenv('EMBED_WORKERS', 1)))
+        self.threads = max(1, int(threads or os.getenv('EMBED_THREADS', 0) or cores // self.workers))
+        self.batch_size = int(batch_size or os.getenv('EMBED_BATCH_SIZE', 64))
         
-        # Initialize embedding model
+        # Worker processes inherit these, so workers x threads does not oversubscribe the cores
+        for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+            os.environ[var] = str(self.threads)
+        
+        # Initialize embedding model (sentence-transformers providers encode here, with the worker pool)
         print("🤖 Loading embedding model...")
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("✅ Embedding model loaded")
+        self.provider = get_provider(provider)
+        self.model_name = self.provider.model
+        self.embedding_model = getattr(self.provider, 'encoder', None)
+        if self.embedding_model is not None:
+            # torch reads OMP_NUM_THREADS only when first imported (possibly before this loader), so set it directly
+            import torch
+            torch.set_num_threads(self.threads)
+        self.cache = EmbeddingCache(self.model_name, cache_dir) if use_cache else None
+        self.pool = None
+        if self.workers > 1 and self.embedding_model is not None:
+            self.pool = self.embedding_model.start_multi_process_pool(target_devices=['cpu'] * self.workers)
+        print(f"✅ {self.model_name} loaded ({self.workers} worker(s) x {self.threads} thread(s), "
+              f"batch size {self.batch_size})")
         
+        self.full_refresh = full_refresh
+        self.chunk_rows = chunk_rows
+        self.max_rss_mb = max_rss_mb
+        self.write_workers = write_workers or WRITE_WORKERS
+        self.queue_size = queue_size or QUEUE_SIZE
+        self.mode = mode
+        self.dedup = dedup
         self.collections = {}
         
     def create_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Create embeddings for a list of texts"""
+        """Create embeddings for a list of texts, encoding only those not in the cache"""
         if not texts:
             return []
-        embeddings = self.embedding_model.encode(texts)
-        return embeddings.tolist()
+        if self.cache is None:
+            return self.encode(texts).tolist()
+        return self.cache.embed(texts, self.encode).tolist()
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts with the model
+        
+        Texts are encoded shortest to longest so each batch pads to similar
+        lengths, then returned in the original order.
+        """
+        if self.embedding_model is None:
+            return self.provider.encode(texts)
+        order = np.argsort([len(t) for t in texts], kind='stable')
+        ordered = [texts[i] for i in order]
+        
+        if self.pool is not None:
+            # Contiguous length-sorted chunks, a few per worker to balance the load
+            chunk_size = max(self.batch_size, -(-len(ordered) // (self.workers * 4)))
+            encoded = self.embedding_model.encode_multi_process(
+                ordered, self.pool, batch_size=self.batch_size, chunk_size=chunk_size
+            )
+        else:
+            encoded = self.embedding_model.encode(ordered, batch_size=self.batch_size)
+        
+        embeddings = np.empty_like(encoded)
+        embeddings[order] = encoded
+        return embeddings
+    
+    def close(self):
+        """Persist the embedding cache and stop the encoding worker pool"""
+        if self.cache is not None:
+            self.cache.flush()
+            stats = self.cache.stats()
+            print(f"💾 Embedding cache: {stats['entries']} entries, {stats['hits']} hits, {stats['misses']} misses")
+        if self.pool is not None:
+            self.embedding_model.stop_multi_process_pool(self.pool)
+            self.pool = None
     
     def determine_collection_name(self, filename: str) -> str:
         """Determine collection name based on filename"""
@@ -80,12 +214,14 @@ class ChromaDBLoader:
             # Generic name based on file
             return filename.replace('cleaned_', '').replace('.csv', '').lower()
     
-    def prepare_documents(self, df: pd.DataFrame, collection_name: str) -> tuple:
+    def source_prefix(self, collection_name: str, filepath: Path, shared: bool) -> str:
+        """ID prefix of a file's rows; files sharing a collection get their own so IDs never collide"""
+        if not shared:
+            return collection_name
+        return f"{collection_name}_{filepath.stem.lower().replace('cleaned_', '')}"
+    
+    def prepare_documents(self, df: pd.DataFrame, collection_name: str, prefix: str = None) -> tuple:
         """Prepare documents, embeddings, and metadata for ChromaDB"""
-        documents = []
-        metadatas = []
-        ids = []
-        
         # Select key columns based on collection type
         if collection_name == 'boston_properties':
             text_cols = ['full_address', 'owner_name', 'land_use_code', 'LU_DESC']
@@ -108,112 +244,176 @@ class ChromaDBLoader:
             text_cols = df.select_dtypes(include=['object']).columns.tolist()[:5]
             meta_cols = df.columns.tolist()[:10]
         
-        # Process each row
-        for idx, row in df.iterrows():
-            # Create text from available columns
-            text_parts = []
-            for col in text_cols:
-                if col in row.index and pd.notna(row[col]):
-                    text_parts.append(str(row[col]))
-            
-            if not text_parts:
-                continue
-                
-            doc_text = " | ".join(text_parts)
-            
-            # Create metadata
-            metadata = {}
-            for col in meta_cols:
-                if col in row.index and pd.notna(row[col]):
-                    val = row[col]
-                    # ChromaDB requires specific types
-                    if isinstance(val, (bool, str)):
-                        metadata[col] = val
-                    elif isinstance(val, (int, float)):
-                        if not np.isnan(val) and not np.isinf(val):
-                            metadata[col] = float(val)
-                    else:
-                        metadata[col] = str(val)
-            
-            documents.append(doc_text)
-            metadatas.append(metadata)
-            ids.append(f"{collection_name}_{idx}")
-            
-            # Process in batches of 5000
-            if len(documents) >= 5000:
-                yield documents, metadatas, ids
-                documents = []
-                metadatas = []
-                ids = []
-        
-        # Yield remaining documents
-        if documents:
-            yield documents, metadatas, ids
+        # Build every document and metadata dict column-wise
+        view = row_view(df)
+        parts = []
+        for col in text_cols:
+            if col in view.columns:
+                parts.append(np.where(view[col].isna().to_numpy(), None, as_text(view[col])))
+        text = join_parts(parts, " | ", len(df))
+        keep = text != None  # noqa: E711 (elementwise)
+        
+        columns = [col for col in meta_cols if col in view.columns]
+        values = [metadata_values(view[col], mixed=view is df)[keep] for col in columns]
+        documents = text[keep].tolist()
+        metadatas = [
+            {col: val for col, val in zip(columns, row) if val is not _SKIP}
+            for row in zip(*values)
+        ] if columns else [{} for _ in documents]
+        ids = ((prefix or collection_name) + "_" + df.index[keep].astype(str)).tolist()
+        
+        # Yield in batches of 5000
+        for start in range(0, len(documents), 5000):
+            end = start + 5000
+            yield documents[start:end], metadatas[start:end], ids[start:end]
     
-    def load_file_to_chromadb(self, filepath: Path) -> bool:
-        """Load a single CSV file into ChromaDB"""
+    def load_collection(self, collection_name: str, filepaths: List[Path]) -> List[str]:
+        """Load every cleaned CSV that maps to one collection; returns the names of files that failed
+        
+        All files share one diff, dedup and (for builds) one promotion, so a
+        file never deletes the rows another file wrote.
+        """
+        print(f"\n📦 Collection: {collection_name} ({len(filepaths)} file(s))")
         try:
-            filename = filepath.name
-            collection_name = self.determine_collection_name(filename)
-            
-            print(f"\n📂 Loading {filename}")
-            print(f"   Collection: {collection_name}")
-            
-            # Read CSV
-            df = pd.read_csv(filepath, low_memory=False)
-            print(f"   Rows: {len(df)}")
-            
-            # Create or get collection
-            try:
-                collection = self.client.create_collection(
-                    name=collection_name,
-                    metadata={"hnsw:space": "cosine"}
-                )
-                print(f"   ✅ Created new collection: {collection_name}")
-            except:
-                collection = self.client.get_collection(name=collection_name)
-                print(f"   📦 Using existing collection: {collection_name}")
-            
-            # Process and add documents in batches
-            total_added = 0
-            for batch_docs, batch_meta, batch_ids in self.prepare_documents(df, collection_name):
-                if batch_docs:
-                    # Create embeddings
-                    embeddings = self.create_embeddings(batch_docs)
-                    
-                    # Add to ChromaDB
-                    collection.add(
-                        documents=batch_docs,
-                        embeddings=embeddings,
-                        metadatas=batch_meta,
-                        ids=batch_ids
-                    )
-                    total_added += len(batch_docs)
-                    print(f"   Added {total_added} documents...")
-            
-            print(f"   ✅ Total documents added: {total_added}")
-            self.collections[collection_name] = collection
-            return True
+            # Committed/failed row ranges survive crashes, per source file
+            checkpoints = {fp: Checkpoint(f"{collection_name}__{fp.stem}", fp, self.mode) for fp in filepaths}
+            resume = next((cp.state.get('target') for cp in checkpoints.values() if cp.resumed), None)
             
+            # Live collection, or a new version (continued when resuming) that the alias moves to once validated
+            collection, building = self.aliases.open_build(
+                collection_name, rebuild=self.full_refresh, resume=resume,
+                metadata=collection_metadata(self.provider, {"hnsw:space": "cosine"})
+            )
+            check_collection(collection, self.provider)
         except Exception as e:
-            print(f"   ❌ Error: {str(e)}")
-            return False
+            print(f"   ❌ {e}; rerun with --full-refresh or re-embed the collection"
+                  if isinstance(e, EmbeddingMismatch) else f"   ❌ Error: {str(e)}")
+            return [fp.name for fp in filepaths]
+        sync = IncrementalSync(collection, source=", ".join(str(fp) for fp in filepaths), name=collection_name)
+        texts_seen = TextDedup(enabled=self.dedup)
+        print(f"   📦 {collection.name} ({len(sync.existing)} existing documents)")
+        
+        failed_files, failed_batches = [], 0
+        for filepath in filepaths:
+            checkpoint = checkpoints[filepath]
+            checkpoint.state['target'] = collection.name
+            prefix = self.source_prefix(collection_name, filepath, shared=len(filepaths) > 1)
+            try:
+                state = self.load_file(filepath, collection_name, prefix, checkpoint, sync, texts_seen)
+            except Exception as e:
+                print(f"   ❌ Error: {str(e)}")
+                failed_files.append(filepath.name)
+                continue
+            if state['failed_batches']:
+                failed_batches += state['failed_batches']
+                failed_files.append(filepath.name)
+        
+        # Deleting rows that disappeared needs a complete pass over every file of the collection
+        complete = not failed_files and all(cp.mode != 'retry-failed' for cp in checkpoints.values())
+        manifest = sync.finish(delete=complete)
+        annotated = texts_seen.annotate(collection)
+        manifest['dedup'] = {**texts_seen.stats(), 'annotated': annotated}
+        counts = manifest['counts']
+        print(f"   ✅ {counts['added']} added, {counts['updated']} updated, {counts['deleted']} deleted, "
+              f"{counts['unchanged']} unchanged")
+        print(f"   🧬 {texts_seen.summary()}")
+        print(f"   🧾 Manifest: {write_manifest(manifest)}")
+        if self.cache is not None:
+            self.cache.flush()
+        self.collections[collection_name] = collection
+        if failed_files:
+            print(f"   ❗ {failed_batches} batches failed in {failed_files}, rerun with --retry-failed"
+                  + (f" ({collection.name} not promoted)" if building else ""))
+            return failed_files
+        if building:
+            try:
+                result = self.aliases.promote(collection_name, collection, expected=len(sync.seen))
+            except ValidationError as e:
+                print(f"   ❌ Validation failed, {collection_name} still serves the previous version: {e}")
+                return [fp.name for fp in filepaths]
+            print(f"   🔀 {collection_name} -> {collection.name} ({result['sample_queries']} sample queries ok, "
+                  f"expired: {result['deleted'] or 'none'})")
+        return []
     
-    def load_all_files(self):
-        """Load all cleaned CSV files"""
-        cleaned_dir = Path("cleaned_data")
-        csv_files = list(cleaned_dir.glob("cleaned_*.csv"))
+    def load_file(self, filepath: Path, collection_name: str, prefix: str, checkpoint: Checkpoint,
+                  sync: IncrementalSync, texts_seen: TextDedup) -> Dict:
+        """Stream one CSV through build -> embed -> write into the collection's shared sync"""
+        print(f"\n📂 Loading {filepath.name}")
         
-        print(f"\n📊 Found {len(csv_files)} cleaned files to load")
+        # Stream the CSV in chunks with the dtypes a whole-file read would infer
+        stream = CsvStream(filepath, chunk_rows=self.chunk_rows, max_rss_mb=self.max_rss_mb)
+        print(f"   Rows: {stream.profile['rows']}")
+        if checkpoint.resumed:
+            print(f"   ↩️ {checkpoint.mode}: {checkpoint.watermark} rows committed, "
+                  f"{len(checkpoint.failed)} failed batches")
         
-        success_count = 0
-        failed_files = []
+        # Chunks indexed by the natural key (so IDs stay stable) -> changed batches -> embed -> upsert
+        key, key_counts = natural_key(profile=stream.profile), {}
+        
+        def build(chunk):
+            if chunk.empty:
+                return
+            start = int(chunk.index[0])
+            chunk = keyed(chunk, key_counts, key)
+            documents, metadatas, ids = [], [], []
+            for batch_docs, batch_meta, batch_ids in self.prepare_documents(chunk, collection_name, prefix):
+                documents.extend(batch_docs)
+                metadatas.extend(batch_meta)
+                ids.extend(batch_ids)
+            positions = row_positions(chunk.index, prefix, ids, start)
+            for lo, hi, docs in row_batches(start, start + len(chunk), positions, BATCH_ROWS):
+                # Repeated texts are not embedded again, they become references on the first record
+                batch = texts_seen.unique(documents[docs], metadatas[docs], ids[docs])
+                if not checkpoint.wanted(lo, hi):
+                    sync.skip(batch[2])
+                    continue
+                batch = sync.changed(*batch)
+                if batch[2]:
+                    yield (lo, hi), batch
+                else:
+                    checkpoint.commit(lo, hi)
+            print(f"   Read {stream.rows} rows...")
+        
+        def embed(item):
+            rows, batch = item
+            try:
+                return rows, batch, self.create_embeddings(batch[0])
+            except Exception as e:
+                print(f"   ⚠️ Rows {rows[0]}-{rows[1]} failed: {e}")
+                checkpoint.fail(*rows, e)
+        
+        def write(item):
+            rows, (batch_docs, batch_meta, batch_ids), embeddings = item
+            try:
+                sync.write(batch_docs, batch_meta, batch_ids, embeddings)
+                checkpoint.commit(*rows)
+            except Exception as e:
+                print(f"   ⚠️ Rows {rows[0]}-{rows[1]} failed: {e}")
+                checkpoint.fail(*rows, e)
+        
+        metrics = Pipeline([
+            Stage('build', build, fan_out=True),
+            Stage('embed', embed),
+            Stage('write', write, workers=self.write_workers)
+        ], queue_size=self.queue_size).run(stream)
+        print(f"   ⏱️ {summary(metrics)}")
+        print(f"   🧠 {stream.monitor.summary()}")
+        return checkpoint.finish(stream.profile['rows'])
+    
+    def load_all_files(self, cleaned_dir: Path = Path("cleaned_data")):
+        """Load all cleaned CSV files, grouped by the collection they go into"""
+        csv_files = sorted(Path(cleaned_dir).glob("cleaned_*.csv"))
         
+        print(f"\n📊 Found {len(csv_files)} cleaned files to load")
+        
+        groups = {}
         for filepath in csv_files:
-            if self.load_file_to_chromadb(filepath):
-                success_count += 1
-            else:
-                failed_files.append(filepath.name)
+            groups.setdefault(self.determine_collection_name(filepath.name), []).append(filepath)
+        
+        failed_files = []
+        for collection_name, filepaths in groups.items():
+            failed_files.extend(self.load_collection(collection_name, filepaths))
+        success_count = len(csv_files) - len(failed_files)
         
         # Summary
         print("\n" + "="*60)
@@ -259,14 +459,50 @@ def test_search(loader):
                 print(f"  Found in properties: {results['documents'][0][0][:100]}...")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load cleaned CSVs into ChromaDB")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Encoding processes (default: $EMBED_WORKERS or 1)")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="Intra-op threads per worker (default: $EMBED_THREADS or cores / workers)")
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Encoding batch size (default: $EMBED_BATCH_SIZE or 64)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Embedding cache directory (default: $EMBEDDING_CACHE_DIR or data/embedding_cache)")
+    parser.add_argument('--no-cache', action='store_true', help="Re-embed every document")
+    parser.add_argument('--full-refresh', action='store_true',
+                        help="Rebuild each collection into a new version and switch to it once validated")
+    parser.add_argument('--chunk-rows', type=int, default=None,
+                        help="CSV rows read per chunk (default: $INGEST_CHUNK_ROWS or 50000)")
+    parser.add_argument('--max-rss-mb', type=float, default=None,
+                        help="Shrink chunks when RSS exceeds this (default: $INGEST_MAX_RSS_MB or 2048)")
+    parser.add_argument('--write-workers', type=int, default=None,
+                        help="Concurrent Chroma writes (default: $PIPELINE_WRITE_WORKERS or 2)")
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help="Batches buffered between stages (default: $PIPELINE_QUEUE_SIZE or 4)")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Store every row, even when its document text repeats an earlier one")
+    parser.add_argument('--provider', choices=sorted(PROVIDERS), default=None,
+                        help="Embedding provider (default: $EMBEDDING_PROVIDER or minilm)")
+    resume = parser.add_mutually_exclusive_group()
+    resume.add_argument('--resume', action='store_true', help="Skip batches committed by the previous run")
+    resume.add_argument('--retry-failed', action='store_true', help="Reprocess only the batches that failed")
+    args = parser.parse_args()
+    
     # Check if ChromaDB is accessible
     print("\n⚠️  Make sure ChromaDB is running!")
     print("   If not, run: docker-compose up -d chromadb")
     input("\nPress Enter to continue...")
     
+    loader = None
     try:
         # Initialize loader
-        loader = ChromaDBLoader(host="localhost", port=8000)
+        loader = ChromaDBLoader(host="localhost", port=8000, workers=args.workers,
+                                threads=args.threads, batch_size=args.batch_size,
+                                cache_dir=args.cache_dir, use_cache=not args.no_cache,
+                                full_refresh=args.full_refresh, chunk_rows=args.chunk_rows,
+                                max_rss_mb=args.max_rss_mb, write_workers=args.write_workers,
+                                queue_size=args.queue_size, provider=args.provider, dedup=not args.no_dedup,
+                                mode='resume' if args.resume else 'retry-failed' if args.retry_failed else 'fresh')
         
         # Load all files
         collections = loader.load_all_files()
@@ -281,3 +517,7 @@ if __name__ == "__main__":
         print("\nMake sure:")
         print("1. ChromaDB is running (docker-compose up -d chromadb)")
         print("2. You have installed: pip install chromadb sentence-transformers")
+    
+    finally:
+        if loader is not None:
+            loader.close()
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import uuid
 
 from database.db import get_db
@@ -93,9 +93,16 @@ def create_guest_user(db: Session = Depends(get_db)):
     db.commit()
     db.refresh(guest_user)
     
-    # Create access token
+    # Create access token - guest expiry travels in the claims so /chat
+    # never needs to look the guest up again
     access_token = utils.create_access_token(
-        data={"user_id": guest_user.id, "guest_id": guest_id, "is_guest": True}
+        data={
+            "user_id": guest_user.id,
+            "guest_id": guest_id,
+            "is_guest": True,
+            "guest_expires_at": int(expires_at.replace(tzinfo=timezone.utc).timestamp())
+        },
+        expires_delta=expires_at - datetime.utcnow()
     )
     
     return {
@@ -115,4 +122,11 @@ def verify_token(token: str):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
-    return {"valid": True, "payload": payload}
\ No newline at end of file
+    utils.validate_claims(payload)
+    return {"valid": True, "payload": payload}
+
+@router.post("/logout")
+def logout_user(claims: dict = Depends(utils.require_current_claims)):
+    """Revoke every token issued to the current user so far"""
+    utils.revoked_users.revoke(claims["user_id"])
+    return {"message": "Logged out", "user_id": claims["user_id"]}
@@ -1,7 +1,11 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import threading
+import time
 import os
 
 # Password hashing
@@ -12,6 +16,8 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 43200  # 30 days
 
+bearer_scheme = HTTPBearer(auto_error=False)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,12 +29,14 @@ def get_password_hash(password: str) -> str:
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT token"""
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+    # Sub-second iat, so a login right after a logout (same second) is not already revoked
+    to_encode.update({"exp": expire, "iat": time.time()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -38,4 +46,96 @@ def verify_token(token: str):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+
+class RevocationCache:
+    """In-process TTL cache of revoked/deactivated users.
+
+    Tokens issued to a user before their revocation time are rejected. Entries
+    only need to live as long as the longest token, so they expire on their own.
+    """
+
+    def __init__(self, ttl_seconds: int = ACCESS_TOKEN_EXPIRE_MINUTES * 60, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}  # user_id -> (revoked_at epoch, evict_at monotonic)
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id: int, revoked_at: Optional[float] = None):
+        """Reject every token issued to user_id up to revoked_at (default: now)"""
+        revoked_at = time.time() if revoked_at is None else revoked_at
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._purge()
+            self._entries[user_id] = (revoked_at, time.monotonic() + self.ttl_seconds)
+
+    def is_revoked(self, user_id: int, issued_at: Optional[float]) -> bool:
+        """Check whether a token issued at issued_at has been revoked"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False
+        revoked_at, evict_at = entry
+        if evict_at < time.monotonic():
+            with self._lock:
+                self._entries.pop(user_id, None)
+            return False
+        return issued_at is None or issued_at <= revoked_at
+
+    def _purge(self):
+        now = time.monotonic()
+        for user_id in [u for u, (_, evict_at) in self._entries.items() if evict_at < now]:
+            del self._entries[user_id]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+revoked_users = RevocationCache()
+
+
+def validate_claims(payload: dict) -> dict:
+    """Check guest expiry and revocation using only the signed claims"""
+    if payload.get("is_guest"):
+        guest_expires_at = payload.get("guest_expires_at")
+        if guest_expires_at is not None and guest_expires_at < datetime.now(timezone.utc).timestamp():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Guest session expired"
+            )
+
+    if revoked_users.is_revoked(payload.get("user_id"), payload.get("iat")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    return payload
+
+
+def get_current_claims(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> Optional[dict]:
+    """Dependency: decode the bearer token, or None for anonymous requests.
+
+    No database access - everything needed is in the signed token.
+    """
+    if credentials is None:
+        return None
+
+    payload = verify_token(credentials.credentials)
+    if not payload or payload.get("user_id") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return validate_claims(payload)
+
+
+def require_current_claims(claims: Optional[dict] = Depends(get_current_claims)) -> dict:
+    """Dependency: like get_current_claims but rejects anonymous requests"""
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return claims
@@ -2,7 +2,7 @@
 FastAPI Backend for PropBot with RAG + Real Data Parsing
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
@@ -12,14 +12,30 @@ from datetime import datetime, timezone
 from database.db import engine, Base, get_db
 from auth import routes as auth_routes
 from auth.models import User, ChatHistory
+from auth.utils import get_current_claims
 from sqlalchemy.orm import Session
 import re
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# The backend's own src/ (milestone2/src holds an older, incompatible rag_pipeline)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.rag_pipeline import PropBotRAG
+from src.market_analytics import MarketAnalytics
+from src.trending import TrendingTracker
+from src.knn_graph import KNNGraph
+from src.property_store import get_default_store, normalize_property_id
+from src.price_model import PriceModel
+from src.value_scoring import ValueInsights
+from src.commute import CommuteEngine
+from src.nearby import NearbyIndex, DEFAULT_RADIUS_MILES
+from src.crime_grid import CrimeGrid
+from src.crime_cube import CrimeCube, NEIGHBORHOOD_DISTRICTS
+from src.geocoder import Geocoder
+from src.map_index import MapIndex, DEFAULT_LIMIT, parse_bbox
+from src.autocomplete import AutocompleteIndex
 import json
 import logging
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,9 +54,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-rag = PropBotRAG()
+property_store = get_default_store()
+
+geocoder = Geocoder()
+
+# Known property addresses first, then the offline geocoder (street precision or better)
+commute_engine = CommuteEngine(locate_address=lambda address: property_store.locate(address) or geocoder.locate(address))
+nearby_index = NearbyIndex(layers={"transit": commute_engine.stations})
+crime_grid = CrimeGrid()
+crime_cube = CrimeCube()
+map_index = MapIndex.from_store(property_store)
+autocomplete_index = AutocompleteIndex.from_store(property_store, list(NEIGHBORHOOD_DISTRICTS))
+
+rag = PropBotRAG(property_store=property_store, nearby=nearby_index, crime_grid=crime_grid, crime_cube=crime_cube)
 logger.info("✅ RAG Pipeline initialized")
 
+trending = TrendingTracker()
+value_insights = ValueInsights()
+analytics = MarketAnalytics(trending=trending, insights=value_insights)
+logger.info("✅ Market analytics snapshot loaded")
+
+knn_graph = KNNGraph()
+
+price_model = PriceModel()
+price_model.warm()
+
 Base.metadata.create_all(bind=engine)
 logger.info("✅ Database tables created")
 
@@ -102,10 +140,44 @@ def get_property_image(index):
     return images[index % len(images)]
 
 
+def property_card(property_id, record, index, doc_text='', match_score=None):
+    """Build the UI property payload from a canonical store record
+
+    Falls back to parsing the document text only when the property is not in
+    the store; fields that cannot be known are left empty rather than guessed.
+    """
+    if record is None:
+        parsed = parse_property_document(doc_text)
+        record = {
+            'address': parsed['address'],
+            'price': parsed['price'],
+            'bedrooms': parsed['beds'],
+            'bathrooms': parsed['baths'],
+            'property_type': parsed['type']
+        }
+    
+    return {
+        'property_id': property_id,
+        'address': record.get('address'),
+        'price': record.get('price'),
+        'bedrooms': record.get('bedrooms'),
+        'bathrooms': record.get('bathrooms'),
+        'beds': record.get('bedrooms'),
+        'baths': record.get('bathrooms'),
+        'sqft': record.get('sqft'),
+        'year_built': record.get('year_built'),
+        'property_type': record.get('property_type'),
+        'neighborhood': record.get('neighborhood'),
+        'zip_code': record.get('zip_code'),
+        'image': get_property_image(index),
+        'description': doc_text[:200] if doc_text else record.get('address'),
+        'match_score': match_score
+    }
+
+
 class ChatRequest(BaseModel):
     query: str
     conversation_id: Optional[str] = None
-    user_id: Optional[int] = None
 
 
 class PropertySearch(BaseModel):
@@ -114,14 +186,29 @@ class PropertySearch(BaseModel):
     bathrooms: Optional[int] = None
     min_price: Optional[float] = None
     max_price: Optional[float] = None
-    user_id: Optional[int] = None
     mode: Optional[str] = "buy"
 
 
+class PricePredictionRequest(BaseModel):
+    neighborhood: Optional[str] = None
+    zip_code: Optional[str] = None
+    bedrooms: Optional[int] = None
+    bathrooms: Optional[int] = None
+    sqft: Optional[float] = None
+    year_built: Optional[int] = None
+
+
+class PriceBatchRequest(BaseModel):
+    properties: List[PricePredictionRequest]
+
+
+class PropertyBatchRequest(BaseModel):
+    property_ids: List[str]
+
+
 class SavePropertyRequest(BaseModel):
     property_id: str
     property_data: dict
-    user_id: Optional[int] = None
 
 
 @app.get("/")
@@ -148,26 +235,15 @@ def health_check():
 
 
 @app.post("/chat")
-async def chat(request: ChatRequest, db: Session = Depends(get_db)):
-    """Enhanced chat endpoint"""
+async def chat(request: ChatRequest, db: Session = Depends(get_db), claims: Optional[dict] = Depends(get_current_claims)):
+    """Enhanced chat endpoint
+
+    The caller is identified by the bearer token. Guest expiry and revocation
+    are checked from the signed claims, so no DB read happens before retrieval.
+    """
     try:
         query = request.query
-        user_id = request.user_id
-        
-        if user_id:
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            if user.is_guest and user.expires_at:
-                now_utc = datetime.now(timezone.utc)
-                if user.expires_at.tzinfo is None:
-                    expires_at_utc = user.expires_at.replace(tzinfo=timezone.utc)
-                else:
-                    expires_at_utc = user.expires_at
-                
-                if expires_at_utc < now_utc:
-                    raise HTTPException(status_code=403, detail="Guest session expired")
+        user_id = claims["user_id"] if claims else None
         
         logger.info(f"Chat query: {query}")
         
@@ -185,6 +261,7 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
             sources = []
             docs_retrieved = 0
         else:
+            trending.record_chat(query)
             result = rag.chat(query)
             response_text = result.get("answer", "I couldn't find relevant information.")
             sources = result.get("sources", [])
@@ -239,9 +316,10 @@ async def get_chat_history_db(user_id: int, db: Session = Depends(get_db)):
 
 
 @app.post("/search")
-def search_properties(search: PropertySearch):
+def search_properties(search: PropertySearch, claims: Optional[dict] = Depends(get_current_claims)):
     """Search for properties using RAG"""
     try:
+        user_id = claims["user_id"] if claims else None
         query_parts = []
         if search.neighborhood:
             query_parts.append(f"in {search.neighborhood}")
@@ -260,7 +338,7 @@ def search_properties(search: PropertySearch):
         
         search_entry = {
             "id": len(search_history) + 1,
-            "user_id": search.user_id,
+            "user_id": user_id,
             "search_params": {
                 "neighborhood": search.neighborhood,
                 "bedrooms": search.bedrooms,
@@ -273,6 +351,7 @@ def search_properties(search: PropertySearch):
             "timestamp": datetime.now().isoformat()
         }
         search_history.append(search_entry)
+        analytics.record_search(search_entry["search_params"], query)
         
         return {
             "query": query,
@@ -320,12 +399,12 @@ def clear_search_history(user_id: int):
 
 
 @app.post("/save-property")
-def save_property(request: SavePropertyRequest):
+def save_property(request: SavePropertyRequest, claims: Optional[dict] = Depends(get_current_claims)):
     """Save a property to favorites"""
     try:
         saved_entry = {
             "id": len(saved_properties) + 1,
-            "user_id": request.user_id,
+            "user_id": claims["user_id"] if claims else None,
             "property_id": request.property_id,
             "property_data": request.property_data,
             "timestamp": datetime.now().isoformat()
@@ -345,6 +424,11 @@ def get_saved_properties(user_id: int):
     """Get user's saved properties"""
     try:
         user_saved = [prop for prop in saved_properties if prop["user_id"] == user_id]
+        details = property_store.get_properties(prop["property_id"] for prop in user_saved)
+        user_saved = [
+            {**prop, "property": details.get(normalize_property_id(prop["property_id"]))}
+            for prop in user_saved
+        ]
         
         return {
             "user_id": user_id,
@@ -376,82 +460,106 @@ def remove_saved_property(user_id: int, property_id: str):
 
 
 @app.get("/analytics/dashboard")
-def get_analytics_dashboard():
-    """Get market analytics dashboard data"""
+def get_analytics_dashboard(request: Request, response: Response):
+    """Get market analytics dashboard data
+
+    Served from the precomputed analytics snapshot plus incremental search
+    counters; clients can revalidate with If-None-Match.
+    """
     try:
-        total_searches = len(search_history)
-        
-        neighborhood_counts = {}
-        for search in search_history:
-            neighborhood = search["search_params"].get("neighborhood")
-            if neighborhood:
-                neighborhood_counts[neighborhood] = neighborhood_counts.get(neighborhood, 0) + 1
+        etag = analytics.etag(len(saved_properties))
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
         
-        hottest_neighborhoods = [
-            {"name": name, "search_count": count}
-            for name, count in sorted(neighborhood_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-        ]
-        
-        neighborhood_prices = {
-            "Back Bay": 1250000,
-            "Beacon Hill": 1180000,
-            "South End": 890000,
-            "Dorchester": 450000,
-            "Jamaica Plain": 620000,
-            "Charlestown": 780000,
-            "East Boston": 520000,
-            "Roxbury": 480000
-        }
-        
-        for hood in hottest_neighborhoods:
-            hood["avg_price"] = neighborhood_prices.get(hood["name"], 650000)
-        
-        bedroom_distribution = {}
-        for search in search_history:
-            bedrooms = search["search_params"].get("bedrooms")
-            if bedrooms:
-                bedroom_distribution[f"{bedrooms}BR"] = bedroom_distribution.get(f"{bedrooms}BR", 0) + 1
-        
-        return {
-            "total_properties": 29978,
-            "total_searches": total_searches,
-            "total_saved_properties": len(saved_properties),
-            "average_price": 687450,
-            "median_price": 620000,
-            "hottest_neighborhoods": hottest_neighborhoods if hottest_neighborhoods else [
-                {"name": "Back Bay", "search_count": 0, "avg_price": 1250000},
-                {"name": "Beacon Hill", "search_count": 0, "avg_price": 1180000},
-                {"name": "South End", "search_count": 0, "avg_price": 890000}
-            ],
-            "price_trends": {
-                "labels": ["2020", "2021", "2022", "2023", "2024", "2025"],
-                "values": [550000, 580000, 620000, 650000, 687450, 720000]
-            },
-            "property_types": {
-                "Condo": 12000,
-                "Single Family": 8500,
-                "Multi-family": 6200,
-                "Townhouse": 3278
-            },
-            "bedroom_distribution": bedroom_distribution if bedroom_distribution else {
-                "1BR": 8500,
-                "2BR": 11200,
-                "3BR": 7800,
-                "4BR+": 2478
-            },
-            "market_insights": {
-                "fastest_growing": "South End (+18% YoY)",
-                "best_value": "East Boston (12% under market average)",
-                "most_competitive": "Back Bay (95% of listings sold within 30 days)",
-                "investment_opportunity": "Dorchester (predicted 15% appreciation)"
-            }
-        }
+        response.headers["ETag"] = etag
+        return analytics.dashboard(len(saved_properties))
     
     except Exception as e:
         logger.error(f"Analytics error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/analytics/trending")
+def get_trending(window: str = "day", k: int = 10):
+    """Trending neighborhoods and queries over a time-decayed window"""
+    try:
+        return {
+            "window": window,
+            "neighborhoods": trending.top("neighborhoods", window, k, include_peers=True),
+            "queries": trending.top("queries", window, k, include_peers=True)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/insights/undervalued")
+def get_undervalued_properties(limit: int = 20, neighborhood: Optional[str] = None, max_price: Optional[float] = None):
+    """Properties assessed furthest below the price model's estimate"""
+    if not value_insights.available:
+        raise HTTPException(status_code=503, detail="Catalog value scores not built yet")
+    
+    properties = value_insights.top_undervalued(min(limit, 200), neighborhood, max_price)
+    return {
+        "properties": properties,
+        "total_found": len(properties),
+        "model_version": value_insights.version
+    }
+
+
+@app.get("/insights/neighborhoods")
+def get_neighborhood_insights():
+    """Per-neighborhood predicted-vs-assessed rollups"""
+    if not value_insights.available:
+        raise HTTPException(status_code=503, detail="Catalog value scores not built yet")
+    
+    return {
+        "neighborhoods": value_insights.neighborhoods(),
+        "market_insights": value_insights.market_insights(),
+        "model_version": value_insights.version
+    }
+
+
+@app.get("/crime/trends")
+def get_crime_trends(by: str = "year", district: Optional[str] = None, neighborhood: Optional[str] = None,
+                     offense_group: Optional[str] = None, year: Optional[int] = None,
+                     month: Optional[int] = None, hour: Optional[int] = None):
+    """Incident counts sliced from the crime cube, with year-over-year deltas"""
+    if not crime_cube.available:
+        raise HTTPException(status_code=503, detail="Crime cube not built yet")
+    
+    try:
+        rows = crime_cube.trends(by, district or neighborhood, offense_group, year, month, hour)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "by": by,
+        "filters": {"district": district, "neighborhood": neighborhood, "offense_group": offense_group,
+                    "year": year, "month": month, "hour": hour},
+        "trends": rows
+    }
+
+
+@app.get("/crime/safety")
+def get_safety_score(lat: Optional[float] = None, lon: Optional[float] = None, property_id: Optional[str] = None):
+    """Safety score and crime trend for a location from the precomputed crime grid"""
+    if not crime_grid.available:
+        raise HTTPException(status_code=503, detail="Crime grid not built yet")
+    
+    if property_id:
+        record = property_store.get_property(property_id)
+        if not record:
+            raise HTTPException(status_code=404, detail=f"Unknown property: {property_id}")
+        lat, lon = record.get("latitude"), record.get("longitude")
+    if lat is None or lon is None:
+        raise HTTPException(status_code=422, detail="Provide lat/lon or a property_id with coordinates")
+    
+    stats = crime_grid.lookup(lat, lon)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Location outside the Boston crime grid")
+    return {"latitude": lat, "longitude": lon, "property_id": property_id, **stats}
+
+
 @app.get("/sample-queries")
 def get_sample_queries():
     """Get sample queries"""
@@ -470,39 +578,31 @@ def get_sample_queries():
 
 
 @app.post("/predict-price")
-def predict_price(property: PropertySearch):
-    """Predict property price (NO CONFIDENCE)"""
+def predict_price(property: PricePredictionRequest):
+    """Predict property price with the trained price model"""
+    if not price_model.available:
+        raise HTTPException(status_code=503, detail="Price model not trained yet")
+    
     try:
         logger.info(f"Price prediction for: {property}")
         
-        base_price = 500000
-        
-        if property.bedrooms:
-            base_price += property.bedrooms * 100000
-        
-        if property.bathrooms:
-            base_price += property.bathrooms * 50000
-        
-        if property.neighborhood:
-            hood_lower = property.neighborhood.lower()
-            if "back bay" in hood_lower:
-                base_price *= 1.5
-            elif "beacon hill" in hood_lower:
-                base_price *= 1.4
-            elif "south end" in hood_lower:
-                base_price *= 1.3
+        prediction = price_model.predict(property.model_dump())
         
         return {
-            "predicted_price": round(base_price, 2),
+            "predicted_price": round(prediction["price"], 2),
             "price_range": {
-                "min": round(base_price * 0.9, 2),
-                "max": round(base_price * 1.1, 2)
+                "min": round(prediction["low"], 2),
+                "max": round(prediction["high"], 2)
             },
             "inputs": {
                 "neighborhood": property.neighborhood or "Not specified",
+                "zip_code": property.zip_code or "Not specified",
                 "bedrooms": property.bedrooms or "Not specified",
-                "bathrooms": property.bathrooms or "Not specified"
-            }
+                "bathrooms": property.bathrooms or "Not specified",
+                "sqft": property.sqft or "Not specified",
+                "year_built": property.year_built or "Not specified"
+            },
+            "model_version": price_model.version
         }
     
     except Exception as e:
@@ -510,6 +610,34 @@ def predict_price(property: PropertySearch):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/predict-price/batch")
+def predict_price_batch(request: PriceBatchRequest):
+    """Score many properties in one vectorized model call"""
+    if not price_model.available:
+        raise HTTPException(status_code=503, detail="Price model not trained yet")
+    if len(request.properties) > 10000:
+        raise HTTPException(status_code=400, detail="At most 10000 properties per request")
+    
+    try:
+        result = price_model.predict_batch(p.model_dump() for p in request.properties)
+        
+        return {
+            "predictions": [
+                {
+                    "predicted_price": round(float(price), 2),
+                    "price_range": {"min": round(float(low), 2), "max": round(float(high), 2)}
+                }
+                for price, low, high in zip(result["price"], result["low"], result["high"])
+            ],
+            "total": len(request.properties),
+            "model_version": price_model.version
+        }
+    
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/metrics")
 def get_metrics():
     """Get model metrics"""
@@ -530,40 +658,27 @@ def get_metrics():
 
 @app.get("/recommendations/{property_id}")
 def get_property_recommendations(property_id: str, limit: int = 5):
-    """Get similar property recommendations"""
+    """Get similar property recommendations from the precomputed kNN graph"""
+    if not knn_graph.available:
+        raise HTTPException(status_code=503, detail="Recommendation graph not built yet")
+    if property_id not in knn_graph:
+        raise HTTPException(status_code=404, detail=f"Unknown property: {property_id}")
+    
     try:
-        logger.info(f"Getting recommendations for: {property_id}")
+        neighbors = knn_graph.similar(property_id, limit)
+        details = property_store.get_properties(pid for pid, _ in neighbors)
         
-        queries = [
-            "3 bedroom luxury properties",
-            "properties in similar area",
-            "similar price range"
+        recommendations = [
+            {
+                **property_card(pid, details.get(pid), i, match_score=score),
+                "similarity_score": score
+            }
+            for i, (pid, score) in enumerate(neighbors)
         ]
         
-        recommendations = []
-        
-        for query in queries:
-            try:
-                result = rag.retrieve_documents(query, collection_name="properties")
-                
-                for doc in result[:2]:
-                    recommendations.append({
-                        "property_id": f"REC-{len(recommendations) + 1}",
-                        "description": doc['document'][:200],
-                        "similarity_score": round(1 - doc['distance'], 3)
-                    })
-                    
-                    if len(recommendations) >= limit:
-                        break
-            except:
-                continue
-            
-            if len(recommendations) >= limit:
-                break
-        
         return {
             "property_id": property_id,
-            "recommendations": recommendations[:limit],
+            "recommendations": recommendations,
             "total_found": len(recommendations)
         }
     
@@ -572,6 +687,74 @@ def get_property_recommendations(property_id: str, limit: int = 5):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/properties/{property_id}/nearby")
+def get_nearby(property_id: str, radius: float = DEFAULT_RADIUS_MILES, type: Optional[str] = None, limit: int = 5):
+    """Amenities, crime, transit and schools within radius miles of a property"""
+    record = property_store.get_property(property_id)
+    if not record:
+        raise HTTPException(status_code=404, detail=f"Unknown property: {property_id}")
+    if record.get("latitude") is None or record.get("longitude") is None:
+        raise HTTPException(status_code=422, detail=f"Property {property_id} has no coordinates")
+    
+    types = [t.strip() for t in type.split(",")] if type else None
+    try:
+        results = nearby_index.nearby(record["latitude"], record["longitude"], radius, types, min(limit, 50))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "property_id": property_id,
+        "address": record.get("address"),
+        "radius_miles": radius,
+        "nearby": results
+    }
+
+
+@app.post("/properties/batch")
+def get_properties_batch(request: PropertyBatchRequest):
+    """Fetch many property records in one call from the canonical store"""
+    if len(request.property_ids) > 1000:
+        raise HTTPException(status_code=400, detail="At most 1000 property_ids per request")
+    
+    try:
+        details = property_store.get_properties(request.property_ids)
+        requested = [normalize_property_id(pid) for pid in request.property_ids]
+        
+        return {
+            "properties": [details[pid] for pid in requested if pid in details],
+            "missing": [pid for pid in requested if pid not in details],
+            "total": len(details)
+        }
+    except Exception as e:
+        logger.error(f"Property batch error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/autocomplete")
+def autocomplete(q: str, limit: int = 8):
+    """Address, street and neighborhood suggestions as the user types (no embeddings or LLM)"""
+    started = time.perf_counter()
+    suggestions = autocomplete_index.suggest(q, limit)
+    return {
+        "query": q,
+        "suggestions": suggestions,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+
+@app.get("/properties/within")
+def get_properties_within(bbox: str, zoom: int = 12, limit: int = DEFAULT_LIMIT):
+    """Properties or per-cell clusters inside a map viewport (bbox=west,south,east,north)"""
+    try:
+        box = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not map_index.available:
+        raise HTTPException(status_code=503, detail="No located properties. Build the property store first.")
+    
+    return {"bbox": list(box), **map_index.within(box, zoom, limit)}
+
+
 @app.get("/properties/list")
 def list_all_properties():
     """Return all properties"""
@@ -579,26 +762,20 @@ def list_all_properties():
         logger.info("Fetching all properties from ChromaDB")
         
         all_results = rag.collection.get(
-            include=['documents', 'metadatas']
+            include=['documents', 'metadatas'],
+            limit=20
         )
         
-        properties = []
-        for i, doc in enumerate(all_results['documents'][:20]):
-            parsed = parse_property_document(doc)
-            
-            properties.append({
-                'property_id': all_results['ids'][i],
-                'address': parsed['address'],
-                'price': parsed['price'],
-                'bedrooms': parsed['beds'],
-                'bathrooms': parsed['baths'],
-                'beds': parsed['beds'],
-                'baths': parsed['baths'],
-                'sqft': int(parsed['beds'] * 600 + parsed['baths'] * 200),
-                'image': get_property_image(i),
-                'description': doc[:150],
-                'match_score': 0.80
-            })
+        ids = [
+            normalize_property_id((meta or {}).get('property_id')) or doc_id
+            for doc_id, meta in zip(all_results['ids'], all_results['metadatas'])
+        ]
+        details = property_store.get_properties(ids)
+        
+        properties = [
+            property_card(pid, details.get(pid), i, doc, match_score=0.80)
+            for i, (pid, doc) in enumerate(zip(ids, all_results['documents']))
+        ]
         
         logger.info(f"✅ Returning {len(properties)} properties")
         
@@ -627,44 +804,36 @@ def get_recommendations_by_features(search: PropertySearch):
         
         result = rag.retrieve_documents(query, collection_name="properties", k=15)
         
+        details = rag.hydrate_results(result)
+        
         recommendations = []
         filtered_count = 0
         
         for idx, doc in enumerate(result):
-            doc_id = doc.get('id', f"PROP-{idx + 1}")
-            doc_text = doc.get('document', '')
+            doc_id = doc['property_id'] or doc.get('id', f"PROP-{idx + 1}")
             distance = doc.get('distance', 0.3)
             
-            parsed = parse_property_document(doc_text)
+            card = property_card(
+                doc_id, details.get(doc['property_id']), len(recommendations),
+                doc.get('document', ''), round(max(0, 1 - distance), 3)
+            )
             
             # ✅ ONLY FILTER OUT 0 BEDS (commercial properties)
-            if parsed['beds'] == 0:
+            if card['beds'] == 0:
                 filtered_count += 1
                 continue
             
             # ✅ FILTER BY BEDROOMS IF SPECIFIED
-            if search.bedrooms and parsed['beds'] != search.bedrooms:
+            if search.bedrooms and card['beds'] != search.bedrooms:
                 filtered_count += 1
                 continue
             
             # ✅ FILTER BY BATHROOMS IF SPECIFIED
-            if search.bathrooms and parsed['baths'] != search.bathrooms:
+            if search.bathrooms and card['baths'] != search.bathrooms:
                 filtered_count += 1
                 continue
             
-            recommendations.append({
-                'property_id': doc_id,
-                'address': parsed['address'],
-                'price': parsed['price'],
-                'bedrooms': parsed['beds'],
-                'bathrooms': parsed['baths'],
-                'beds': parsed['beds'],
-                'baths': parsed['baths'],
-                'sqft': int(parsed['beds'] * 600 + parsed['baths'] * 200),
-                'image': get_property_image(len(recommendations)),
-                'description': doc_text[:200] if len(doc_text) > 200 else doc_text,
-                'match_score': round(max(0, 1 - distance), 3)
-            })
+            recommendations.append(card)
             
             if len(recommendations) >= 12:
                 break
@@ -688,72 +857,26 @@ def get_recommendations_by_features(search: PropertySearch):
 
 
 @app.post("/commute-time")
-def calculate_commute_time(property_address: str, destination: str):
-    """Calculate commute time"""
+def calculate_commute_time(property_address: str, destination: str, property_id: Optional[str] = None):
+    """Calculate commute time from the property's coordinates via the nearest MBTA stations"""
+    logger.info(f"Calculating commute: {property_address} -> {destination}")
+    
+    origin = None
+    if property_id:
+        record = property_store.get_property(property_id)
+        if record and record.get("latitude") is not None and record.get("longitude") is not None:
+            origin = {"name": record.get("address") or property_address,
+                      "latitude": record["latitude"], "longitude": record["longitude"]}
+    origin = origin or commute_engine.geocode(property_address)
+    if not origin:
+        raise HTTPException(status_code=404, detail=f"Could not locate property: {property_address}")
+    
+    target = commute_engine.geocode(destination)
+    if not target:
+        raise HTTPException(status_code=404, detail=f"Could not locate destination: {destination}")
+    
     try:
-        logger.info(f"Calculating commute: {property_address} -> {destination}")
-        
-        destinations_map = {
-            "downtown": {"name": "Downtown Boston", "distance_miles": 3.5},
-            "northeastern": {"name": "Northeastern University", "distance_miles": 2.8},
-            "financial district": {"name": "Financial District", "distance_miles": 3.2},
-            "back bay": {"name": "Back Bay", "distance_miles": 2.5},
-            "seaport": {"name": "Seaport District", "distance_miles": 4.0},
-            "cambridge": {"name": "Cambridge/MIT", "distance_miles": 4.5},
-            "harvard": {"name": "Harvard Square", "distance_miles": 5.0},
-            "airport": {"name": "Logan Airport", "distance_miles": 5.5},
-            "mit": {"name": "MIT", "distance_miles": 4.5},
-            "logan": {"name": "Logan Airport", "distance_miles": 5.5}
-        }
-        
-        dest_key = destination.lower()
-        dest_info = None
-        
-        for key, info in destinations_map.items():
-            if key in dest_key:
-                dest_info = info
-                break
-        
-        if not dest_info:
-            dest_info = {"name": destination, "distance_miles": 4.0}
-        
-        distance = dest_info["distance_miles"]
-        
-        car_time = round(distance / 20 * 60)
-        transit_time = round(distance / 12 * 60 + 10)
-        walking_time = round(distance / 3 * 60)
-        biking_time = round(distance / 10 * 60)
-        
-        return {
-            "from": property_address,
-            "to": dest_info["name"],
-            "distance_miles": distance,
-            "commute_options": {
-                "driving": {
-                    "time_minutes": car_time,
-                    "time_display": f"{car_time} min",
-                    "cost_estimate": "$5-8 parking"
-                },
-                "transit": {
-                    "time_minutes": transit_time,
-                    "time_display": f"{transit_time} min",
-                    "cost_estimate": "$2.40 T fare",
-                    "route": "Red Line + Bus (estimated)"
-                },
-                "walking": {
-                    "time_minutes": walking_time,
-                    "time_display": f"{walking_time} min" if walking_time < 60 else f"{walking_time // 60}h {walking_time % 60}min",
-                    "cost_estimate": "Free"
-                },
-                "biking": {
-                    "time_minutes": biking_time,
-                    "time_display": f"{biking_time} min",
-                    "cost_estimate": "Free (BlueBikes: $2.95)"
-                }
-            },
-            "fastest_option": "driving" if car_time < transit_time else "transit",
-            "recommended": "transit" if distance < 5 else "driving"
-        }
+        return {"from_address": property_address, **commute_engine.commute(origin, target)}
     
     except Exception as e:
         logger.error(f"Commute calculation error: {e}")
@@ -0,0 +1,160 @@
+"""
+Address autocomplete over the property store
+
+Built at startup from normalized addresses, street names and neighborhood
+names. Prefix matches come from sorted arrays (one bisect per kind); when
+they run short, a character-trigram index over street and neighborhood
+names supplies typo-tolerant matches ('newbery st' -> 'NEWBURY ST').
+"""
+
+import os
+import sys
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.geocoder import normalize_address_text, normalize_street_address, split_house_number, street_name
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 25
+MIN_SIMILARITY = 0.35
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _SortedKeys:
+    """Sorted normalized keys; suggestion payloads are built only for returned rows"""
+
+    def __init__(self, keys: pd.Series, payload: Callable[[int], Dict], weights: np.ndarray = None):
+        values = keys.to_numpy(dtype=str)
+        self.order = np.argsort(values, kind='stable')
+        self.keys = values[self.order].tolist()
+        self.payload = payload
+        self.weights = weights[self.order] if weights is not None else None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def payloads(self) -> List[Dict]:
+        return [self.payload(i) for i in self.order]
+
+    def prefix(self, text: str, limit: int) -> List[Dict]:
+        """Matches starting with text, heaviest first when weighted"""
+        lo = bisect_left(self.keys, text)
+        hi = bisect_left(self.keys, text + '\uffff', lo)
+        if self.weights is None or hi - lo <= limit:
+            span = range(lo, min(hi, lo + limit))
+        else:
+            weights = self.weights[lo:hi]
+            top = np.argpartition(-weights, limit - 1)[:limit]
+            span = lo + top[np.argsort(-weights[top], kind='stable')]
+        return [self.payload(self.order[i]) for i in span]
+
+
+class AutocompleteIndex:
+    """Prefix + trigram suggestions for addresses, streets and neighborhoods"""
+
+    def __init__(self, frame: pd.DataFrame = None, neighborhoods: List[str] = ()):
+        if frame is None or 'address' not in frame:
+            # No store (or one without addresses): only the neighborhood names are suggested
+            frame = pd.DataFrame(columns=['property_id', 'address'])
+        frame = frame.dropna(subset=['address']).reset_index(drop=True)
+
+        normalized = normalize_street_address(frame['address'].astype(str)) if len(frame) else pd.Series(dtype=str)
+        located = normalized.notna() & (normalized != '')
+        frame, normalized = frame[located.to_numpy()], normalized[located]
+        texts = frame['address'].astype(str).to_numpy()
+        ids = frame['property_id'].astype(str).to_numpy()
+        hoods = frame['neighborhood'].to_numpy() if 'neighborhood' in frame else np.full(len(frame), None)
+        self.addresses = _SortedKeys(normalized, lambda i: {
+            "text": texts[i], "type": "address", "property_id": ids[i],
+            "neighborhood": hoods[i] if isinstance(hoods[i], str) else None
+        })
+
+        streets = street_name(normalized).replace('', np.nan).dropna().value_counts()
+        self.streets = _SortedKeys(pd.Series(streets.index), [
+            {"text": street.title(), "type": "street", "properties": int(count)} for street, count in streets.items()
+        ].__getitem__, streets.to_numpy())
+
+        names = pd.Series(dtype=str)
+        if 'neighborhood' in frame:
+            names = frame['neighborhood'].dropna().astype(str).str.strip()
+        hood_counts = names[names != ''].value_counts()
+        extra = [h for h in neighborhoods if h not in hood_counts.index]
+        hood_counts = pd.concat([hood_counts, pd.Series(0, index=extra, dtype=hood_counts.dtype)])
+        self.neighborhoods = _SortedKeys(normalize_street_address(pd.Series(hood_counts.index, dtype=str)), [
+            {"text": hood, "type": "neighborhood", "properties": int(count)} for hood, count in hood_counts.items()
+        ].__getitem__, hood_counts.to_numpy())
+
+        # Trigram postings over street and neighborhood names for typo tolerance
+        self._names = self.neighborhoods.keys + self.streets.keys
+        self._name_payloads = self.neighborhoods.payloads() + self.streets.payloads()
+        self._name_grams = np.array([len(trigrams(name)) for name in self._names], dtype=np.int32)
+        postings = defaultdict(list)
+        for i, name in enumerate(self._names):
+            for gram in trigrams(name):
+                postings[gram].append(i)
+        self._postings = {gram: np.array(members, dtype=np.int32) for gram, members in postings.items()}
+
+        logger.info(f"✅ Autocomplete ready: {len(self.addresses)} addresses, {len(self.streets)} streets, "
+                    f"{len(self.neighborhoods)} neighborhoods")
+
+    @classmethod
+    def from_store(cls, store, neighborhoods: List[str] = ()) -> 'AutocompleteIndex':
+        return cls(store._load().reset_index(drop=True), neighborhoods)
+
+    @property
+    def available(self) -> bool:
+        return len(self.addresses) + len(self.neighborhoods) > 0
+
+    def fuzzy(self, text: str, limit: int) -> List[Dict]:
+        """Street/neighborhood names sharing the most trigrams with text"""
+        grams = [self._postings[g] for g in trigrams(text) if g in self._postings]
+        if not grams:
+            return []
+        shared = np.bincount(np.concatenate(grams), minlength=len(self._names))
+        similarity = shared / (len(trigrams(text)) + self._name_grams - shared)
+        candidates = np.flatnonzero(similarity >= MIN_SIMILARITY)
+        best = candidates[np.argsort(-similarity[candidates], kind='stable')[:limit]]
+        return [self._name_payloads[i] for i in best]
+
+    def suggest(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict]:
+        """Top suggestions for what the user has typed so far"""
+        limit = int(min(max(limit, 1), MAX_LIMIT))
+        text = normalize_address_text(query)
+        if not text:
+            return []
+        number, street = split_house_number(text)
+
+        results = []
+        if not number:
+            results += self.neighborhoods.prefix(text, limit)
+            results += self.streets.prefix(text, limit)
+        results += self.addresses.prefix(text, limit)
+
+        if len(results) < limit and len(street) >= 3:
+            for match in self.fuzzy(street, limit):
+                if not number:
+                    results.append(match)
+                elif match["type"] == "street":
+                    results += self.addresses.prefix(f"{number} {match['text'].upper()}", limit)
+
+        seen, unique = set(), []
+        for result in results:
+            key = (result["type"], result["text"], result.get("property_id"))
+            if key not in seen:
+                seen.add(key)
+                unique.append(result)
+        return unique[:limit]
@@ -0,0 +1,234 @@
+"""
+Blue/green ChromaDB collections behind logical aliases
+
+A rebuild never touches the live collection: it writes into a new versioned
+collection (`boston_properties__v20261016030000`), validates it (row count,
+no collapse versus the live version, sampled self-retrieval queries) and only
+then moves the alias. The alias table is a small Chroma collection holding one
+record per alias, so a switch is a single-record upsert that readers see all at
+once. Superseded versions are kept for a grace period (readers that resolved
+the alias just before a switch keep working, and `--rollback` stays possible),
+then garbage-collected.
+
+Readers call `resolve(name)`; names without an alias (legacy collections)
+resolve to themselves.
+
+    CHROMA_ALIAS_COLLECTION  alias table (default propbot_aliases)
+    ALIAS_GRACE_HOURS        keep superseded versions this long (default 24)
+    ALIAS_MAX_SHRINK         refuse a version this much smaller than live (default 0.5)
+"""
+
+import os
+import re
+import json
+import argparse
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALIAS_COLLECTION = os.getenv('CHROMA_ALIAS_COLLECTION', 'propbot_aliases')
+GRACE_HOURS = float(os.getenv('ALIAS_GRACE_HOURS', 24))
+MAX_SHRINK = float(os.getenv('ALIAS_MAX_SHRINK', 0.5))
+
+VERSION_SEPARATOR = '__v'
+VERSION_FORMAT = '%Y%m%d%H%M%S'
+_VERSION_PATTERN = re.compile(r'^(.+)__v(\d{14})$')
+
+SAMPLE_QUERIES = 5
+# Distance of a stored embedding to itself (L2 and cosine), allowing for float error
+_SELF_DISTANCE = 1e-3
+
+
+class ValidationError(RuntimeError):
+    """A built version failed its checks and was not promoted"""
+
+
+def version_name(alias: str, now: datetime = None) -> str:
+    return f"{alias}{VERSION_SEPARATOR}{(now or datetime.now()).strftime(VERSION_FORMAT)}"
+
+
+def split_version(name: str) -> Tuple[str, Optional[datetime]]:
+    """(alias, build time) of a versioned collection name, (name, None) otherwise"""
+    match = _VERSION_PATTERN.match(name)
+    if not match:
+        return name, None
+    return match.group(1), datetime.strptime(match.group(2), VERSION_FORMAT)
+
+
+def validate(collection, expected: int, live_count: int = None, max_shrink: float = MAX_SHRINK,
+             samples: int = SAMPLE_QUERIES) -> Dict:
+    """Check a built version before it goes live; raises ValidationError"""
+    problems = []
+    count = collection.count()
+    if count == 0:
+        problems.append("collection is empty")
+    if count != expected:
+        problems.append(f"{count} records, expected {expected}")
+    if live_count and count < live_count * (1 - max_shrink):
+        problems.append(f"{count} records is less than {1 - max_shrink:.0%} of the live {live_count}")
+
+    # Each sampled record's own embedding must find a record at distance ~0
+    sample = collection.get(limit=samples, include=['embeddings']) if count else {'ids': []}
+    if len(sample['ids']):
+        results = collection.query(query_embeddings=sample['embeddings'], n_results=1, include=['distances'])
+        misses = [record_id for record_id, distances in zip(sample['ids'], results['distances'])
+                  if not distances or distances[0] > _SELF_DISTANCE]
+        if misses:
+            problems.append(f"sample queries found nothing for {misses}")
+
+    if problems:
+        raise ValidationError(f"'{collection.name}': " + "; ".join(problems))
+    return {'count': count, 'sample_queries': len(sample['ids'])}
+
+
+class CollectionAliases:
+    """Alias table of one Chroma client: alias -> live versioned collection"""
+
+    def __init__(self, client, registry: str = ALIAS_COLLECTION):
+        self.client = client
+        self.registry = registry
+        self.table = client.get_or_create_collection(registry, embedding_function=None)
+
+    def records(self) -> Dict[str, Dict]:
+        """alias -> {target, previous, switched_at, retired}"""
+        result = self.table.get(include=['metadatas'])
+        return {alias: dict(meta or {}) for alias, meta in zip(result['ids'], result['metadatas'])}
+
+    def aliases(self) -> Dict[str, str]:
+        return {alias: meta['target'] for alias, meta in self.records().items()}
+
+    def resolve(self, name: str, aliases: Dict[str, str] = None) -> str:
+        """Physical collection behind a logical name"""
+        return (self.aliases() if aliases is None else aliases).get(name, name)
+
+    def collection_names(self) -> List[str]:
+        return [c.name for c in self.client.list_collections()]
+
+    def logical_names(self) -> List[str]:
+        """Names readers should see: aliases plus unversioned collections, never versions or the alias table"""
+        names = list(self.aliases())
+        for name in self.collection_names():
+            if name != self.registry and split_version(name)[1] is None and name not in names:
+                names.append(name)
+        return names
+
+    def versions(self, alias: str) -> List[str]:
+        """Versioned collections of an alias, oldest first"""
+        return sorted(name for name in self.collection_names() if split_version(name)[0] == alias
+                      and split_version(name)[1] is not None)
+
+    def create_version(self, alias: str, now: datetime = None, metadata: Dict = None):
+        now, names = now or datetime.now(), set(self.collection_names())
+        # Versions sort by build time, so a second build within the same second takes the next one
+        while version_name(alias, now) in names:
+            now += timedelta(seconds=1)
+        name = version_name(alias, now)
+        logger.info(f"🏗️  Building {name}")
+        return self.client.create_collection(name, metadata=metadata)
+
+    def open_build(self, alias: str, rebuild: bool = False, resume: str = None,
+                   metadata: Dict = None) -> Tuple[object, bool]:
+        """(collection to ingest into, whether it is an unpromoted build)
+
+        Rebuilds and first builds get a new version, resuming continues the
+        collection the interrupted run wrote to; otherwise the live collection
+        is updated in place.
+        """
+        live = self.resolve(alias)
+        names = self.collection_names()
+        if resume in names:
+            if resume != live:
+                logger.info(f"↩️  Continuing build {resume}")
+            return self.client.get_collection(resume), resume != live
+        if not rebuild and live in names:
+            return self.client.get_collection(live), False
+        return self.create_version(alias, metadata=metadata), True
+
+    def switch(self, alias: str, target: str, now: datetime = None) -> Optional[str]:
+        """Point the alias at target in one upsert; returns the version it replaced"""
+        now = now or datetime.now()
+        record = self.records().get(alias, {})
+        previous = record.get('target')
+        if previous is None and alias in self.collection_names():
+            # First switch over a legacy unversioned collection: retire it like a version
+            previous = alias
+        retired = json.loads(record.get('retired', '{}'))
+        retired.pop(target, None)
+        if previous and previous != target:
+            retired[previous] = now.isoformat(timespec='seconds')
+        meta = {'target': target, 'switched_at': now.isoformat(timespec='seconds'), 'retired': json.dumps(retired)}
+        if previous:
+            meta['previous'] = previous
+        self.table.upsert(ids=[alias], metadatas=[meta], documents=[alias], embeddings=[[0.0]])
+        logger.info(f"🔀 {alias} -> {target}" + (f" (was {previous})" if previous else ""))
+        return previous
+
+    def promote(self, alias: str, collection, expected: int, grace_hours: float = GRACE_HOURS,
+                max_shrink: float = MAX_SHRINK) -> Dict:
+        """Validate a built version, switch the alias to it and collect expired versions"""
+        live = self.resolve(alias)
+        live_count = self.client.get_collection(live).count() if live in self.collection_names() else None
+        checks = validate(collection, expected, live_count, max_shrink)
+        previous = self.switch(alias, collection.name)
+        deleted = self.garbage_collect(alias, grace_hours)
+        return {**checks, 'alias': alias, 'target': collection.name, 'previous': previous, 'deleted': deleted}
+
+    def rollback(self, alias: str) -> str:
+        """Point the alias back at the version it replaced (while it is still within the grace period)"""
+        previous = self.records().get(alias, {}).get('previous')
+        if not previous or previous not in self.collection_names():
+            raise ValueError(f"No previous version of '{alias}' to roll back to")
+        self.switch(alias, previous)
+        return previous
+
+    def garbage_collect(self, alias: str = None, grace_hours: float = GRACE_HOURS, now: datetime = None) -> List[str]:
+        """Delete versions that are not live and were retired (or abandoned mid-build) over grace_hours ago"""
+        now = now or datetime.now()
+        cutoff = now - timedelta(hours=grace_hours)
+        records = self.records()
+        names = self.collection_names()
+        deleted = []
+        for name in sorted(records) if alias is None else [alias]:
+            record = records.get(name, {})
+            target = record.get('target')
+            retired = json.loads(record.get('retired', '{}'))
+            for version in sorted(set(self.versions(name)) | set(retired)):
+                if version == target or version not in names:
+                    retired.pop(version, None)
+                    continue
+                # Never-promoted builds age from their build time
+                since = retired.get(version)
+                since = datetime.fromisoformat(since) if since else split_version(version)[1]
+                if since is not None and since < cutoff:
+                    self.client.delete_collection(version)
+                    retired.pop(version, None)
+                    deleted.append(version)
+                    logger.info(f"🗑️  Deleted expired version {version}")
+            if record and json.dumps(retired) != record.get('retired'):
+                self.table.upsert(ids=[name], metadatas=[{**record, 'retired': json.dumps(retired)}],
+                                  documents=[name], embeddings=[[0.0]])
+        return deleted
+
+
+if __name__ == "__main__":
+    import chromadb
+
+    parser = argparse.ArgumentParser(description="Inspect and manage ChromaDB collection aliases")
+    parser.add_argument('--host', default=os.getenv('CHROMA_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('CHROMA_PORT', 8000)))
+    parser.add_argument('--gc', action='store_true', help="Delete versions past the grace period")
+    parser.add_argument('--grace-hours', type=float, default=GRACE_HOURS)
+    parser.add_argument('--rollback', metavar='ALIAS', help="Point ALIAS back at its previous version")
+    args = parser.parse_args()
+
+    aliases = CollectionAliases(chromadb.HttpClient(host=args.host, port=args.port))
+    if args.rollback:
+        print(f"⏪ {args.rollback} -> {aliases.rollback(args.rollback)}")
+    if args.gc:
+        print(f"🗑️  Deleted: {aliases.garbage_collect(grace_hours=args.grace_hours) or 'nothing'}")
+    for alias, record in aliases.records().items():
+        print(f"🔗 {alias} -> {record['target']} (switched {record['switched_at']}, "
+              f"previous {record.get('previous', '-')}, versions {aliases.versions(alias)})")
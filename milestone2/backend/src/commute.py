@@ -0,0 +1,154 @@
+"""
+Commute estimates from MBTA station coordinates
+
+Origins and destinations are resolved to coordinates, then transit time is
+walk-to-nearest-station + ride between stations + walk from the station
+nearest the destination, all from haversine distances scaled by a detour
+factor. Driving, walking and biking use the same distances.
+"""
+
+import os
+import re
+import sys
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.geo_index import PointLayer, haversine_miles
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Popular destinations (key -> display name, lat, long)
+LANDMARKS = {
+    "downtown": ("Downtown Boston", 42.3555, -71.0605),
+    "financial district": ("Financial District", 42.3559, -71.0550),
+    "back bay": ("Back Bay", 42.3503, -71.0810),
+    "seaport": ("Seaport District", 42.3519, -71.0440),
+    "northeastern": ("Northeastern University", 42.3398, -71.0892),
+    "harvard": ("Harvard Square", 42.3736, -71.1190),
+    "cambridge": ("Cambridge/MIT", 42.3601, -71.0942),
+    "mit": ("MIT", 42.3601, -71.0942),
+    "airport": ("Logan Airport", 42.3656, -71.0096),
+    "logan": ("Logan Airport", 42.3656, -71.0096),
+    "fenway": ("Fenway Park", 42.3467, -71.0972),
+    "longwood": ("Longwood Medical Area", 42.3378, -71.1062),
+    "south station": ("South Station", 42.3523, -71.0553),
+    "north station": ("North Station", 42.3656, -71.0611),
+    "boston university": ("Boston University", 42.3505, -71.1054)
+}
+
+# Whole-word landmark names, longest first ("boston university" before "boston")
+_LANDMARK_PATTERN = re.compile(r'\b(' + '|'.join(map(re.escape, sorted(LANDMARKS, key=len, reverse=True))) + r')\b')
+# "45 Harvard Ave" is a street address, not a trip to Harvard Square
+_HOUSE_NUMBER_PATTERN = re.compile(r'^\s*\d')
+
+DETOUR_FACTOR = 1.3
+WALK_MPH = 3.0
+BIKE_MPH = 10.0
+DRIVE_MPH = 20.0
+TRANSIT_MPH = 15.0
+TRANSIT_WAIT_MINUTES = 6
+# Beyond this, walking to a station is not a realistic transit trip
+MAX_STATION_WALK_MILES = 1.5
+
+
+def _minutes(miles: float, mph: float) -> int:
+    return int(round(miles * DETOUR_FACTOR / mph * 60))
+
+
+def _display(minutes: int) -> str:
+    return f"{minutes} min" if minutes < 60 else f"{minutes // 60}h {minutes % 60}min"
+
+
+class CommuteEngine:
+    """Nearest-station lookups and commute estimates"""
+
+    def __init__(self, stations: PointLayer = None, data_path: str = None,
+                 locate_address: Callable[[str], Optional[Tuple[float, float]]] = None):
+        self.stations = stations or PointLayer.from_processed('transit', data_path)
+        self.locate_address = locate_address
+        self._station_names = {}
+        if 'station_name' in self.stations.df.columns:
+            for i, name in enumerate(self.stations.df['station_name'].astype(str)):
+                self._station_names.setdefault(name.lower(), i)
+        logger.info(f"✅ Commute engine ready ({len(self.stations)} stations)")
+
+    @property
+    def available(self) -> bool:
+        return len(self.stations) > 0
+
+    def nearest_station(self, lat: float, lon: float) -> Optional[Dict]:
+        nearest = self.stations.nearest(lat, lon, 1)
+        if not len(nearest):
+            return None
+        row = nearest.iloc[0]
+        return {
+            "name": row.get('station_name', 'MBTA stop'),
+            "latitude": float(row['latitude']),
+            "longitude": float(row['longitude']),
+            "distance_miles": round(float(row['distance_miles']), 3)
+        }
+
+    def geocode(self, text: str) -> Optional[Dict]:
+        """Resolve a known address, station name or landmark to coordinates, in that order"""
+        key = ' '.join(text.strip().lower().split())
+        if self.locate_address:
+            coords = self.locate_address(text)
+            if coords:
+                return {"name": text, "latitude": coords[0], "longitude": coords[1]}
+
+        station = self._station_names.get(key)
+        if station is not None:
+            row = self.stations.df.iloc[station]
+            return {"name": row['station_name'], "latitude": float(row['latitude']), "longitude": float(row['longitude'])}
+
+        # Landmarks match by whole word ("mit" is not in "Goldsmith St"), and never inside street addresses
+        name = key if key in LANDMARKS else None
+        if name is None and not _HOUSE_NUMBER_PATTERN.match(key):
+            match = _LANDMARK_PATTERN.search(key)
+            name = match.group(1) if match else None
+        if name:
+            display, lat, lon = LANDMARKS[name]
+            return {"name": display, "latitude": lat, "longitude": lon}
+        return None
+
+    def commute(self, origin: Dict, destination: Dict) -> Dict:
+        """Commute options between two geocoded points"""
+        distance = float(haversine_miles(origin['latitude'], origin['longitude'],
+                                         destination['latitude'], destination['longitude']))
+        options = {
+            "driving": {"time_minutes": _minutes(distance, DRIVE_MPH), "cost_estimate": "$5-8 parking"},
+            "walking": {"time_minutes": _minutes(distance, WALK_MPH), "cost_estimate": "Free"},
+            "biking": {"time_minutes": _minutes(distance, BIKE_MPH), "cost_estimate": "Free (BlueBikes: $2.95)"}
+        }
+
+        board = self.nearest_station(origin['latitude'], origin['longitude'])
+        alight = self.nearest_station(destination['latitude'], destination['longitude'])
+        if board and alight and max(board['distance_miles'], alight['distance_miles']) <= MAX_STATION_WALK_MILES:
+            ride = float(haversine_miles(board['latitude'], board['longitude'], alight['latitude'], alight['longitude']))
+            walk_in = _minutes(board['distance_miles'], WALK_MPH)
+            walk_out = _minutes(alight['distance_miles'], WALK_MPH)
+            options["transit"] = {
+                "time_minutes": walk_in + TRANSIT_WAIT_MINUTES + _minutes(ride, TRANSIT_MPH) + walk_out,
+                "cost_estimate": "$2.40 T fare",
+                "route": f"Walk {walk_in} min to {board['name']}, ride to {alight['name']}, walk {walk_out} min",
+                "board_station": board,
+                "alight_station": alight
+            }
+
+        for option in options.values():
+            option["time_display"] = _display(option["time_minutes"])
+
+        fastest = min(options, key=lambda k: options[k]["time_minutes"])
+        return {
+            "from": origin['name'],
+            "to": destination['name'],
+            "distance_miles": round(distance, 2),
+            "commute_options": options,
+            "fastest_option": fastest,
+            "recommended": "transit" if "transit" in options and distance < 5 else fastest
+        }
@@ -0,0 +1,211 @@
+"""
+Pre-aggregated crime statistics cube for /crime/trends
+
+One vectorized groupby over the merged 2020-2025 incident file produces
+incident and shooting counts by district x year x month x offense group x
+hour, stored as parquet. The API slices it in memory and computes
+year-over-year deltas; PropBotRAG quotes the exact numbers in its prompt.
+"""
+
+import os
+import sys
+import calendar
+import argparse
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processed_data import DATA_PATH, RESULTS_PATH
+from src.crime_grid import CATEGORIES, load_crime
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CUBE_PATH = os.getenv('CRIME_CUBE_PATH', os.path.join(RESULTS_PATH, 'crime_cube.parquet'))
+# Computed /crime/trends slices kept in memory (least recently used are dropped)
+SLICE_CACHE_SIZE = int(os.getenv('CRIME_CUBE_CACHE_SIZE', 512))
+
+DIMENSIONS = ['district', 'year', 'month', 'offense_group', 'hour']
+
+# BPD district for each neighborhood
+NEIGHBORHOOD_DISTRICTS = {
+    'Downtown': 'A1', 'Beacon Hill': 'A1', 'North End': 'A1', 'West End': 'A1', 'Chinatown': 'A1',
+    'Leather District': 'A1', 'Bay Village': 'D4',
+    'Charlestown': 'A15', 'East Boston': 'A7',
+    'Roxbury': 'B2', 'Mission Hill': 'B2', 'Mattapan': 'B3',
+    'South Boston': 'C6', 'Seaport': 'C6', 'Dorchester': 'C11',
+    'Back Bay': 'D4', 'South End': 'D4', 'Fenway': 'D4', 'Longwood': 'D4',
+    'Allston': 'D14', 'Brighton': 'D14',
+    'West Roxbury': 'E5', 'Roslindale': 'E5', 'Jamaica Plain': 'E13', 'Hyde Park': 'E18'
+}
+
+
+def build_crime_cube(data_path: str = None, output_path: str = None) -> Dict:
+    """Aggregate every incident into the cube in one groupby pass"""
+    output_path = output_path or CUBE_PATH
+    df = load_crime(data_path, extra_columns=('DISTRICT', 'HOUR'))
+
+    df['district'] = df['district'].fillna('').astype(str).str.strip().str.upper().replace('', 'UNKNOWN')
+    df['offense_group'] = np.asarray(CATEGORIES)[df['category'].to_numpy()]
+    df['month'] = pd.to_numeric(df['month'], errors='coerce').fillna(0).astype(np.int8)
+    df['hour'] = pd.to_numeric(df['hour'], errors='coerce').fillna(-1).astype(np.int8)
+    df['year'] = df['year'].astype(np.int16)
+
+    cube = df.groupby(DIMENSIONS, observed=True).agg(
+        incidents=('category', 'size'),
+        shootings=('shooting', 'sum')
+    ).reset_index()
+    cube['incidents'] = cube['incidents'].astype(np.int32)
+    cube['shootings'] = cube['shootings'].astype(np.int32)
+    for column in ['district', 'offense_group']:
+        cube[column] = cube[column].astype('category')
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    cube.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+
+    summary = {'incidents': int(cube['incidents'].sum()), 'cells': len(cube),
+               'years': [int(cube['year'].min()), int(cube['year'].max())]}
+    logger.info(f"✅ Crime cube saved: {output_path} ({summary})")
+    return summary
+
+
+def district_for(name: str) -> Optional[str]:
+    """District code for a district code or neighborhood name"""
+    if not name:
+        return None
+    for hood, district in NEIGHBORHOOD_DISTRICTS.items():
+        if hood.lower() == name.strip().lower():
+            return district
+    return name.strip().upper()
+
+
+class CrimeCube:
+    """In-memory slices of the crime cube with year-over-year deltas"""
+
+    def __init__(self, cube_path: str = None, cache_size: int = SLICE_CACHE_SIZE):
+        self.cube_path = cube_path or CUBE_PATH
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._slices = OrderedDict()
+        try:
+            self.cube = pd.read_parquet(self.cube_path)
+            logger.info(f"✅ Crime cube loaded: {len(self.cube)} cells")
+        except (OSError, ValueError, ImportError) as e:
+            logger.warning(f"⚠️  Crime cube unavailable ({e})")
+            self.cube = pd.DataFrame(columns=DIMENSIONS + ['incidents', 'shootings'])
+
+    @property
+    def available(self) -> bool:
+        return len(self.cube) > 0
+
+    @property
+    def districts(self) -> List[str]:
+        return sorted(self.cube['district'].astype(str).unique())
+
+    def trends(self, by: str = 'year', district: str = None, offense_group: str = None,
+               year: int = None, month: int = None, hour: int = None) -> List[Dict]:
+        """Incidents grouped by one dimension (year-over-year deltas when grouped by year or month)"""
+        if by not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{by}'. Use one of: {', '.join(DIMENSIONS)}")
+        district = district_for(district)
+        key = (by, district, offense_group, year, month, hour)
+        with self._lock:
+            cached = self._slices.get(key)
+            if cached is not None:
+                self._slices.move_to_end(key)
+                return cached
+
+        cube = self.cube
+        mask = np.ones(len(cube), dtype=bool)
+        for column, value in [('district', district), ('offense_group', offense_group),
+                              ('month', month), ('hour', hour)]:
+            if value is not None:
+                mask &= (cube[column].astype(str) == str(value)).to_numpy()
+        # Year-over-year deltas need the previous year too
+        with_deltas = by in ('year', 'month')
+        if year is not None:
+            years = [year - 1, year] if with_deltas else [year]
+            mask &= cube['year'].isin(years).to_numpy()
+        selected = cube[mask]
+
+        group = ['year', 'month'] if by == 'month' else [by]
+        totals = selected.groupby(group, observed=True)[['incidents', 'shootings']].sum().sort_index()
+
+        if with_deltas:
+            previous = totals['incidents'].copy()
+            shifted = [previous.index.get_level_values('year') + 1]
+            if by == 'month':
+                shifted.append(previous.index.get_level_values('month'))
+            previous.index = pd.MultiIndex.from_arrays(shifted, names=group) if by == 'month' else shifted[0]
+            previous = previous.reindex(totals.index)
+            totals['yoy_change'] = (totals['incidents'] - previous) / previous
+            if year is not None:
+                totals = totals[totals.index.get_level_values('year') == year]
+
+        rows = totals.reset_index()
+        if 'yoy_change' in rows:
+            rows['yoy_change'] = rows['yoy_change'].round(4)
+        records = rows.astype(object).where(rows.notna(), None).to_dict('records')
+        with self._lock:
+            self._slices[key] = records
+            while len(self._slices) > self.cache_size:
+                self._slices.popitem(last=False)
+        return records
+
+    def year_to_date(self, district: str = None, year: int = None) -> Optional[Dict]:
+        """Incidents of a year through its last reported month vs the same months of the year before"""
+        months = self.trends('month', district=district, year=year)
+        last_month = max((int(r['month']) for r in months if r['month']), default=0)
+        if not last_month:
+            return None
+        previous = self.trends('month', district=district, year=year - 1)
+        current = sum(int(r['incidents']) for r in months if 0 < r['month'] <= last_month)
+        before = sum(int(r['incidents']) for r in previous if 0 < r['month'] <= last_month)
+        return {
+            'year': year,
+            'through_month': last_month,
+            'incidents': current,
+            'previous_incidents': before,
+            'yoy_change': round((current - before) / before, 4) if before else None
+        }
+
+    def describe(self, district: str = None, label: str = None) -> str:
+        """Exact yearly totals and latest delta for LLM context"""
+        if not self.available:
+            return ""
+        yearly = self.trends('year', district=district)
+        if not yearly:
+            return ""
+        groups = self.trends('offense_group', district=district, year=int(yearly[-1]['year']))
+        where = label or (f"district {district_for(district)}" if district else "Boston")
+        parts = [f"{int(r['year'])}: {int(r['incidents']):,}" for r in yearly]
+        text = f"Reported incidents in {where} by year - " + ", ".join(parts)
+        # A year still in progress is compared with the same months of the year before, not a full year
+        ytd = self.year_to_date(district, int(yearly[-1]['year']))
+        if ytd and ytd['through_month'] < 12:
+            if ytd['yoy_change'] is not None:
+                text += (f" ({ytd['yoy_change']:+.1%} in {ytd['year']} through "
+                         f"{calendar.month_abbr[ytd['through_month']]} vs the same months of {ytd['year'] - 1})")
+        elif yearly[-1].get('yoy_change') is not None:
+            text += f" ({yearly[-1]['yoy_change']:+.1%} in {int(yearly[-1]['year'])})"
+        if groups:
+            text += "; " + ", ".join(f"{g['offense_group']} {int(g['incidents']):,}" for g in groups)
+        return text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the crime statistics cube")
+    parser.add_argument('--data-path', default=DATA_PATH)
+    parser.add_argument('--output', default=CUBE_PATH)
+    args = parser.parse_args()
+
+    summary = build_crime_cube(args.data_path, args.output)
+    print(f"\n📈 Crime cube: {summary}")
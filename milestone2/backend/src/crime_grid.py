@@ -0,0 +1,253 @@
+"""
+Precomputed crime-density grid for instant safety scores
+
+An offline job bins every cleaned crime incident into a fixed ~250 m lat/long
+grid over Boston, counting incidents per cell by year and offense category,
+and precomputes a 0-100 safety score per cell from the smoothed, severity-
+weighted density of the latest full year. Serving is an O(1) array lookup.
+"""
+
+import os
+import re
+import sys
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processed_data import DATA_PATH, RESULTS_PATH, latest_file, pick_column, read_columns
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CRIME_GRID_PATH = os.getenv('CRIME_GRID_PATH', os.path.join(RESULTS_PATH, 'crime_grid.npz'))
+
+# Fixed grid over the city (south, west, north, east) in ~250 m cells
+BOUNDS = (42.22, -71.20, 42.41, -70.98)
+CELL_DEGREES = 0.0025
+
+CATEGORIES = ['violent', 'property', 'other']
+VIOLENT_TERMS = ('ASSAULT', 'ROBBERY', 'HOMICIDE', 'MURDER', 'MANSLAUGHTER', 'SHOOTING', 'RAPE',
+                 'KIDNAPPING', 'AFFRAY', 'THREATS', 'WEAPON', 'FIREARM')
+PROPERTY_TERMS = ('LARCENY', 'BURGLARY', 'B&E', 'BREAKING', 'THEFT', 'STOLEN', 'VANDALISM',
+                  'SHOPLIFTING', 'FRAUD', 'ARSON')
+# Severity weights for the safety score (shootings also count as violent)
+WEIGHTS = {'violent': 3.0, 'property': 1.0, 'other': 0.25, 'shooting': 5.0}
+
+SAFETY_LABELS = [(80, 'Very safe'), (60, 'Safe'), (40, 'Average'), (20, 'Below average'), (0, 'High crime')]
+
+
+def offense_category(descriptions: pd.Series) -> np.ndarray:
+    """Map offense descriptions to CATEGORIES indices (vectorized)"""
+    text = descriptions.fillna('').astype(str).str.upper()
+    category = np.full(len(text), CATEGORIES.index('other'), dtype=np.int8)
+    for name, terms in [('property', PROPERTY_TERMS), ('violent', VIOLENT_TERMS)]:
+        matches = text.str.contains('|'.join(map(re.escape, terms)), regex=True).to_numpy()
+        category[matches] = CATEGORIES.index(name)
+    return category
+
+
+def shooting_flags(values: pd.Series) -> np.ndarray:
+    """SHOOTING is 0/1 in older files and Y/blank in newer ones"""
+    return values.fillna('').astype(str).str.strip().str.upper().isin(['1', '1.0', 'Y', 'TRUE']).to_numpy()
+
+
+def load_crime(data_path: str = None, extra_columns=()) -> pd.DataFrame:
+    """Read the cleaned crime file with canonical column names"""
+    path = latest_file('crime', data_path or DATA_PATH)
+    if not path:
+        raise FileNotFoundError(f"No processed crime file in {data_path or DATA_PATH}")
+    logger.info(f"📂 Loading crime incidents from {os.path.basename(path)}")
+
+    raw = read_columns(path, 'Lat', 'Long', 'YEAR', 'MONTH', 'OCCURRED_ON_DATE', 'OFFENSE_DESCRIPTION',
+                       'SHOOTING', *extra_columns)
+    df = pd.DataFrame({
+        'lat': pd.to_numeric(raw[pick_column(raw, 'Lat')], errors='coerce'),
+        'lon': pd.to_numeric(raw[pick_column(raw, 'Long')], errors='coerce')
+    })
+    year_col, month_col = pick_column(raw, 'YEAR'), pick_column(raw, 'MONTH')
+    if year_col:
+        df['year'] = pd.to_numeric(raw[year_col], errors='coerce')
+        df['month'] = pd.to_numeric(raw[month_col], errors='coerce') if month_col else np.nan
+    else:
+        occurred = pd.to_datetime(raw[pick_column(raw, 'OCCURRED_ON_DATE')], errors='coerce')
+        df['year'], df['month'] = occurred.dt.year, occurred.dt.month
+    offense_col = pick_column(raw, 'OFFENSE_DESCRIPTION')
+    df['offense'] = raw[offense_col] if offense_col else ''
+    df['category'] = offense_category(df['offense'])
+    shooting_col = pick_column(raw, 'SHOOTING')
+    df['shooting'] = shooting_flags(raw[shooting_col]) if shooting_col else False
+    for column in extra_columns:
+        col = pick_column(raw, column)
+        df[column.lower()] = raw[col] if col else np.nan
+    return df[df['year'].between(1990, 2100)].reset_index(drop=True)
+
+
+def grid_shape():
+    south, west, north, east = BOUNDS
+    return int(np.ceil((north - south) / CELL_DEGREES)), int(np.ceil((east - west) / CELL_DEGREES))
+
+
+def cell_of(lat, lon):
+    """Grid (row, col) for coordinates; -1 when outside the bounds"""
+    south, west, _, _ = BOUNDS
+    rows, cols = grid_shape()
+    row = np.floor((np.asarray(lat, dtype=float) - south) / CELL_DEGREES)
+    col = np.floor((np.asarray(lon, dtype=float) - west) / CELL_DEGREES)
+    inside = (row >= 0) & (row < rows) & (col >= 0) & (col < cols)
+    return np.where(inside, row, -1).astype(np.int64), np.where(inside, col, -1).astype(np.int64)
+
+
+def _box_sum(grid: np.ndarray) -> np.ndarray:
+    """3x3 neighbourhood sum over the last two axes (zero padded)"""
+    padded = np.pad(grid, [(0, 0)] * (grid.ndim - 2) + [(1, 1), (1, 1)])
+    rows, cols = grid.shape[-2:]
+    return sum(padded[..., i:i + rows, j:j + cols] for i in range(3) for j in range(3))
+
+
+def build_crime_grid(data_path: str = None, output_path: str = None) -> Dict:
+    """Bin incidents into the grid in one vectorized pass and save a compact npz"""
+    output_path = output_path or CRIME_GRID_PATH
+    df = load_crime(data_path)
+
+    rows, cols = grid_shape()
+    row, col = cell_of(df['lat'].to_numpy(), df['lon'].to_numpy())
+    inside = row >= 0
+    years = np.arange(int(df['year'].min()), int(df['year'].max()) + 1)
+
+    year_idx = df['year'].to_numpy(dtype=int)[inside] - years[0]
+    flat = ((year_idx * len(CATEGORIES) + df['category'].to_numpy()[inside]) * rows + row[inside]) * cols + col[inside]
+    counts = np.bincount(flat, minlength=len(years) * len(CATEGORIES) * rows * cols)
+    counts = counts.reshape(len(years), len(CATEGORIES), rows, cols)
+
+    shooting = df['shooting'].to_numpy()[inside]
+    flat_shooting = (year_idx[shooting] * rows + row[inside][shooting]) * cols + col[inside][shooting]
+    shootings = np.bincount(flat_shooting, minlength=len(years) * rows * cols).reshape(len(years), rows, cols)
+
+    # Score the latest full year (the current year is partial)
+    full_years = years[years < datetime.now().year]
+    score_year = int(full_years[-1]) if len(full_years) else int(years[-1])
+    y = score_year - years[0]
+    weighted = sum(WEIGHTS[c] * counts[y, i] for i, c in enumerate(CATEGORIES)) + WEIGHTS['shooting'] * shootings[y]
+    density = _box_sum(weighted[None])[0]
+
+    # Percentile rank among cells with any crime; empty cells are safest
+    populated = density > 0
+    score = np.full((rows, cols), 100, dtype=np.uint8)
+    if populated.any():
+        ordered = np.sort(density[populated])
+        ranks = np.searchsorted(ordered, density[populated], side='right') / len(ordered)
+        score[populated] = np.round(100 * (1 - ranks)).astype(np.uint8)
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = output_path + '.tmp.npz'
+    np.savez_compressed(
+        tmp_path,
+        counts=counts.astype(np.uint16 if counts.max() < 2 ** 16 else np.uint32),
+        shootings=shootings.astype(np.uint16),
+        score=score,
+        years=years.astype(np.int16),
+        score_year=np.int16(score_year),
+        bounds=np.array(BOUNDS),
+        cell_degrees=np.float64(CELL_DEGREES),
+        categories=np.array(CATEGORIES)
+    )
+    os.replace(tmp_path, output_path)
+
+    summary = {
+        'incidents': int(inside.sum()),
+        'outside_grid': int((~inside).sum()),
+        'grid': [rows, cols],
+        'years': [int(years[0]), int(years[-1])],
+        'score_year': score_year
+    }
+    logger.info(f"✅ Crime grid saved: {output_path} ({summary})")
+    return summary
+
+
+def safety_label(score: int) -> str:
+    return next(label for threshold, label in SAFETY_LABELS if score >= threshold)
+
+
+class CrimeGrid:
+    """O(1) safety score and trend lookups from the precomputed grid"""
+
+    def __init__(self, grid_path: str = None):
+        self.grid_path = grid_path or CRIME_GRID_PATH
+        self.available = False
+        try:
+            data = np.load(self.grid_path)
+            self.counts = data['counts']
+            self.shootings = data['shootings']
+            self.score = data['score']
+            self.years = data['years'].astype(int)
+            self.score_year = int(data['score_year'])
+            self.bounds = tuple(data['bounds'])
+            self.cell_degrees = float(data['cell_degrees'])
+            self.categories = [str(c) for c in data['categories']]
+            self.available = True
+            logger.info(f"✅ Crime grid loaded: {self.score.shape} cells, {self.years[0]}-{self.years[-1]}")
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"⚠️  Crime grid unavailable ({e})")
+
+    def _cell(self, lat: float, lon: float):
+        south, west, north, east = self.bounds
+        if not (south <= lat < north and west <= lon < east):
+            return None
+        return int((lat - south) / self.cell_degrees), int((lon - west) / self.cell_degrees)
+
+    def lookup(self, lat: float, lon: float) -> Optional[Dict]:
+        """Safety score, yearly incident counts and trend for the ~750 m block around a point"""
+        if not self.available:
+            return None
+        cell = self._cell(lat, lon)
+        if cell is None:
+            return None
+        r, c = cell
+        window = (slice(max(r - 1, 0), r + 2), slice(max(c - 1, 0), c + 2))
+        counts = self.counts[(slice(None), slice(None)) + window].sum(axis=(2, 3), dtype=np.int64)
+        shootings = self.shootings[(slice(None),) + window].sum(axis=(1, 2), dtype=np.int64)
+
+        totals = counts.sum(axis=1)
+        y = self.score_year - self.years[0]
+        trend = None
+        if y > 0 and totals[y - 1] > 0:
+            trend = round(float((totals[y] - totals[y - 1]) / totals[y - 1]), 4)
+
+        score = int(self.score[r, c])
+        return {
+            "safety_score": score,
+            "rating": safety_label(score),
+            "score_year": self.score_year,
+            "incidents_by_year": {int(year): int(total) for year, total in zip(self.years, totals)},
+            "by_category": {name: int(counts[y, i]) for i, name in enumerate(self.categories)},
+            "shootings": int(shootings[y]),
+            "trend_yoy": trend
+        }
+
+    def describe(self, lat: float, lon: float) -> str:
+        """One-line summary for LLM context"""
+        stats = self.lookup(lat, lon)
+        if not stats:
+            return ""
+        text = (f"Safety score {stats['safety_score']}/100 ({stats['rating']}); "
+                f"{sum(stats['by_category'].values())} incidents nearby in {stats['score_year']} "
+                f"({stats['by_category']['violent']} violent, {stats['shootings']} shootings)")
+        if stats['trend_yoy'] is not None:
+            text += f", {stats['trend_yoy']:+.0%} vs previous year"
+        return text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the crime-density grid")
+    parser.add_argument('--data-path', default=DATA_PATH)
+    parser.add_argument('--output', default=CRIME_GRID_PATH)
+    args = parser.parse_args()
+
+    summary = build_crime_grid(args.data_path, args.output)
+    print(f"\n🚨 Crime grid: {summary}")
@@ -0,0 +1,224 @@
+"""
+Embedding providers shared by ingestion and query
+
+Every collection records the provider, model and dimension it was embedded
+with in its metadata, and readers check that before querying, so vectors from
+different models are never compared. Collections written before the model was
+recorded are taken to hold the legacy provider's vectors (MiniLM). The default is the local CPU MiniLM
+model: ingestion needs no network round-trips and matches what the API embeds
+queries with. A collection can be re-embedded with another provider in bulk;
+the copy is built as a new version and goes live through its alias.
+
+    EMBEDDING_PROVIDER   minilm (default), openai or hash
+    EMBEDDING_LEGACY_PROVIDER  provider of unrecorded collections (default minilm)
+    EMBED_BATCH_SIZE     texts per model call (default 64)
+
+    python src/embeddings.py --reembed boston_properties --provider openai
+"""
+
+import os
+import sys
+import hashlib
+import argparse
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.collection_aliases import CollectionAliases
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'minilm')
+LEGACY_PROVIDER = os.getenv('EMBEDDING_LEGACY_PROVIDER', 'minilm')
+BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', 64))
+
+PROVIDER_FIELD = 'embedding_provider'
+MODEL_FIELD = 'embedding_model'
+DIM_FIELD = 'embedding_dim'
+
+REEMBED_PAGE = 1000
+
+
+class EmbeddingMismatch(ValueError):
+    """A collection was embedded with a different model than the one querying it"""
+
+
+class EmbeddingProvider:
+    """Named text -> float32 vector model with a fixed dimension"""
+
+    name = None
+    model = None
+    dim = None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def metadata(self) -> Dict:
+        return {PROVIDER_FIELD: self.name, MODEL_FIELD: self.model, DIM_FIELD: self.dim}
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """Local sentence-transformers model on CPU, loaded on first use"""
+
+    name = 'minilm'
+    model = 'all-MiniLM-L6-v2'
+    dim = 384
+
+    def __init__(self, device: str = 'cpu', batch_size: int = BATCH_SIZE):
+        self.device = device
+        self.batch_size = batch_size
+        self._encoder = None
+        self._lock = threading.Lock()
+
+    @property
+    def encoder(self):
+        with self._lock:
+            if self._encoder is None:
+                from sentence_transformers import SentenceTransformer
+                logger.info(f"🤖 Loading {self.model} on {self.device}")
+                self._encoder = SentenceTransformer(self.model, device=self.device)
+            return self._encoder
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.encoder.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True),
+                          dtype=np.float32)
+
+
+class OpenAIProvider(EmbeddingProvider):
+    """OpenAI embeddings API (network round-trip per request)"""
+
+    name = 'openai'
+    model = 'text-embedding-3-small'
+    dim = 1536
+    # Inputs per API request
+    max_batch = 2048
+
+    def __init__(self):
+        from openai import OpenAI
+        self.client = OpenAI()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.max_batch):
+            response = self.client.embeddings.create(model=self.model, input=list(texts[start:start + self.max_batch]))
+            vectors.extend(d.embedding for d in response.data)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+
+class HashProvider(EmbeddingProvider):
+    """SHA-256 bytes as a vector: deterministic but not semantic, only for collections indexed this way"""
+
+    name = 'hash'
+    model = 'sha256'
+    dim = 384
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            digest = np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8)
+            out[i, :len(digest)] = digest / 255.0
+        return out
+
+
+PROVIDERS = {
+    'minilm': SentenceTransformerProvider,
+    'openai': OpenAIProvider,
+    'hash': HashProvider
+}
+
+_instances: Dict[str, EmbeddingProvider] = {}
+_instances_lock = threading.Lock()
+
+
+def get_provider(name: str = None) -> EmbeddingProvider:
+    """Shared provider instance by name (default $EMBEDDING_PROVIDER or minilm)"""
+    name = name or DEFAULT_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown embedding provider '{name}', expected one of {sorted(PROVIDERS)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = PROVIDERS[name]()
+        return _instances[name]
+
+
+def collection_metadata(provider: EmbeddingProvider, metadata: Dict = None) -> Dict:
+    """Collection metadata with the provider recorded (other keys, e.g. hnsw:space, kept)"""
+    return {**(metadata or {}), **provider.metadata()}
+
+
+def stored_dim(collection) -> Optional[int]:
+    """Dimension of the vectors in a collection, None when it is empty"""
+    sample = collection.get(limit=1, include=['embeddings'])
+    return len(sample['embeddings'][0]) if len(sample['ids']) else None
+
+
+def check_collection(collection, provider: EmbeddingProvider):
+    """Raise EmbeddingMismatch unless the collection was embedded with provider's model
+
+    Non-empty collections from before the model was recorded are taken to
+    hold LEGACY_PROVIDER's vectors: a dimension check alone would let e.g.
+    hash vectors (also 384-d) query MiniLM ones.
+    """
+    meta = collection.metadata or {}
+    if MODEL_FIELD in meta:
+        model, dim = meta[MODEL_FIELD], int(meta.get(DIM_FIELD) or provider.dim)
+        if model != provider.model or dim != provider.dim:
+            raise EmbeddingMismatch(f"'{collection.name}' was embedded with {model} ({dim}-d), "
+                                    f"not {provider.model} ({provider.dim}-d)")
+        return
+    dim = stored_dim(collection)
+    if dim is None:
+        return
+    if dim != provider.dim:
+        raise EmbeddingMismatch(f"'{collection.name}' holds {dim}-d vectors, {provider.model} is {provider.dim}-d")
+    legacy = PROVIDERS[LEGACY_PROVIDER]
+    if provider.model != legacy.model:
+        raise EmbeddingMismatch(f"'{collection.name}' has no recorded model and is assumed to be {legacy.model}, "
+                                f"not {provider.model}; re-embed it with --reembed")
+
+
+def reembed(client, alias: str, provider: EmbeddingProvider, page_size: int = REEMBED_PAGE) -> Dict:
+    """Copy a collection's documents into a new version embedded with provider, then switch the alias"""
+    aliases = CollectionAliases(client)
+    source = client.get_collection(aliases.resolve(alias))
+    kept = {k: v for k, v in (source.metadata or {}).items() if k not in (PROVIDER_FIELD, MODEL_FIELD, DIM_FIELD)}
+    target, _ = aliases.open_build(alias, rebuild=True, metadata=collection_metadata(provider, kept))
+    logger.info(f"🔁 Re-embedding {source.name} ({source.count()} records) with {provider.model} into {target.name}")
+
+    offset = 0
+    while True:
+        page = source.get(include=['documents', 'metadatas'], limit=page_size, offset=offset)
+        if not page['ids']:
+            break
+        documents = [doc or '' for doc in page['documents']]
+        target.add(ids=page['ids'], documents=documents, metadatas=page['metadatas'],
+                   embeddings=provider.encode(documents))
+        offset += len(page['ids'])
+        logger.info(f"   {offset} records")
+    return aliases.promote(alias, target, expected=offset)
+
+
+if __name__ == "__main__":
+    import chromadb
+
+    parser = argparse.ArgumentParser(description="Inspect or re-embed ChromaDB collections")
+    parser.add_argument('--host', default=os.getenv('CHROMA_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('CHROMA_PORT', 8000)))
+    parser.add_argument('--reembed', metavar='COLLECTION', help="Re-embed COLLECTION (alias or name) in bulk")
+    parser.add_argument('--provider', choices=sorted(PROVIDERS), default=DEFAULT_PROVIDER)
+    args = parser.parse_args()
+
+    client = chromadb.HttpClient(host=args.host, port=args.port)
+    if args.reembed:
+        result = reembed(client, args.reembed, get_provider(args.provider))
+        print(f"🔀 {result['alias']} -> {result['target']} ({result['count']} records)")
+    else:
+        for collection in client.list_collections():
+            meta = collection.metadata or {}
+            model = meta.get(MODEL_FIELD, f"unrecorded, assumed {PROVIDERS[LEGACY_PROVIDER].model}")
+            print(f"📦 {collection.name}: {model} ({meta.get(DIM_FIELD, '?')}-d)")
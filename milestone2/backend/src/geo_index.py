@@ -0,0 +1,175 @@
+"""
+In-memory spatial index over lat/long points
+
+Points are bucketed into a uniform grid of small lat/long cells and stored
+sorted by cell, so nearest-neighbour and radius queries only look at the few
+cells around the query point. Distances are haversine miles.
+"""
+
+import os
+import sys
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processed_data import DATA_PATH, latest_file, pick_column, read_columns
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_MILES = 3958.8
+# ~0.35 miles north-south; ~0.26 miles east-west at Boston's latitude
+CELL_DEGREES = 0.005
+MILES_PER_DEGREE_LAT = 69.05
+
+LAT_COLUMNS = ['latitude', 'Lat', 'lat']
+LON_COLUMNS = ['longitude', 'Long', 'lon', 'lng']
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles (vectorized over numpy arrays)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+def load_points(keyword: str, data_path: str = None, columns: Dict[str, List[str]] = None) -> pd.DataFrame:
+    """Read a processed file and normalize its coordinates to latitude/longitude
+
+    columns optionally maps output names to candidate source columns; only those
+    (plus the coordinates) are read.
+    """
+    path = latest_file(keyword, data_path or DATA_PATH)
+    if not path:
+        logger.warning(f"⚠️  No processed {keyword} file found in {data_path or DATA_PATH}")
+        return pd.DataFrame(columns=['latitude', 'longitude'])
+
+    if columns is None:
+        df = pd.read_csv(path, low_memory=False)
+    else:
+        candidates = LAT_COLUMNS + LON_COLUMNS + [c for cands in columns.values() for c in cands]
+        df = read_columns(path, *candidates)
+    lat_col = pick_column(df, *LAT_COLUMNS)
+    lon_col = pick_column(df, *LON_COLUMNS)
+    if not lat_col or not lon_col:
+        logger.warning(f"⚠️  {os.path.basename(path)} has no coordinate columns")
+        return pd.DataFrame(columns=['latitude', 'longitude'])
+
+    renames = {lat_col: 'latitude', lon_col: 'longitude'}
+    for name, cands in (columns or {}).items():
+        col = pick_column(df, *cands)
+        if col:
+            renames[col] = name
+    df = df.rename(columns=renames)
+    if columns is not None:
+        df = df[['latitude', 'longitude'] + [name for name in columns if name in df.columns]]
+
+    df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
+    df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
+    # Boston crime data uses -1/0 for unknown locations
+    valid = df['latitude'].between(40, 44) & df['longitude'].between(-73, -69)
+    logger.info(f"📍 Loaded {int(valid.sum())} {keyword} points from {os.path.basename(path)}")
+    return df[valid].reset_index(drop=True)
+
+
+class GridIndex:
+    """Uniform lat/long grid supporting nearest and radius queries"""
+
+    def __init__(self, latitudes, longitudes, cell_degrees: float = CELL_DEGREES):
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+        self.cell_degrees = cell_degrees
+
+        rows, cols = self._cells(lats, lons)
+        keys = rows * 1_000_003 + cols
+        order = np.argsort(keys, kind='stable')
+        self.order = order
+        self.lats, self.lons = lats[order], lons[order]
+
+        sorted_keys = keys[order]
+        unique, starts = np.unique(sorted_keys, return_index=True)
+        ends = np.append(starts[1:], len(sorted_keys))
+        self._buckets = {int(k): (int(s), int(e)) for k, s, e in zip(unique, starts, ends)}
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _cells(self, lats, lons):
+        return (np.floor(lats / self.cell_degrees).astype(np.int64),
+                np.floor(lons / self.cell_degrees).astype(np.int64))
+
+    def _candidates(self, row: int, col: int, ring: int) -> np.ndarray:
+        """Sorted-array positions of all points within ring cells of (row, col)"""
+        slices = []
+        for r in range(row - ring, row + ring + 1):
+            for c in range(col - ring, col + ring + 1):
+                bucket = self._buckets.get(r * 1_000_003 + c)
+                if bucket:
+                    slices.append(np.arange(*bucket))
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _ring_miles(self, lat: float, ring: int) -> float:
+        """Guaranteed search radius covered by ring cells (east-west cells are narrower)"""
+        return ring * self.cell_degrees * MILES_PER_DEGREE_LAT * np.cos(np.radians(lat))
+
+    def radius(self, lat: float, lon: float, miles: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Original indices and distances of points within miles, nearest first"""
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        row, col = self._cells(np.array([lat]), np.array([lon]))
+        ring = int(np.ceil(miles / self._ring_miles(lat, 1)))
+        positions = self._candidates(int(row[0]), int(col[0]), ring)
+        distances = haversine_miles(lat, lon, self.lats[positions], self.lons[positions])
+        keep = distances <= miles
+        positions, distances = positions[keep], distances[keep]
+        by_distance = np.argsort(distances, kind='stable')
+        return self.order[positions[by_distance]], distances[by_distance]
+
+    def nearest(self, lat: float, lon: float, k: int = 1, max_miles: float = 25.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Original indices and distances of the k nearest points (within max_miles)"""
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        row, col = self._cells(np.array([lat]), np.array([lon]))
+        row, col = int(row[0]), int(col[0])
+        max_ring = int(np.ceil(max_miles / self._ring_miles(lat, 1)))
+
+        ring = 1
+        while True:
+            positions = self._candidates(row, col, ring)
+            if len(positions) >= k or ring >= max_ring:
+                distances = haversine_miles(lat, lon, self.lats[positions], self.lons[positions])
+                best = np.argsort(distances, kind='stable')[:k]
+                # Points just outside the searched square may be closer than the kth hit
+                if ring >= max_ring or (len(best) and distances[best[-1]] <= self._ring_miles(lat, ring)):
+                    keep = distances[best] <= max_miles
+                    return self.order[positions[best][keep]], distances[best][keep]
+            ring = min(ring * 2, max_ring)
+
+
+class PointLayer:
+    """A DataFrame of points plus its grid index"""
+
+    def __init__(self, df: pd.DataFrame, name: str = 'points'):
+        self.name = name
+        self.df = df.reset_index(drop=True)
+        self.index = GridIndex(self.df['latitude'].to_numpy(), self.df['longitude'].to_numpy())
+
+    @classmethod
+    def from_processed(cls, keyword: str, data_path: str = None, columns: Dict[str, List[str]] = None) -> 'PointLayer':
+        return cls(load_points(keyword, data_path, columns), keyword)
+
+    def __len__(self):
+        return len(self.df)
+
+    def nearest(self, lat: float, lon: float, k: int = 1, max_miles: float = 25.0) -> pd.DataFrame:
+        rows, distances = self.index.nearest(lat, lon, k, max_miles)
+        return self.df.iloc[rows].assign(distance_miles=distances)
+
+    def within(self, lat: float, lon: float, miles: float, limit: Optional[int] = None) -> pd.DataFrame:
+        rows, distances = self.index.radius(lat, lon, miles)
+        result = self.df.iloc[rows].assign(distance_miles=distances)
+        return result.head(limit) if limit else result
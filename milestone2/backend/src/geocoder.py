@@ -0,0 +1,286 @@
+"""
+Offline address geocoder (no network calls)
+
+Builds an address -> (lat, lon) table from the coordinate-bearing processed
+datasets: exact addresses (Yelp amenities, located properties), street
+centroids per ZIP and per street (crime incidents carry STREET + Lat/Long),
+and ZIP centroids, with a built-in ZIP centroid table as the last resort.
+The table is cached on disk; geocode_frame() resolves a whole property file
+with a few vectorized merges and locate() serves single lookups.
+"""
+
+import os
+import re
+import sys
+import argparse
+import logging
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processed_data import DATA_PATH, RESULTS_PATH, latest_file, pick_column, read_columns
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GEOCODER_PATH = os.getenv('GEOCODER_PATH', os.path.join(RESULTS_PATH, 'geocoder_index.parquet'))
+# Single-address lookups memoized per Geocoder
+GEOCODE_CACHE_SIZE = int(os.getenv('GEOCODE_CACHE_SIZE', 50000))
+
+# Most to least precise
+PRECISIONS = ['address', 'street_zip', 'street', 'zip']
+# Coordinates that locate the row itself ('source': came with the data); the rest are street/ZIP centroids
+EXACT_PRECISIONS = ['source', 'address']
+
+# Approximate centroids of Boston ZIP codes
+BOSTON_ZIP_CENTROIDS = {
+    '02108': (42.3576, -71.0649), '02109': (42.3647, -71.0542), '02110': (42.3573, -71.0514),
+    '02111': (42.3503, -71.0603), '02113': (42.3653, -71.0553), '02114': (42.3614, -71.0686),
+    '02115': (42.3430, -71.0925), '02116': (42.3503, -71.0763), '02118': (42.3380, -71.0720),
+    '02119': (42.3242, -71.0856), '02120': (42.3320, -71.0965), '02121': (42.3063, -71.0857),
+    '02122': (42.2914, -71.0445), '02124': (42.2866, -71.0709), '02125': (42.3164, -71.0576),
+    '02126': (42.2739, -71.0937), '02127': (42.3361, -71.0400), '02128': (42.3770, -71.0250),
+    '02129': (42.3779, -71.0622), '02130': (42.3097, -71.1140), '02131': (42.2836, -71.1250),
+    '02132': (42.2806, -71.1627), '02134': (42.3563, -71.1286), '02135': (42.3496, -71.1570),
+    '02136': (42.2545, -71.1279), '02199': (42.3475, -71.0820), '02210': (42.3481, -71.0410),
+    '02215': (42.3470, -71.1020)
+}
+
+SUFFIXES = {
+    'STREET': 'ST', 'AVENUE': 'AVE', 'AV': 'AVE', 'ROAD': 'RD', 'PLACE': 'PL', 'TERRACE': 'TER',
+    'COURT': 'CT', 'BOULEVARD': 'BLVD', 'SQUARE': 'SQ', 'DRIVE': 'DR', 'LANE': 'LN',
+    'PARKWAY': 'PKWY', 'HIGHWAY': 'HWY', 'CIRCLE': 'CIR', 'WHARF': 'WHF'
+}
+_SUFFIX_PATTERN = re.compile(r'\b(' + '|'.join(SUFFIXES) + r')\b')
+_PUNCTUATION_PATTERN = re.compile(r'[^\w\s#\-]')
+_UNIT_PATTERN = re.compile(r'\s*(?:#|\bUNIT\b|\bAPT\b|\bSTE\b|\bSUITE\b).*$')
+_HOUSE_NUMBER_PATTERN = re.compile(r'^[\d\-]+[A-Z]?\s+(?:(?:[\d\-]+[A-Z]?|[A-Z])\s+)*')
+_ZIP_PATTERN = re.compile(r'\b(0\d{4})(?:-\d{4})?\b')
+
+
+def normalize_address_text(address: str) -> str:
+    """'104 Putnam Street, Boston, MA' -> '104 PUTNAM ST'"""
+    text = _PUNCTUATION_PATTERN.sub(' ', str(address).split(',')[0].upper())
+    text = _SUFFIX_PATTERN.sub(lambda m: SUFFIXES[m.group(1)], _UNIT_PATTERN.sub('', text))
+    return ' '.join(text.split())
+
+
+def normalize_street_address(addresses: pd.Series) -> pd.Series:
+    """normalize_address_text() over a column, once per distinct address"""
+    text = addresses.astype('string')
+    mapping = {address: normalize_address_text(address) for address in text.dropna().unique()}
+    return text.map(mapping).astype('string')
+
+
+def split_house_number(normalized: str) -> Tuple[str, str]:
+    """'104 A 104 PUTNAM ST' -> ('104 A 104', 'PUTNAM ST')"""
+    match = _HOUSE_NUMBER_PATTERN.match(normalized + ' ')
+    if not match:
+        return '', normalized
+    return match.group(0).strip(), normalized[match.end():].strip()
+
+
+def street_name(normalized: pd.Series) -> pd.Series:
+    """Drop house numbers: '104 A 104 PUTNAM ST' -> 'PUTNAM ST'"""
+    return normalized.str.replace(_HOUSE_NUMBER_PATTERN, '', regex=True).str.strip()
+
+
+def normalize_zip(values: pd.Series, addresses: pd.Series = None) -> pd.Series:
+    """Five-digit ZIP from a zip column, falling back to one found in the address"""
+    zips = values.astype('string').str.replace(r'\.0$', '', regex=True).str.strip().str.zfill(5)
+    zips = zips.where(zips.str.fullmatch(r'\d{5}', na=False))
+    if addresses is not None:
+        zips = zips.fillna(addresses.astype('string').str.extract(_ZIP_PATTERN, expand=False))
+    return zips
+
+
+def _points(keyword: str, data_path: str, address_columns) -> Optional[pd.DataFrame]:
+    path = latest_file(keyword, data_path)
+    if not path:
+        return None
+    raw = read_columns(path, 'latitude', 'Lat', 'longitude', 'Long', 'zip_code', 'ZIPCODE', 'geocode_precision',
+                       *address_columns)
+    if 'geocode_precision' in raw.columns:
+        # Enriched files carry geocoded centroids, which must not come back as address-level points
+        raw = raw[raw['geocode_precision'].isna() | raw['geocode_precision'].isin(EXACT_PRECISIONS)]
+    lat_col, lon_col = pick_column(raw, 'latitude', 'Lat'), pick_column(raw, 'longitude', 'Long')
+    address_col = pick_column(raw, *address_columns)
+    if not (lat_col and lon_col and address_col):
+        return None
+    zip_col = pick_column(raw, 'zip_code', 'ZIPCODE')
+    df = pd.DataFrame({
+        'address': normalize_street_address(raw[address_col]),
+        'zip': normalize_zip(raw[zip_col] if zip_col else pd.Series(pd.NA, index=raw.index), raw[address_col]),
+        'latitude': pd.to_numeric(raw[lat_col], errors='coerce'),
+        'longitude': pd.to_numeric(raw[lon_col], errors='coerce')
+    })
+    df = df[df['latitude'].between(40, 44) & df['longitude'].between(-73, -69)].dropna(subset=['address'])
+    logger.info(f"📍 {keyword}: {len(df)} addressed points")
+    return df
+
+
+def _nearest_zip(lat: np.ndarray, lon: np.ndarray, centroids: Dict[str, Tuple[float, float]]) -> np.ndarray:
+    zips = np.array(list(centroids))
+    coords = np.array(list(centroids.values()))
+    d = (lat[:, None] - coords[None, :, 0]) ** 2 + ((lon[:, None] - coords[None, :, 1]) * 0.74) ** 2
+    return zips[d.argmin(axis=1)]
+
+
+def build_geocoder_index(data_path: str = None, output_path: str = None) -> pd.DataFrame:
+    """Build the address/street/ZIP coordinate table and cache it on disk"""
+    data_path = data_path or DATA_PATH
+    output_path = output_path or GEOCODER_PATH
+
+    sources = [
+        _points('amenities', data_path, ['address']),
+        _points('properties', data_path, ['full_address', 'address', 'Location']),
+        # Crime incidents have street names (no house numbers) with coordinates
+        _points('crime', data_path, ['STREET'])
+    ]
+    sources = [s for s in sources if s is not None and len(s)]
+    if not sources:
+        logger.warning("⚠️  No addressed coordinates found, index will hold ZIP centroids only")
+    points = pd.concat(sources, ignore_index=True) if sources else pd.DataFrame(
+        {'address': pd.Series(dtype='string'), 'zip': pd.Series(dtype='string'),
+         'latitude': pd.Series(dtype=float), 'longitude': pd.Series(dtype=float)}
+    )
+
+    points['street'] = street_name(points['address'])
+    has_number = points['street'] != points['address']
+    # Incidents without a ZIP are assigned the nearest ZIP centroid
+    missing_zip = points['zip'].isna().to_numpy()
+    if missing_zip.any():
+        points.loc[missing_zip, 'zip'] = _nearest_zip(
+            points.loc[missing_zip, 'latitude'].to_numpy(), points.loc[missing_zip, 'longitude'].to_numpy(),
+            BOSTON_ZIP_CENTROIDS
+        )
+
+    tables = []
+    for precision, keys, subset in [
+        ('address', ['address'], points[has_number]),
+        ('street_zip', ['street', 'zip'], points),
+        ('street', ['street'], points),
+        ('zip', ['zip'], points)
+    ]:
+        grouped = subset.groupby(keys).agg(
+            latitude=('latitude', 'median'), longitude=('longitude', 'median'), count=('latitude', 'size')
+        ).reset_index()
+        if grouped.empty:
+            continue
+        grouped['key'] = grouped[keys].astype(str).agg('|'.join, axis=1)
+        grouped['precision'] = precision
+        tables.append(grouped[['precision', 'key', 'latitude', 'longitude', 'count']])
+
+    known_zips = set(tables[-1]['key']) if tables and tables[-1]['precision'].iat[0] == 'zip' else set()
+    fallback = pd.DataFrame([
+        {'precision': 'zip', 'key': z, 'latitude': lat, 'longitude': lon, 'count': 0}
+        for z, (lat, lon) in BOSTON_ZIP_CENTROIDS.items() if z not in known_zips
+    ])
+    index = pd.concat(tables + [fallback], ignore_index=True)
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    index.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    logger.info(f"✅ Geocoder index saved: {output_path} ({index['precision'].value_counts().to_dict()})")
+    return index
+
+
+class Geocoder:
+    """Local geocoder over the cached index"""
+
+    def __init__(self, index_path: str = None, data_path: str = None, build: bool = False,
+                 cache_size: int = GEOCODE_CACHE_SIZE):
+        self.index_path = index_path or GEOCODER_PATH
+        # Per instance, so a reloaded index never answers from another's cache
+        self.geocode = lru_cache(maxsize=cache_size)(self._geocode)
+        index = None
+        try:
+            index = pd.read_parquet(self.index_path)
+        except (OSError, ValueError, ImportError) as e:
+            if build:
+                logger.info("🔧 Geocoder index not found, building it")
+                index = build_geocoder_index(data_path, self.index_path)
+            else:
+                logger.warning(f"⚠️  Geocoder index unavailable ({e}), using ZIP centroids only")
+        if index is None:
+            index = pd.DataFrame([
+                {'precision': 'zip', 'key': z, 'latitude': lat, 'longitude': lon, 'count': 0}
+                for z, (lat, lon) in BOSTON_ZIP_CENTROIDS.items()
+            ])
+        self.tables = {
+            precision: group.set_index('key')[['latitude', 'longitude']]
+            for precision, group in index.groupby('precision')
+        }
+        logger.info(f"✅ Geocoder ready: { {k: len(v) for k, v in self.tables.items()} }")
+
+    def geocode_frame(self, addresses: pd.Series, zips: pd.Series = None) -> pd.DataFrame:
+        """Geocode many addresses at once -> latitude, longitude, precision (aligned to the input)"""
+        addresses = addresses.reset_index(drop=True)
+        normalized = normalize_street_address(addresses)
+        zip_codes = normalize_zip(zips.reset_index(drop=True) if zips is not None
+                                  else pd.Series(pd.NA, index=addresses.index), addresses)
+        streets = street_name(normalized)
+        keys = {
+            'address': normalized,
+            'street_zip': streets + '|' + zip_codes,
+            'street': streets,
+            'zip': zip_codes
+        }
+
+        result = pd.DataFrame({'latitude': np.nan, 'longitude': np.nan, 'precision': None}, index=addresses.index)
+        for precision in PRECISIONS:
+            table = self.tables.get(precision)
+            pending = result['latitude'].isna()
+            if table is None or not pending.any():
+                continue
+            matched = table.reindex(keys[precision][pending].astype(object))
+            matched.index = result.index[pending]
+            hit = matched['latitude'].notna()
+            result.loc[hit[hit].index, ['latitude', 'longitude']] = matched.loc[hit, ['latitude', 'longitude']]
+            result.loc[hit[hit].index, 'precision'] = precision
+        return result
+
+    def _geocode(self, address: str, zip_code: str = None) -> Optional[Dict]:
+        """Single lookup -> {'latitude', 'longitude', 'precision'} or None (memoized as geocode())"""
+        row = self.geocode_frame(pd.Series([address]), pd.Series([zip_code])).iloc[0]
+        if pd.isna(row['latitude']):
+            return None
+        return {'latitude': float(row['latitude']), 'longitude': float(row['longitude']), 'precision': row['precision']}
+
+    def locate(self, address: str) -> Optional[Tuple[float, float]]:
+        """(lat, lon) for an address at street precision or better"""
+        result = self.geocode(address)
+        if result and result['precision'] != 'zip':
+            return result['latitude'], result['longitude']
+        return None
+
+
+def geocode_properties(data_path: str = None, index_path: str = None) -> pd.DataFrame:
+    """Geocode the whole processed property file in one vectorized pass"""
+    path = latest_file('properties', data_path or DATA_PATH)
+    if not path:
+        raise FileNotFoundError(f"No processed properties file in {data_path or DATA_PATH}")
+    raw = read_columns(path, 'property_id', 'PID', 'full_address', 'address', 'Location', 'zip_code', 'ZIPCODE')
+    address_col = pick_column(raw, 'full_address', 'address', 'Location')
+    zip_col = pick_column(raw, 'zip_code', 'ZIPCODE')
+    result = Geocoder(index_path, data_path, build=True).geocode_frame(raw[address_col], raw[zip_col] if zip_col else None)
+    id_col = pick_column(raw, 'property_id', 'PID')
+    if id_col:
+        result.insert(0, 'property_id', raw[id_col].to_numpy())
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the offline geocoder index")
+    parser.add_argument('--data-path', default=DATA_PATH)
+    parser.add_argument('--output', default=GEOCODER_PATH)
+    args = parser.parse_args()
+
+    build_geocoder_index(args.data_path, args.output)
+    coded = geocode_properties(args.data_path, args.output)
+    print(f"\n🗺️  Geocoded properties by precision: {coded['precision'].value_counts(dropna=False).to_dict()}")
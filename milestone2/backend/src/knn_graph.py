@@ -0,0 +1,300 @@
+"""
+Precomputed item-to-item kNN graph for /recommendations/{property_id}
+
+An offline job embeds every property, appends structured features (price band,
+beds, baths, size, zip) and stores each property's k nearest neighbours as a
+compact int32 index / float16 score adjacency array. Serving is a dict lookup
+plus one row read. When properties change, only the affected rows are rebuilt.
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processed_data import DATA_PATH, RESULTS_PATH, latest_file, pick_column
+from src.embeddings import get_provider
+from src.property_store import normalize_property_id
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GRAPH_PATH = os.getenv('KNN_GRAPH_PATH', os.path.join(RESULTS_PATH, 'knn_graph.npz'))
+
+TEXT_COLUMNS = ['full_address', 'CITY', 'LU_DESC', 'STRUCTURE_CLASS', 'OVERALL_COND']
+NUMERIC_COLUMNS = ['TOTAL_VALUE', 'BED_RMS', 'FULL_BTH', 'living_square_feet']
+LOG_COLUMNS = {'TOTAL_VALUE', 'living_square_feet'}
+
+# Relative weight of each block in the combined cosine similarity
+EMBEDDING_WEIGHT = 1.0
+STRUCTURED_WEIGHT = 1.0
+ZIP_WEIGHT = 0.5
+
+CHUNK_SIZE = 2048
+
+
+def default_embed_fn(texts: List[str]) -> np.ndarray:
+    """Embed with the same provider the RAG pipeline queries with"""
+    return get_provider().encode(texts)
+
+
+def _row_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """Stable per-row hash used to detect changed properties (dtype-insensitive)"""
+    parts = [df[c].fillna('').astype(str) for c in TEXT_COLUMNS if c in df.columns]
+    parts += [pd.to_numeric(df[c], errors='coerce').astype('float64').astype(str) for c in NUMERIC_COLUMNS if c in df.columns]
+    zip_col = pick_column(df, 'zip_code')
+    if zip_col:
+        parts.append(df[zip_col].astype(str).str.zfill(5))
+    joined = pd.concat(parts, axis=1).agg('|'.join, axis=1)
+    return np.array([int(hashlib.md5(s.encode()).hexdigest()[:16], 16) for s in joined], dtype=np.uint64)
+
+
+def build_features(df: pd.DataFrame, embed_fn: Callable = None, zip_vocab: List[str] = None,
+                   stats: Dict = None) -> Tuple[np.ndarray, Dict]:
+    """Combine text embeddings and structured features into unit vectors"""
+    embed_fn = embed_fn or default_embed_fn
+
+    text_cols = [c for c in TEXT_COLUMNS if c in df.columns]
+    texts = df[text_cols].fillna('').astype(str).agg(' | '.join, axis=1).tolist()
+    embeddings = np.asarray(embed_fn(texts), dtype=np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-12)
+
+    numeric = []
+    for col in NUMERIC_COLUMNS:
+        values = pd.to_numeric(df[col], errors='coerce') if col in df.columns else pd.Series(np.nan, index=df.index)
+        if col in LOG_COLUMNS:
+            values = np.log1p(values.clip(lower=0))
+        numeric.append(values.to_numpy(dtype=np.float32))
+    numeric = np.column_stack(numeric)
+
+    if stats is None:
+        stats = {
+            'mean': np.nanmean(numeric, axis=0),
+            'std': np.nanstd(numeric, axis=0) + 1e-6
+        }
+    structured = np.nan_to_num((numeric - stats['mean']) / stats['std'])
+    structured /= np.sqrt(structured.shape[1])
+
+    zip_col = pick_column(df, 'zip_code')
+    zips = df[zip_col].astype(str).str.zfill(5) if zip_col else pd.Series('', index=df.index)
+    if zip_vocab is None:
+        zip_vocab = sorted(zips.unique())
+    zip_index = {z: i for i, z in enumerate(zip_vocab)}
+    one_hot = np.zeros((len(df), len(zip_vocab)), dtype=np.float32)
+    codes = zips.map(zip_index)
+    known = codes.notna().to_numpy()
+    one_hot[np.flatnonzero(known), codes[known].astype(int).to_numpy()] = 1.0
+
+    features = np.hstack([
+        EMBEDDING_WEIGHT * embeddings,
+        STRUCTURED_WEIGHT * structured,
+        ZIP_WEIGHT * one_hot
+    ]).astype(np.float32)
+    features /= np.linalg.norm(features, axis=1, keepdims=True).clip(min=1e-12)
+
+    # Features are persisted as float16; round now so incremental updates
+    # rank exactly like a full rebuild would
+    stats['zip_vocab'] = zip_vocab
+    return features.astype(np.float16).astype(np.float32), stats
+
+
+def _topk_for_rows(features: np.ndarray, rows: np.ndarray, k: int):
+    """Top-k cosine neighbours of the given rows against every row, excluding self"""
+    sims = features[rows] @ features.T
+    sims[np.arange(len(rows)), rows] = -np.inf
+    idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    part = np.take_along_axis(sims, idx, axis=1)
+    order = np.argsort(-part, axis=1)
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+def compute_neighbors(features: np.ndarray, k: int, rows: np.ndarray = None, chunk_size: int = CHUNK_SIZE,
+                      neighbors: np.ndarray = None, scores: np.ndarray = None):
+    """Exact kNN by chunked matrix products (all rows, or only `rows`)"""
+    n = features.shape[0]
+    k = min(k, n - 1)
+    rows = np.arange(n) if rows is None else rows
+    if neighbors is None:
+        neighbors = np.empty((n, k), dtype=np.int32)
+        scores = np.empty((n, k), dtype=np.float16)
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        neighbors[chunk], scores[chunk] = _topk_for_rows(features, chunk, k)
+    return neighbors, scores
+
+
+def _load_properties(data_path: str) -> pd.DataFrame:
+    path = latest_file('properties', data_path)
+    if not path:
+        raise FileNotFoundError(f"No processed properties file in {data_path}")
+    df = pd.read_csv(path, low_memory=False)
+    id_col = pick_column(df, 'property_id', 'PID')
+    # Same canonical ids as the property store ('100001000.0' -> '100001000')
+    df[id_col] = df[id_col].map(normalize_property_id)
+    df = df.dropna(subset=[id_col]).drop_duplicates(subset=[id_col], keep='last')
+    return df.rename(columns={id_col: 'property_id'}).reset_index(drop=True)
+
+
+def _save(path: str, ids, neighbors, scores, features, fingerprints, stats):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp.npz'
+    np.savez(
+        tmp_path,
+        ids=np.asarray(ids, dtype=str),
+        neighbors=neighbors,
+        scores=scores,
+        features=features.astype(np.float16),
+        fingerprints=fingerprints,
+        stat_mean=stats['mean'],
+        stat_std=stats['std'],
+        zip_vocab=np.asarray(stats['zip_vocab'], dtype=str)
+    )
+    os.replace(tmp_path, path)
+
+
+def build_knn_graph(df: pd.DataFrame, output_path: str = None, k: int = 20, embed_fn: Callable = None) -> Dict:
+    """Full offline build"""
+    output_path = output_path or GRAPH_PATH
+    logger.info(f"🔧 Building kNN graph for {len(df)} properties (k={k})")
+
+    features, stats = build_features(df, embed_fn)
+    neighbors, scores = compute_neighbors(features, k)
+    fingerprints = _row_fingerprints(df)
+    _save(output_path, df['property_id'].map(normalize_property_id).to_numpy(), neighbors, scores, features,
+          fingerprints, stats)
+
+    logger.info(f"✅ kNN graph saved: {output_path}")
+    return {'properties': len(df), 'k': neighbors.shape[1], 'rebuilt': len(df)}
+
+
+def update_knn_graph(df: pd.DataFrame, graph_path: str = None, k: int = 20, embed_fn: Callable = None) -> Dict:
+    """Incremental rebuild: re-embed changed/new rows and patch affected neighbour lists"""
+    graph_path = graph_path or GRAPH_PATH
+    if not os.path.exists(graph_path):
+        return build_knn_graph(df, graph_path, k, embed_fn)
+
+    old = np.load(graph_path)
+    old_ids = old['ids']
+    stats = {'mean': old['stat_mean'], 'std': old['stat_std'], 'zip_vocab': list(old['zip_vocab'])}
+
+    ids = df['property_id'].map(normalize_property_id).to_numpy()
+    fingerprints = _row_fingerprints(df)
+
+    old_pos = pd.Series(np.arange(len(old_ids)), index=old_ids)
+    pos = old_pos.reindex(ids).to_numpy()
+    existing = ~np.isnan(pos)
+    pos_int = np.where(existing, pos, 0).astype(np.int64)
+    unchanged = existing & (old['fingerprints'][pos_int] == fingerprints)
+    changed = np.flatnonzero(~unchanged)
+
+    removed = len(old_ids) - int(existing.sum())
+    if len(changed) == 0 and removed == 0:
+        logger.info("✅ kNN graph already up to date")
+        return {'properties': len(df), 'k': old['neighbors'].shape[1], 'rebuilt': 0}
+
+    # Features: reuse stored vectors for unchanged rows, embed only the rest
+    features = np.empty((len(df), old['features'].shape[1]), dtype=np.float32)
+    features[unchanged] = old['features'][pos_int[unchanged]].astype(np.float32)
+    if len(changed):
+        new_features, _ = build_features(df.iloc[changed], embed_fn, stats['zip_vocab'], dict(stats))
+        features[changed] = new_features
+
+    # Translate old neighbour indices to new positions; lists touching a
+    # changed/removed row are recomputed in full
+    new_index_of_old = np.full(len(old_ids), -1, dtype=np.int64)
+    new_index_of_old[pos_int[existing]] = np.flatnonzero(existing)
+    stale_old = np.ones(len(old_ids), dtype=bool)
+    stale_old[pos_int[unchanged]] = False
+
+    k = min(k, len(df) - 1)
+    neighbors = np.empty((len(df), k), dtype=np.int32)
+    scores = np.empty((len(df), k), dtype=np.float16)
+    needs_full = ~unchanged.copy()
+
+    keep_rows = np.flatnonzero(unchanged)
+    if len(keep_rows):
+        old_rows = pos_int[keep_rows]
+        old_nbrs = old['neighbors'][old_rows]
+        touches_stale = stale_old[old_nbrs].any(axis=1) | (old_nbrs.shape[1] < k)
+        needs_full[keep_rows[touches_stale]] = True
+        clean = keep_rows[~touches_stale]
+        neighbors[clean] = new_index_of_old[old['neighbors'][pos_int[clean]][:, :k]]
+        scores[clean] = old['scores'][pos_int[clean]][:, :k]
+
+        # Changed rows may now be closer than an unchanged row's current k-th neighbour
+        if len(changed) and len(clean):
+            sims = features[clean] @ features[changed].T
+            kth = scores[clean, -1].astype(np.float32)
+            improving = np.flatnonzero((sims > kth[:, None]).any(axis=1))
+            needs_full[clean[improving]] = True
+
+    full_rows = np.flatnonzero(needs_full)
+    compute_neighbors(features, k, full_rows, neighbors=neighbors, scores=scores)
+
+    _save(graph_path, ids, neighbors, scores, features, fingerprints, stats)
+    logger.info(f"✅ kNN graph updated: {len(changed)} changed, {removed} removed, {len(full_rows)} lists rebuilt")
+    return {'properties': len(df), 'k': k, 'rebuilt': int(len(full_rows))}
+
+
+class KNNGraph:
+    """Read-only view of the precomputed graph used by the API"""
+
+    def __init__(self, graph_path: str = None):
+        self.graph_path = graph_path or GRAPH_PATH
+        self.ids = []
+        self.neighbors = np.zeros((0, 0), dtype=np.int32)
+        self.scores = np.zeros((0, 0), dtype=np.float16)
+        self.index = {}
+        self.load()
+
+    def load(self) -> bool:
+        try:
+            data = np.load(self.graph_path)
+            self.ids = data['ids'].tolist()
+            self.neighbors = data['neighbors']
+            self.scores = data['scores']
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"⚠️  kNN graph unavailable ({e})")
+            return False
+        self.index = {pid: i for i, pid in enumerate(self.ids)}
+        logger.info(f"✅ kNN graph loaded: {len(self.ids)} properties, k={self.neighbors.shape[1]}")
+        return True
+
+    @property
+    def available(self) -> bool:
+        return len(self.index) > 0
+
+    def __contains__(self, property_id: str) -> bool:
+        return normalize_property_id(property_id) in self.index
+
+    def similar(self, property_id: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Neighbours of property_id as (property_id, similarity) pairs"""
+        row = self.index.get(normalize_property_id(property_id))
+        if row is None:
+            return []
+        nbrs = self.neighbors[row, :limit].tolist()
+        sims = self.scores[row, :limit].tolist()
+        return [(self.ids[j], round(s, 3)) for j, s in zip(nbrs, sims)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the property kNN recommendation graph")
+    parser.add_argument('--data-path', default=DATA_PATH)
+    parser.add_argument('--output', default=GRAPH_PATH)
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--full', action='store_true', help='Rebuild from scratch instead of incrementally')
+    args = parser.parse_args()
+
+    properties = _load_properties(args.data_path)
+    if args.full:
+        summary = build_knn_graph(properties, args.output, args.k)
+    else:
+        summary = update_knn_graph(properties, args.output, args.k)
+    print(f"\n🔗 kNN graph: {summary}")
@@ -0,0 +1,135 @@
+"""
+Bounding-box map search over property coordinates
+
+Properties are bucketed into a lat/long grid per map zoom level at startup:
+each level keeps its occupied cells sorted by (row, col) with precomputed
+counts and centroids, so a viewport query is one binary search per grid row
+it spans. Low zooms return clusters per cell, high zooms return properties,
+and every response is capped at `limit` features.
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIN_ZOOM = 8
+MAX_ZOOM = 18
+# At this zoom and above individual properties are returned
+POINT_ZOOM = 16
+# Grid cells per map tile edge (a 256 px tile -> 64 px cells)
+CELLS_PER_TILE = 4
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+ITEM_FIELDS = ['property_id', 'address', 'price', 'bedrooms', 'bathrooms', 'sqft', 'property_type']
+
+
+def cell_degrees(zoom: int) -> float:
+    return 360.0 / (2 ** zoom * CELLS_PER_TILE)
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """'west,south,east,north' -> floats (raises ValueError)"""
+    parts = [float(v) for v in bbox.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox must be 'west,south,east,north'")
+    west, south, east, north = parts
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        raise ValueError("bbox must satisfy west < east and south < north")
+    return west, south, east, north
+
+
+class _Level:
+    """Occupied cells of one zoom level sorted by (row, col)"""
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, zoom: int):
+        self.size = cell_degrees(zoom)
+        rows = np.floor((lat + 90.0) / self.size).astype(np.int64)
+        cols = np.floor((lon + 180.0) / self.size).astype(np.int64)
+        keys = (rows << 32) | cols
+        self.order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[self.order]
+        self.keys, self.starts, self.counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+        self.lat = np.add.reduceat(lat[self.order], self.starts) / self.counts
+        self.lon = np.add.reduceat(lon[self.order], self.starts) / self.counts
+
+    def cells(self, west: float, south: float, east: float, north: float) -> np.ndarray:
+        """Indices of occupied cells intersecting the box"""
+        r0, r1 = int((south + 90.0) // self.size), int((north + 90.0) // self.size)
+        c0, c1 = int((west + 180.0) // self.size), int((east + 180.0) // self.size)
+        lo = np.searchsorted(self.keys, (np.arange(r0, r1 + 1, dtype=np.int64) << 32) | c0, side='left')
+        hi = np.searchsorted(self.keys, (np.arange(r0, r1 + 1, dtype=np.int64) << 32) | c1, side='right')
+        spans = [np.arange(a, b) for a, b in zip(lo, hi) if b > a]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+
+class MapIndex:
+    """Per-zoom cluster counts and viewport queries over located properties"""
+
+    def __init__(self, frame: pd.DataFrame = None):
+        if frame is None or not {'latitude', 'longitude'} <= set(frame.columns):
+            # No store (or one without coordinates): an empty, unavailable index rather than a startup error
+            frame = pd.DataFrame(columns=['property_id', 'latitude', 'longitude'])
+        located = frame.dropna(subset=['latitude', 'longitude'])
+        if 'geocode_precision' in located.columns:
+            # ZIP centroids would stack whole neighborhoods on one pin
+            located = located[located['geocode_precision'] != 'zip']
+        located = located.reset_index(drop=True)
+
+        self.lat = located['latitude'].to_numpy(dtype=float)
+        self.lon = located['longitude'].to_numpy(dtype=float)
+        self.items = located[[c for c in ITEM_FIELDS if c in located.columns]]
+        self.levels = {}
+        if len(located):
+            self.levels = {z: _Level(self.lat, self.lon, z) for z in range(MIN_ZOOM, POINT_ZOOM + 1)}
+        logger.info(f"✅ Map index ready: {len(located)} properties, zooms {MIN_ZOOM}-{POINT_ZOOM}")
+
+    @classmethod
+    def from_store(cls, store) -> 'MapIndex':
+        return cls(store._load().reset_index(drop=True))
+
+    @property
+    def available(self) -> bool:
+        return bool(self.levels)
+
+    def _points(self, level: _Level, cells: np.ndarray, bbox, limit: int) -> Tuple[int, List[Dict]]:
+        west, south, east, north = bbox
+        idx = np.concatenate([level.order[level.starts[c]:level.starts[c] + level.counts[c]] for c in cells]) \
+            if len(cells) else np.empty(0, dtype=np.int64)
+        inside = idx[(self.lat[idx] >= south) & (self.lat[idx] <= north) &
+                     (self.lon[idx] >= west) & (self.lon[idx] <= east)]
+        chosen = np.sort(inside)[:limit]
+        rows = self.items.iloc[chosen].assign(latitude=self.lat[chosen], longitude=self.lon[chosen])
+        features = rows.astype(object).where(rows.notna(), None).to_dict('records')
+        return len(inside), [{"type": "property", **f} for f in features]
+
+    def within(self, bbox: Tuple[float, float, float, float], zoom: int, limit: int = DEFAULT_LIMIT) -> Dict:
+        """Clusters (low zoom) or properties (high zoom) inside the box, at most limit features"""
+        zoom = int(min(max(zoom, MIN_ZOOM), MAX_ZOOM))
+        limit = int(min(max(limit, 1), MAX_LIMIT))
+        if not self.available:
+            return {"zoom": zoom, "mode": "points", "total": 0, "truncated": False, "features": []}
+
+        level = self.levels[min(zoom, POINT_ZOOM)]
+        cells = level.cells(*bbox)
+        counts = level.counts[cells]
+
+        if zoom >= POINT_ZOOM or counts.sum() <= limit:
+            total, features = self._points(level, cells, bbox, limit)
+            return {"zoom": zoom, "mode": "points", "total": total, "truncated": total > len(features),
+                    "features": features}
+
+        # Largest clusters first when the viewport holds more cells than the limit
+        top = cells[np.argsort(-counts, kind='stable')[:limit]]
+        features = [
+            {"type": "cluster", "count": int(level.counts[c]),
+             "latitude": round(float(level.lat[c]), 6), "longitude": round(float(level.lon[c]), 6)}
+            for c in top
+        ]
+        return {"zoom": zoom, "mode": "clusters", "total": int(counts.sum()), "truncated": len(cells) > len(top),
+                "features": features}
@@ -0,0 +1,142 @@
+"""
+Radius queries for amenities, crime, transit and schools around a location
+
+Built at startup from the cleaned point datasets, each indexed by a
+GridIndex. Answers "what is within r miles of this property" with counts and
+the nearest items, for /properties/{id}/nearby and for RAG context.
+"""
+
+import os
+import re
+import sys
+import logging
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.geo_index import PointLayer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# layer -> output field -> candidate source columns
+LAYER_FIELDS = {
+    'amenities': {
+        'name': ['name'],
+        'category': ['category'],
+        'rating': ['rating'],
+        'address': ['address']
+    },
+    'crime': {
+        'offense': ['OFFENSE_DESCRIPTION', 'offense_description'],
+        'date': ['OCCURRED_ON_DATE', 'occurred_on_date'],
+        'shooting': ['SHOOTING', 'shooting']
+    },
+    'transit': {
+        'name': ['station_name'],
+        'vehicle_type': ['vehicle_type']
+    },
+    'schools': {
+        'name': ['name', 'SCH_NAME', 'school_name'],
+        'category': ['SCH_TYPE', 'type']
+    }
+}
+
+DEFAULT_RADIUS_MILES = 0.5
+MAX_RADIUS_MILES = 5.0
+
+# query keyword -> nearby type
+QUERY_TYPES = {
+    'crime': 'crime', 'safe': 'crime', 'dangerous': 'crime',
+    'cafe': 'cafes', 'coffee': 'cafes',
+    'restaurant': 'restaurants', 'gym': 'gyms', 'park': 'parks',
+    'grocery': 'grocery', 'pharmacy': 'pharmacies',
+    'transit': 'transit', 'subway': 'transit', 'train': 'transit', 'mbta': 'transit', 'station': 'transit',
+    'school': 'schools'
+}
+
+ADDRESS_PATTERN = re.compile(
+    r'\b(\d+[A-Z]?\s+(?:[A-Za-z]+\s){0,3}?(?:st|street|ave|avenue|rd|road|pl|place|ter|terrace|ct|court|blvd|way|sq|square|dr|drive|ln|lane|pk|park))\b',
+    re.IGNORECASE
+)
+
+
+def types_for_query(query: str) -> List[str]:
+    """Nearby types a question asks about ('cafes near X' -> ['cafes'])"""
+    query_lower = query.lower()
+    return list(dict.fromkeys(t for word, t in QUERY_TYPES.items() if word in query_lower))
+
+
+def extract_address(query: str) -> Optional[str]:
+    match = ADDRESS_PATTERN.search(query)
+    return match.group(1) if match else None
+
+
+class NearbyIndex:
+    """Per-type point layers with radius summaries"""
+
+    def __init__(self, data_path: str = None, layers: Dict[str, PointLayer] = None):
+        layers = dict(layers or {})
+        for name, fields in LAYER_FIELDS.items():
+            if name not in layers:
+                layers[name] = PointLayer.from_processed(name, data_path, fields)
+        self.layers = {name: layer for name, layer in layers.items() if len(layer)}
+
+        # Amenity categories ('cafes', 'parks', ...) are queryable as types too
+        self.categories = set()
+        amenities = self.layers.get('amenities')
+        if amenities is not None and 'category' in amenities.df.columns:
+            self.categories = set(amenities.df['category'].dropna().astype(str).str.lower())
+        logger.info(f"✅ Nearby index ready: { {k: len(v) for k, v in self.layers.items()} }")
+
+    @property
+    def types(self) -> List[str]:
+        return sorted(self.layers) + sorted(self.categories)
+
+    def _summarize(self, name: str, hits: pd.DataFrame, limit: int) -> Dict:
+        items = hits.head(limit).drop(columns=['latitude', 'longitude'])
+        items = items.assign(distance_miles=items['distance_miles'].round(3))
+        summary = {
+            "count": int(len(hits)),
+            "items": items.astype(object).where(items.notna(), None).to_dict('records')
+        }
+        if name == 'crime' and 'offense' in hits.columns:
+            summary["by_offense"] = hits['offense'].value_counts().head(5).to_dict()
+            if 'shooting' in hits.columns:
+                summary["shootings"] = int(pd.to_numeric(hits['shooting'], errors='coerce').fillna(0).gt(0).sum())
+        if name == 'amenities' and 'category' in hits.columns:
+            summary["by_category"] = hits['category'].value_counts().to_dict()
+        return summary
+
+    def nearby(self, lat: float, lon: float, radius: float = DEFAULT_RADIUS_MILES,
+               types: Optional[List[str]] = None, limit: int = 5) -> Dict[str, Dict]:
+        """Counts and nearest items of each requested type within radius miles"""
+        radius = min(radius, MAX_RADIUS_MILES)
+        results = {}
+        for requested in types or list(self.layers):
+            key = requested.lower()
+            if key in self.layers:
+                hits = self.layers[key].within(lat, lon, radius)
+            elif key in self.categories:
+                hits = self.layers['amenities'].within(lat, lon, radius)
+                hits = hits[hits['category'].astype(str).str.lower() == key]
+            else:
+                raise ValueError(f"Unknown type '{requested}'. Available: {', '.join(self.types)}")
+            results[key] = self._summarize(key if key in self.layers else 'amenities', hits, limit)
+        return results
+
+    def describe(self, lat: float, lon: float, radius: float = DEFAULT_RADIUS_MILES,
+                 types: Optional[List[str]] = None) -> str:
+        """Plain-text summary for LLM context"""
+        lines = []
+        for name, summary in self.nearby(lat, lon, radius, types, limit=3).items():
+            line = f"- {name}: {summary['count']} within {radius} mi"
+            if summary.get("by_offense"):
+                line += " (most common: " + ", ".join(f"{k} {v}" for k, v in summary["by_offense"].items()) + ")"
+            names = [f"{item['name']} ({item['distance_miles']} mi)" for item in summary["items"] if item.get('name')]
+            if names:
+                line += "; nearest: " + ", ".join(names)
+            lines.append(line)
+        return "\n".join(lines)
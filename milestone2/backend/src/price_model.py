@@ -0,0 +1,290 @@
+"""
+Trained property price model for /predict-price
+
+A gradient-boosted regressor on log(TOTAL_VALUE) using beds, baths, living
+area, year built and zip code, trained from the cleaned assessment data.
+The artifact is loaded and warmed once at startup; predict_batch() scores
+any number of rows in a single vectorized call.
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processed_data import DATA_PATH, RESULTS_PATH, latest_file, pick_column, read_columns
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = os.getenv('PRICE_MODEL_PATH', os.path.join(RESULTS_PATH, 'price_model.joblib'))
+# Seconds before a failed load is tried again
+RETRY_SECONDS = float(os.getenv('PRICE_MODEL_RETRY_SECONDS', 300))
+
+# model feature -> candidate source columns
+FEATURE_SOURCES = {
+    'bedrooms': ['BED_RMS'],
+    'bathrooms': ['FULL_BTH'],
+    'sqft': ['living_square_feet', 'Building Area'],
+    'year_built': ['year_built', 'Year Built'],
+    'zip_code': ['zip_code', 'ZIPCODE']
+}
+FEATURES = list(FEATURE_SOURCES)
+TARGET_SOURCES = ['TOTAL_VALUE', 'Total Assessed Value']
+NEIGHBORHOOD_SOURCES = ['neighborhood', 'CITY']
+ID_SOURCES = ['property_id', 'PID']
+ADDRESS_SOURCES = ['full_address', 'Location', 'address']
+
+MIN_PRICE = 10000
+
+
+def _normalize_zip(values) -> pd.Series:
+    zips = pd.Series(values, dtype='object').astype('string').str.strip()
+    zips = zips.str.replace(r'\.0$', '', regex=True).str.zfill(5)
+    return zips.where(zips.str.fullmatch(r'\d{5}', na=False))
+
+
+def load_training_data(data_path: str = None) -> pd.DataFrame:
+    """Read the cleaned assessment CSV into canonical model columns"""
+    path = latest_file('properties', data_path or DATA_PATH)
+    if not path:
+        raise FileNotFoundError(f"No processed properties file in {data_path or DATA_PATH}")
+    logger.info(f"📂 Loading training data from {os.path.basename(path)}")
+
+    sources = [c for cands in FEATURE_SOURCES.values() for c in cands]
+    sources += TARGET_SOURCES + NEIGHBORHOOD_SOURCES + ID_SOURCES + ADDRESS_SOURCES
+    raw = read_columns(path, *sources)
+
+    df = pd.DataFrame(index=raw.index)
+    for feature, candidates in FEATURE_SOURCES.items():
+        col = pick_column(raw, *candidates)
+        df[feature] = raw[col] if col else np.nan
+    df['zip_code'] = _normalize_zip(df['zip_code'])
+    hood_col = pick_column(raw, *NEIGHBORHOOD_SOURCES)
+    df['neighborhood'] = raw[hood_col].astype('string').str.strip().str.title() if hood_col else pd.NA
+    df['price'] = pd.to_numeric(raw[pick_column(raw, *TARGET_SOURCES)], errors='coerce')
+    for column, candidates in [('property_id', ID_SOURCES), ('address', ADDRESS_SOURCES)]:
+        col = pick_column(raw, *candidates)
+        df[column] = raw[col].astype('string') if col else pd.NA
+    return df[df['price'] >= MIN_PRICE].reset_index(drop=True)
+
+
+class PriceModel:
+    """Loaded price model artifact with vectorized scoring"""
+
+    def __init__(self, model_path: str = None, retry_seconds: float = RETRY_SECONDS):
+        self.model_path = model_path or MODEL_PATH
+        self.retry_seconds = retry_seconds
+        self._failed_at = None
+        self.model = None
+        self.zip_vocab = {}
+        self.neighborhood_zips = {}
+        self.metadata = {}
+
+    @classmethod
+    def train(cls, df: pd.DataFrame, random_state: int = 42) -> 'PriceModel':
+        """Fit on canonical columns (see load_training_data)"""
+        instance = cls()
+        zips = df['zip_code'].dropna()
+        instance.zip_vocab = {z: i for i, z in enumerate(sorted(zips.unique()))}
+        if 'neighborhood' in df.columns:
+            known = df.dropna(subset=['neighborhood', 'zip_code'])
+            instance.neighborhood_zips = {
+                hood.lower(): group.mode().iloc[0]
+                for hood, group in known.groupby('neighborhood')['zip_code']
+            }
+
+        X = instance._matrix(df)
+        y = np.log(df['price'].to_numpy(dtype=float))
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=random_state)
+
+        instance.model = HistGradientBoostingRegressor(
+            max_iter=300, learning_rate=0.08, categorical_features=[FEATURES.index('zip_code')],
+            random_state=random_state
+        )
+        instance.model.fit(X_train, y_train)
+
+        residuals = y_test - instance.model.predict(X_test)
+        actual, predicted = np.exp(y_test), np.exp(y_test - residuals)
+        instance.metadata = {
+            'version': datetime.now().strftime("%Y%m%d_%H%M%S"),
+            'trained_at': datetime.now().isoformat(),
+            'features': FEATURES,
+            'training_rows': int(len(X_train)),
+            'test_rows': int(len(X_test)),
+            'metrics': {
+                'mae': round(float(np.mean(np.abs(actual - predicted))), 2),
+                'mape': round(float(np.mean(np.abs(actual - predicted) / actual)), 4),
+                'r2_log': round(float(1 - np.var(residuals) / np.var(y_test)), 4)
+            },
+            # log-space residual quantiles give an 80% prediction interval
+            'interval': [float(np.quantile(residuals, 0.1)), float(np.quantile(residuals, 0.9))]
+        }
+        logger.info(f"✅ Price model trained: {instance.metadata['metrics']}")
+        return instance
+
+    def _matrix(self, df: pd.DataFrame) -> np.ndarray:
+        """Canonical columns -> float feature matrix (unknown zips become NaN)"""
+        X = np.empty((len(df), len(FEATURES)), dtype=np.float64)
+        for j, feature in enumerate(FEATURES[:-1]):
+            X[:, j] = pd.to_numeric(df[feature], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        zips = df['zip_code'].map(self.zip_vocab)
+        X[:, -1] = pd.to_numeric(zips, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        return X
+
+    def _frame(self, rows: Iterable[Dict]) -> pd.DataFrame:
+        df = pd.DataFrame(list(rows), columns=FEATURES + ['neighborhood'])
+        df['zip_code'] = _normalize_zip(df['zip_code'])
+        if self.neighborhood_zips:
+            hood_zips = df['neighborhood'].astype('string').str.strip().str.lower().map(self.neighborhood_zips)
+            df['zip_code'] = df['zip_code'].fillna(hood_zips)
+        return df
+
+    def predict_batch(self, rows: Iterable[Dict]) -> Dict[str, np.ndarray]:
+        """Score many inputs at once -> arrays of price, low and high"""
+        if self.model is None:
+            self.load()
+        log_price = self.model.predict(self._matrix(self._frame(rows)))
+        low, high = self.metadata.get('interval', [-0.1, 0.1])
+        return {
+            'price': np.exp(log_price),
+            'low': np.exp(log_price + low),
+            'high': np.exp(log_price + high)
+        }
+
+    def predict_frame(self, df: pd.DataFrame) -> np.ndarray:
+        """Predicted price for a frame already in canonical columns"""
+        if self.model is None:
+            self.load()
+        return np.exp(self.model.predict(self._matrix(df)))
+
+    def predict(self, row: Dict) -> Dict[str, float]:
+        result = self.predict_batch([row])
+        return {key: float(values[0]) for key, values in result.items()}
+
+    @property
+    def version(self) -> str:
+        return self.metadata.get('version')
+
+    @property
+    def available(self) -> bool:
+        if self.model is None:
+            # A missing artifact is not re-read (or re-logged) on every request
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+                return False
+            try:
+                self.load()
+            # Missing, truncated, or written by an incompatible version of this module or sklearn
+            except (OSError, ValueError, EOFError, KeyError, AttributeError, ImportError,
+                    pickle.UnpicklingError) as e:
+                self._failed_at = time.monotonic()
+                logger.warning(f"⚠️  Price model unavailable ({e}), retrying in {self.retry_seconds:g}s")
+                return False
+            self._failed_at = None
+        return True
+
+    def save(self, path: str = None) -> str:
+        path = path or self.model_path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        joblib.dump({
+            'model': self.model,
+            'zip_vocab': self.zip_vocab,
+            'neighborhood_zips': self.neighborhood_zips,
+            'metadata': self.metadata
+        }, tmp_path)
+        os.replace(tmp_path, path)
+
+        # Sidecar metadata is what the model registry packages
+        with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+            json.dump(self.metadata, f, indent=2)
+        logger.info(f"✅ Price model saved: {path} (version {self.version})")
+        return path
+
+    def load(self) -> 'PriceModel':
+        artifact = joblib.load(self.model_path)
+        self.model = artifact['model']
+        self.zip_vocab = artifact['zip_vocab']
+        self.neighborhood_zips = artifact['neighborhood_zips']
+        self.metadata = artifact['metadata']
+        return self
+
+    def warm(self) -> bool:
+        """Load the artifact and run one prediction so the first request is fast"""
+        if not self.available:
+            return False
+        self.predict({'bedrooms': 3, 'bathrooms': 2, 'sqft': 1500, 'year_built': 1950, 'zip_code': '02116'})
+        logger.info(f"✅ Price model warmed (version {self.version})")
+        return True
+
+
+def benchmark(model_path: str = None, batch_size: int = 10000, repeats: int = 200) -> Dict:
+    """Measure load time, single-row latency and batch throughput"""
+    model_path = model_path or MODEL_PATH
+
+    start = time.perf_counter()
+    model = PriceModel(model_path).load()
+    load_seconds = time.perf_counter() - start
+
+    row = {'bedrooms': 3, 'bathrooms': 2, 'sqft': 1500, 'year_built': 1950, 'zip_code': '02116'}
+    model.predict(row)
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        latencies.append(time.perf_counter() - start)
+
+    rng = np.random.default_rng(0)
+    zips = list(model.zip_vocab) or ['02116']
+    rows = [
+        {'bedrooms': int(b), 'bathrooms': int(ba), 'sqft': int(s), 'year_built': int(y), 'zip_code': zips[z]}
+        for b, ba, s, y, z in zip(
+            rng.integers(1, 6, batch_size), rng.integers(1, 4, batch_size), rng.integers(500, 4000, batch_size),
+            rng.integers(1850, 2024, batch_size), rng.integers(0, len(zips), batch_size)
+        )
+    ]
+    start = time.perf_counter()
+    model.predict_batch(rows)
+    batch_seconds = time.perf_counter() - start
+
+    results = {
+        'version': model.version,
+        'load_ms': round(load_seconds * 1000, 2),
+        'single_row_p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'single_row_p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 3),
+        'batch_size': batch_size,
+        'batch_ms': round(batch_seconds * 1000, 2),
+        'rows_per_second': int(batch_size / batch_seconds)
+    }
+
+    benchmark_path = os.path.splitext(model_path)[0] + '_benchmark.json'
+    with open(benchmark_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"⏱️  Benchmark saved: {benchmark_path}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the property price model")
+    parser.add_argument('--data-path', default=DATA_PATH)
+    parser.add_argument('--output', default=MODEL_PATH)
+    parser.add_argument('--benchmark-only', action='store_true', help='Benchmark the existing artifact')
+    args = parser.parse_args()
+
+    if not args.benchmark_only:
+        PriceModel.train(load_training_data(args.data_path)).save(args.output)
+    print("\n⏱️  PRICE MODEL BENCHMARK:")
+    print(json.dumps(benchmark(args.output), indent=2))
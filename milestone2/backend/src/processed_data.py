@@ -0,0 +1,41 @@
+"""
+Helpers for locating and reading the processed Milestone 1 datasets
+"""
+
+import os
+import glob
+from typing import Optional
+
+import pandas as pd
+
+DATA_PATH = os.getenv('DATA_PATH', '../data/processed/Boston')
+RESULTS_PATH = os.getenv('RESULTS_PATH', 'results')
+
+
+def latest_file(keyword: str, data_path: str = None, extension: str = 'csv') -> Optional[str]:
+    """Return the newest processed file whose name contains keyword"""
+    data_path = data_path or DATA_PATH
+    matches = [
+        f for f in glob.glob(os.path.join(data_path, f'*.{extension}'))
+        if keyword.lower() in os.path.basename(f).lower()
+    ]
+    if not matches:
+        return None
+    return max(matches, key=os.path.getmtime)
+
+
+def pick_column(df: pd.DataFrame, *candidates: str) -> Optional[str]:
+    """Return the first candidate column present in df (case-insensitive)"""
+    lookup = {c.lower(): c for c in df.columns}
+    for name in candidates:
+        if name.lower() in lookup:
+            return lookup[name.lower()]
+    return None
+
+
+def read_columns(path: str, *candidates: str, **kwargs) -> pd.DataFrame:
+    """Read only the candidate columns that exist in the CSV header"""
+    header = pd.read_csv(path, nrows=0).columns
+    lookup = {c.lower(): c for c in header}
+    usecols = [lookup[c.lower()] for c in candidates if c.lower() in lookup]
+    return pd.read_csv(path, usecols=usecols, low_memory=False, **kwargs)
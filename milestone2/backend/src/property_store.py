@@ -0,0 +1,273 @@
+"""
+Canonical property store keyed by property_id
+
+Built once at ingest time from the cleaned assessment CSV into a columnar file.
+The API hydrates property details in batches through get_properties(ids),
+backed by an in-process read-through LRU cache, instead of parsing document
+text or guessing fields such as sqft.
+"""
+
+import os
+import sys
+import argparse
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processed_data import DATA_PATH, RESULTS_PATH, latest_file, pick_column
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STORE_PATH = os.getenv('PROPERTY_STORE_PATH', os.path.join(RESULTS_PATH, 'property_store.parquet'))
+
+# canonical field -> candidate source columns
+FIELD_SOURCES = {
+    'address': ['full_address', 'Location', 'address'],
+    'neighborhood': ['neighborhood', 'CITY'],
+    'zip_code': ['zip_code', 'ZIPCODE'],
+    'property_type': ['LU_DESC', 'Building Class Description'],
+    'price': ['TOTAL_VALUE', 'Total Assessed Value'],
+    'land_value': ['LAND_VALUE'],
+    'building_value': ['BLDG_VALUE'],
+    'bedrooms': ['BED_RMS'],
+    'bathrooms': ['FULL_BTH'],
+    'half_bathrooms': ['HLF_BTH'],
+    'sqft': ['living_square_feet', 'Building Area'],
+    'year_built': ['year_built', 'Year Built'],
+    'parking': ['NUM_PARKING'],
+    'latitude': ['latitude', 'Lat'],
+    'longitude': ['longitude', 'Long'],
+    'geocode_precision': ['geocode_precision']
+}
+NUMERIC_FIELDS = {'price', 'land_value', 'building_value', 'bedrooms', 'bathrooms',
+                  'half_bathrooms', 'sqft', 'year_built', 'parking', 'latitude', 'longitude'}
+INTEGER_FIELDS = {'bedrooms', 'bathrooms', 'half_bathrooms', 'sqft', 'year_built', 'parking'}
+
+
+def normalize_property_id(value) -> Optional[str]:
+    """Canonical string form ('100001000.0' and 100001000 both -> '100001000')"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    text = str(value).strip()
+    if text.endswith('.0') and text[:-2].isdigit():
+        return text[:-2]
+    return text or None
+
+
+def normalize_address(address: str) -> str:
+    """Street part of an address, upper-cased with single spaces ('1 Main St, Boston' -> '1 MAIN ST')"""
+    return ' '.join(str(address).split(',')[0].upper().split())
+
+
+def build_property_store(data_path: str = None, output_path: str = None) -> int:
+    """Build the canonical store from the cleaned assessment CSV"""
+    data_path = data_path or DATA_PATH
+    output_path = output_path or STORE_PATH
+
+    source = latest_file('properties', data_path)
+    if not source:
+        raise FileNotFoundError(f"No processed properties file in {data_path}")
+    logger.info(f"🏠 Building property store from {os.path.basename(source)}")
+
+    raw = pd.read_csv(source, low_memory=False)
+    id_col = pick_column(raw, 'property_id', 'PID', 'Parcel ID')
+
+    store = pd.DataFrame({'property_id': raw[id_col].map(normalize_property_id)})
+    for field, candidates in FIELD_SOURCES.items():
+        col = pick_column(raw, *candidates)
+        if col is None:
+            continue
+        values = raw[col]
+        if field in NUMERIC_FIELDS:
+            values = pd.to_numeric(values, errors='coerce')
+            if field in INTEGER_FIELDS:
+                values = values.round().astype('Int64')
+        elif field == 'zip_code':
+            values = values.map(normalize_property_id).str.zfill(5)
+        else:
+            values = values.astype('string').str.strip()
+        store[field] = values
+
+    store = store.dropna(subset=['property_id']).drop_duplicates('property_id', keep='last')
+    store = _geocode_missing(store, data_path, os.path.join(os.path.dirname(output_path), 'geocoder_index.parquet'))
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    store.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+
+    logger.info(f"✅ Property store saved: {output_path} ({len(store)} properties)")
+    return len(store)
+
+
+def _geocode_missing(store: pd.DataFrame, data_path: str, index_path: str) -> pd.DataFrame:
+    """Fill missing coordinates from the offline geocoder in one batch"""
+    from src.geocoder import EXACT_PRECISIONS, Geocoder
+
+    for field in ['latitude', 'longitude']:
+        if field not in store.columns:
+            store[field] = np.nan
+    if 'geocode_precision' in store.columns:
+        # Street/ZIP centroids from an enriched source are geocoded (and labelled) again, not taken as 'source'
+        coarse = store['geocode_precision'].notna() & ~store['geocode_precision'].isin(EXACT_PRECISIONS)
+        store.loc[coarse, ['latitude', 'longitude']] = np.nan
+    store['geocode_precision'] = pd.Series(np.where(store['latitude'].notna(), 'source', None),
+                                           index=store.index, dtype='string')
+    missing = store['latitude'].isna() | store['longitude'].isna()
+    if missing.any() and 'address' in store.columns:
+        coded = Geocoder(index_path, data_path, build=True).geocode_frame(
+            store.loc[missing, 'address'], store.loc[missing, 'zip_code'] if 'zip_code' in store.columns else None
+        )
+        coded.index = store.index[missing]
+        store.loc[missing, ['latitude', 'longitude']] = coded[['latitude', 'longitude']].to_numpy(dtype=float)
+        store.loc[missing, 'geocode_precision'] = coded['precision'].astype('string')
+        logger.info(f"🗺️  Geocoded {int(coded['latitude'].notna().sum())}/{int(missing.sum())} properties "
+                    f"({coded['precision'].value_counts().to_dict()})")
+    return store
+
+
+def _clean_record(record: Dict) -> Dict:
+    """Convert pandas/numpy scalars to JSON-friendly Python values"""
+    cleaned = {}
+    for key, value in record.items():
+        if value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+            cleaned[key] = None
+        elif isinstance(value, np.generic):
+            cleaned[key] = value.item()
+        else:
+            cleaned[key] = value
+    return cleaned
+
+
+class PropertyStore:
+    """In-memory property table with a read-through LRU cache of hydrated records"""
+
+    def __init__(self, store_path: str = None, cache_size: int = 20000):
+        self.store_path = store_path or STORE_PATH
+        self.cache_size = cache_size
+        self._frame = None
+        self._cache = OrderedDict()
+        self._addresses = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> pd.DataFrame:
+        if self._frame is None:
+            with self._lock:
+                if self._frame is None:
+                    try:
+                        frame = pd.read_parquet(self.store_path)
+                        self._frame = frame.set_index('property_id', drop=False)
+                        logger.info(f"✅ Property store loaded: {len(frame)} properties")
+                    except (OSError, ValueError, ImportError) as e:
+                        logger.warning(f"⚠️  Property store unavailable ({e})")
+                        self._frame = pd.DataFrame(columns=['property_id']).set_index('property_id', drop=False)
+        return self._frame
+
+    @property
+    def available(self) -> bool:
+        return len(self._load()) > 0
+
+    def __len__(self):
+        return len(self._load())
+
+    def get_properties(self, property_ids: Iterable) -> Dict[str, Dict]:
+        """Fetch many records in one call; unknown ids are simply absent"""
+        ids = [pid for pid in dict.fromkeys(normalize_property_id(p) for p in property_ids) if pid]
+        found, missing = {}, []
+
+        with self._lock:
+            for pid in ids:
+                record = self._cache.get(pid)
+                if record is None:
+                    missing.append(pid)
+                else:
+                    self._cache.move_to_end(pid)
+                    found[pid] = record
+        self.hits += len(found)
+        self.misses += len(missing)
+
+        if missing:
+            frame = self._load()
+            rows = frame.loc[frame.index.intersection(missing)]
+            loaded = {rec['property_id']: _clean_record(rec) for rec in rows.to_dict('records')}
+            with self._lock:
+                for pid, record in loaded.items():
+                    self._cache[pid] = record
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            found.update(loaded)
+
+        return {pid: found[pid] for pid in ids if pid in found}
+
+    def get_property(self, property_id) -> Optional[Dict]:
+        pid = normalize_property_id(property_id)
+        return self.get_properties([pid]).get(pid)
+
+    def locate(self, address: str) -> Optional[Tuple[float, float]]:
+        """Coordinates of a known property address, or None"""
+        if self._addresses is None:
+            frame = self._load()
+            if {'address', 'latitude', 'longitude'} <= set(frame.columns):
+                located = frame.dropna(subset=['address', 'latitude', 'longitude'])
+                if 'geocode_precision' in located.columns:
+                    # ZIP centroids are too coarse to stand in for an address
+                    located = located[located['geocode_precision'] != 'zip']
+                self._addresses = {
+                    normalize_address(a): (float(lat), float(lon))
+                    for a, lat, lon in zip(located['address'], located['latitude'], located['longitude'])
+                }
+            else:
+                self._addresses = {}
+        return self._addresses.get(normalize_address(address))
+
+    def invalidate(self, property_ids: Iterable = None):
+        """Drop cached records (all of them, or only the given ids)"""
+        with self._lock:
+            if property_ids is None:
+                self._cache.clear()
+            else:
+                for pid in property_ids:
+                    self._cache.pop(normalize_property_id(pid), None)
+
+    def reload(self):
+        with self._lock:
+            self._frame = None
+            self._addresses = None
+            self._cache.clear()
+        self._load()
+
+
+_default_store = None
+
+
+def get_default_store() -> PropertyStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = PropertyStore()
+    return _default_store
+
+
+def get_properties(property_ids: Iterable) -> Dict[str, Dict]:
+    """Batch hydration through the process-wide store"""
+    return get_default_store().get_properties(property_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the canonical property store")
+    parser.add_argument('--data-path', default=DATA_PATH)
+    parser.add_argument('--output', default=STORE_PATH)
+    args = parser.parse_args()
+
+    count = build_property_store(args.data_path, args.output)
+    print(f"\n🏠 Property store: {count} properties")
@@ -4,13 +4,19 @@ COMPLETE Enhanced RAG Pipeline - Multi-Collection Smart Search
 
 import os
 import chromadb 
-from sentence_transformers import SentenceTransformer
 from openai import OpenAI
 from dotenv import load_dotenv
 import logging
 from typing import List, Dict
 import re
 
+from src.property_store import normalize_property_id
+from src.nearby import extract_address, types_for_query
+from src.trending import detect_neighborhoods
+from src.crime_cube import district_for
+from src.collection_aliases import CollectionAliases
+from src.embeddings import check_collection, get_provider
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -18,23 +24,39 @@ load_dotenv()
 class PropBotRAG:
     """Enhanced RAG with multi-collection search and conversation memory"""
     
-    def __init__(self):
+    def __init__(self, property_store=None, nearby=None, crime_grid=None, crime_cube=None, client=None):
         logger.info("🔧 Initializing Enhanced RAG Pipeline...")
         
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.property_store = property_store
+        self.nearby = nearby
+        self.crime_grid = crime_grid
+        self.crime_cube = crime_cube
+        
+        # Queries are embedded with the registry's provider; collections built with another model are refused
+        self.embedder = get_provider()
+        self.checked = set()
         self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.chroma_client = chromadb.PersistentClient(path="./chroma_db")        
+        self.chroma_client = client or chromadb.PersistentClient(path="./chroma_db")
         try:
-            collections = self.chroma_client.list_collections()
-            self.collection_names = [c.name for c in collections]
-            self.collection = self.chroma_client.get_collection("properties")
+            # Logical names: rebuilt collections are read through their alias, never while half-built
+            self.aliases = CollectionAliases(self.chroma_client)
+            self.collection_names = self.aliases.logical_names()
+            logger.info(f"✅ Properties served from {self.collection.name}")
             logger.info(f"✅ Found {len(self.collection_names)} collections")
         except Exception as e:
             logger.error(f"❌ Failed to load collections: {e}")
+            self.aliases = None
             self.collection_names = []
         
         self.conversation_memory = {}
     
+    @property
+    def collection(self):
+        """Live properties collection, resolved through the alias table on every access"""
+        if self.aliases is None:
+            raise RuntimeError("ChromaDB collections unavailable")
+        return self.chroma_client.get_collection(self.aliases.resolve("properties"))
+    
     def parse_property_document(self, doc_text: str) -> dict:
         """Parse: '104 PUTNAM ST, Boston, MA 02128. THREE-FAM DWELLING. 6. 3. 719,400'"""
         try:
@@ -60,6 +82,63 @@ class PropBotRAG:
         
         return {'address': None, 'type': None, 'beds': None, 'baths': None, 'price': None}
     
+    def hydrate_results(self, results: List[Dict]) -> Dict[str, Dict]:
+        """Batch-fetch canonical records for results that carry a property_id"""
+        for doc in results:
+            doc['property_id'] = normalize_property_id((doc.get('metadata') or {}).get('property_id'))
+        ids = [doc['property_id'] for doc in results if doc['property_id']]
+        if not ids or self.property_store is None:
+            return {}
+        return self.property_store.get_properties(ids)
+    
+    def resolve_location(self, query: str, records: List[Dict]):
+        """(label, (lat, lon)) for an address named in the question, else the best-matching property"""
+        address = extract_address(query)
+        if address and self.property_store is not None:
+            coords = self.property_store.locate(address)
+            if coords:
+                return address, coords
+        for record in records:
+            if record.get('latitude') is not None and record.get('longitude') is not None:
+                return record.get('address'), (record['latitude'], record['longitude'])
+        return None, None
+    
+    def nearby_context(self, query: str, records: List[Dict]) -> str:
+        """Geographic context for 'X near Y' / 'how safe is Y' questions"""
+        types = types_for_query(query)
+        wants_nearby = self.nearby is not None and any(t in self.nearby.types for t in types)
+        wants_safety = self.crime_grid is not None and self.crime_grid.available and 'crime' in types
+        if not (wants_nearby or wants_safety):
+            return ""
+        
+        label, coords = self.resolve_location(query, records)
+        if not coords:
+            return ""
+        
+        lines = []
+        if wants_safety:
+            safety = self.crime_grid.describe(*coords)
+            if safety:
+                lines.append(f"- safety: {safety}")
+        if wants_nearby:
+            summary = self.nearby.describe(*coords, types=[t for t in types if t in self.nearby.types])
+            if summary:
+                lines.append(summary)
+        return f"\nNearby {label}:\n" + "\n".join(lines) if lines else ""
+    
+    def crime_stats_context(self, query: str) -> str:
+        """Exact incident counts and trends from the crime cube for crime questions"""
+        if self.crime_cube is None or not self.crime_cube.available or 'crime' not in types_for_query(query):
+            return ""
+        hoods = detect_neighborhoods(query)
+        if not hoods:
+            return "\nCrime statistics:\n- " + self.crime_cube.describe()
+        lines = [
+            self.crime_cube.describe(hood, label=f"{hood} (district {district_for(hood)})")
+            for hood in hoods[:3]
+        ]
+        return "\nCrime statistics:\n" + "\n".join(f"- {line}" for line in lines if line)
+    
     def get_relevant_collections(self, query: str) -> List[str]:
         """Select collections based on query intent"""
         query_lower = query.lower()
@@ -103,13 +182,19 @@ class PropBotRAG:
     
     def retrieve_documents(self, query: str, collection_name: str = None, k: int = 5) -> List[Dict]:
         """Retrieve from ChromaDB"""
-        query_embedding = self.embedding_model.encode(query).tolist()
+        query_embedding = self.embedder.encode([query])[0].tolist()
         all_results = []
         collections_to_search = [collection_name] if collection_name else self.collection_names
+        # Resolved per request so an alias switch takes effect without a restart
+        targets = self.aliases.aliases() if self.aliases else {}
         
         for coll_name in collections_to_search:
             try:
-                collection = self.chroma_client.get_collection(coll_name)
+                collection = self.chroma_client.get_collection(targets.get(coll_name, coll_name))
+                if collection.name not in self.checked:
+                    # Raises EmbeddingMismatch (logged and skipped below) for another model's vectors
+                    check_collection(collection, self.embedder)
+                    self.checked.add(collection.name)
                 results = collection.query(
                     query_embeddings=[query_embedding],
                     n_results=k
@@ -183,10 +268,21 @@ class PropBotRAG:
             all_results.sort(key=lambda x: x['distance'])
             top_results = all_results[:10]
             
-            # ✅ PARSE PROPERTIES
+            # ✅ HYDRATE PROPERTIES (canonical store first, document text as fallback)
+            hydrated = self.hydrate_results(top_results)
             parsed_props = []
             for doc in top_results:
-                parsed = self.parse_property_document(doc['document'])
+                record = hydrated.get(doc['property_id'])
+                if record:
+                    parsed = {
+                        'address': record.get('address'),
+                        'type': record.get('property_type'),
+                        'beds': record.get('bedrooms'),
+                        'baths': record.get('bathrooms'),
+                        'price': record.get('price')
+                    }
+                else:
+                    parsed = self.parse_property_document(doc['document'])
                 if parsed['address'] or parsed['price']:
                     parsed['collection'] = doc['collection']
                     parsed['distance'] = doc['distance']
@@ -205,6 +301,15 @@ class PropBotRAG:
             # Add current query
             context_parts.append(f"\nCurrent question: {query}")
             
+            # Add geographic context (real distances, not semantically similar rows)
+            records = [hydrated[d['property_id']] for d in top_results if d['property_id'] in hydrated]
+            geo_context = self.nearby_context(query, records)
+            if geo_context:
+                context_parts.append(geo_context)
+            crime_stats = self.crime_stats_context(query)
+            if crime_stats:
+                context_parts.append(crime_stats)
+            
             # Add property data
             if parsed_props:
                 context_parts.append("\nRelevant Data Found:")
@@ -305,7 +410,9 @@ Remember: You're helpful and human-like, not robotic!"""
                 sources.append({
                     "collection": doc['collection'],
                     "relevance": round(relevance, 1),
-                    "snippet": doc['document'][:150]
+                    "snippet": doc['document'][:150],
+                    "property_id": doc['property_id'],
+                    "property": hydrated.get(doc['property_id'])
                 })
             
             logger.info(f"✅ Response with {len(sources)} sources")
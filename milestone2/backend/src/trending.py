@@ -0,0 +1,341 @@
+"""
+Streaming heavy-hitter tracking for trending neighborhoods and queries
+
+Each window (hour/day/week) keeps a Space-Saving summary with exponentially
+time-decayed counts. Decay uses a forward-decay landmark so an update is a single
+dict operation, and summaries from different worker processes can be merged
+(counts are rescaled to a common landmark and summed).
+
+With TRENDING_SHARE_DIR set, each worker publishes its summaries every
+publish_every events and on a timer (also refreshing the file while idle),
+and merges its peers' files, re-reading only those that changed. Files not
+refreshed within the peer TTL belong to dead workers and are removed.
+
+    TRENDING_PUBLISH_SECONDS   publish / heartbeat interval (default 10)
+    TRENDING_PEER_TTL          seconds before a silent peer is dropped (default 300)
+    TRENDING_PEER_SCAN_SECONDS rescan peers at most this often (default 2)
+"""
+
+import os
+import re
+import json
+import math
+import heapq
+import glob
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WINDOWS = {
+    'hour': 3600,
+    'day': 86400,
+    'week': 604800
+}
+
+BOSTON_NEIGHBORHOODS = [
+    'Allston', 'Back Bay', 'Bay Village', 'Beacon Hill', 'Brighton', 'Charlestown',
+    'Chinatown', 'Dorchester', 'Downtown', 'East Boston', 'Fenway', 'Hyde Park',
+    'Jamaica Plain', 'Leather District', 'Longwood', 'Mattapan', 'Mission Hill',
+    'North End', 'Roslindale', 'Roxbury', 'Seaport', 'South Boston', 'South End',
+    'West End', 'West Roxbury'
+]
+
+_NEIGHBORHOOD_PATTERN = re.compile(
+    r'\b(' + '|'.join(re.escape(n.lower()) for n in sorted(BOSTON_NEIGHBORHOODS, key=len, reverse=True)) + r')\b'
+)
+_NEIGHBORHOOD_NAMES = {n.lower(): n for n in BOSTON_NEIGHBORHOODS}
+
+# Rescale stored counts before exp() overflows
+_MAX_EXPONENT = 50.0
+
+PUBLISH_SECONDS = float(os.getenv('TRENDING_PUBLISH_SECONDS', 10))
+PEER_TTL = float(os.getenv('TRENDING_PEER_TTL', 300))
+PEER_SCAN_SECONDS = float(os.getenv('TRENDING_PEER_SCAN_SECONDS', 2))
+
+
+def normalize_query(query: str) -> str:
+    """Collapse case and whitespace so equivalent queries share a counter"""
+    return ' '.join(re.sub(r'[^\w\s$]', ' ', query.lower()).split())[:120]
+
+
+def detect_neighborhoods(text: str) -> List[str]:
+    """Find known Boston neighborhood names in free text"""
+    return list(dict.fromkeys(_NEIGHBORHOOD_NAMES[m] for m in _NEIGHBORHOOD_PATTERN.findall(text.lower())))
+
+
+class SpaceSaving:
+    """Space-Saving top-k summary with forward exponential decay
+
+    Stores at most `capacity` counters. Counts are kept relative to `landmark`,
+    i.e. an event at time t adds exp((t - landmark) / tau); dividing by
+    exp((now - landmark) / tau) gives the decayed count at query time.
+    """
+
+    def __init__(self, capacity: int = 100, tau: Optional[float] = None, landmark: Optional[float] = None):
+        self.capacity = capacity
+        self.tau = tau
+        self.landmark = time.time() if landmark is None else landmark
+        self.counts: Dict[str, float] = {}
+        self.errors: Dict[str, float] = {}
+
+    def _weight(self, timestamp: float) -> float:
+        if not self.tau:
+            return 1.0
+        exponent = (timestamp - self.landmark) / self.tau
+        if exponent > _MAX_EXPONENT:
+            self._rescale(timestamp)
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def _rescale(self, new_landmark: float):
+        """Move the landmark forward, shrinking all stored counts"""
+        factor = math.exp((self.landmark - new_landmark) / self.tau) if self.tau else 1.0
+        self.counts = {k: v * factor for k, v in self.counts.items()}
+        self.errors = {k: v * factor for k, v in self.errors.items()}
+        self.landmark = new_landmark
+
+    def offer(self, item: str, weight: float = 1.0, timestamp: Optional[float] = None):
+        """Count one occurrence of item"""
+        increment = weight * self._weight(time.time() if timestamp is None else timestamp)
+
+        if item in self.counts:
+            self.counts[item] += increment
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = increment
+            self.errors[item] = 0.0
+        else:
+            # Replace the smallest counter; its count becomes the new item's error bound
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            self.errors.pop(victim, None)
+            self.counts[item] = floor + increment
+            self.errors[item] = floor
+
+    def top(self, k: int = 10, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Return the k heaviest items with their decayed counts"""
+        scale = 1.0
+        if self.tau:
+            scale = math.exp(-((time.time() if now is None else now) - self.landmark) / self.tau)
+        return [(item, count * scale) for item, count in heapq.nlargest(k, self.counts.items(), key=lambda x: x[1])]
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Merge another summary into this one (mergeable summaries construction)"""
+        if other.tau != self.tau:
+            raise ValueError("Cannot merge summaries with different decay constants")
+
+        landmark = max(self.landmark, other.landmark)
+        if self.landmark != landmark:
+            self._rescale(landmark)
+        other_factor = math.exp((other.landmark - landmark) / self.tau) if self.tau else 1.0
+
+        # Items missing from a full summary may have been counted up to its minimum
+        self_floor = min(self.counts.values()) if len(self.counts) >= self.capacity else 0.0
+        other_floor = min(other.counts.values()) * other_factor if len(other.counts) >= other.capacity else 0.0
+
+        merged_counts, merged_errors = {}, {}
+        for item in set(self.counts) | set(other.counts):
+            mine = self.counts.get(item)
+            theirs = other.counts.get(item)
+            theirs = theirs * other_factor if theirs is not None else None
+            merged_counts[item] = (mine if mine is not None else self_floor) + (theirs if theirs is not None else other_floor)
+            merged_errors[item] = (
+                (self.errors.get(item, 0.0) if mine is not None else self_floor) +
+                (other.errors.get(item, 0.0) * other_factor if theirs is not None else other_floor)
+            )
+
+        keep = heapq.nlargest(self.capacity, merged_counts.items(), key=lambda x: x[1])
+        self.counts = dict(keep)
+        self.errors = {item: merged_errors[item] for item in self.counts}
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            'capacity': self.capacity,
+            'tau': self.tau,
+            'landmark': self.landmark,
+            # Copies, so a snapshot taken under the tracker's lock stays consistent after it is released
+            'counts': dict(self.counts),
+            'errors': dict(self.errors)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SpaceSaving':
+        summary = cls(data['capacity'], data['tau'], data['landmark'])
+        summary.counts = dict(data['counts'])
+        summary.errors = dict(data['errors'])
+        return summary
+
+
+class TrendingTracker:
+    """Time-windowed trending neighborhoods and queries, shareable across workers"""
+
+    KEYS = ('neighborhoods', 'queries')
+
+    def __init__(self, capacity: int = 100, windows: Dict[str, int] = None,
+                 share_dir: Optional[str] = None, publish_every: int = 50,
+                 publish_seconds: float = PUBLISH_SECONDS, peer_ttl: float = PEER_TTL,
+                 peer_scan_seconds: float = PEER_SCAN_SECONDS):
+        self.capacity = capacity
+        self.windows = windows or WINDOWS
+        self.share_dir = share_dir or os.getenv('TRENDING_SHARE_DIR')
+        self.publish_every = publish_every
+        self.publish_seconds = publish_seconds
+        self.peer_ttl = peer_ttl
+        self.peer_scan_seconds = peer_scan_seconds
+        self.version = 0
+        self._published_version = 0
+        self._lock = threading.Lock()
+        now = time.time()
+        self.sketches = {
+            key: {name: SpaceSaving(capacity, tau, now) for name, tau in self.windows.items()}
+            for key in self.KEYS
+        }
+        # path -> (mtime, parsed summaries) of peer files, and merged sketches per (key, window)
+        self._peer_lock = threading.Lock()
+        self._peer_files: Dict[str, Tuple[float, Dict]] = {}
+        self._peers_scanned = 0.0
+        self.peers_version = 0
+        self._merged: Dict[Tuple[str, str], Tuple[Tuple[int, int], SpaceSaving]] = {}
+        self._stop = threading.Event()
+        if self.share_dir:
+            threading.Thread(target=self._publish_loop, name='trending-publisher', daemon=True).start()
+
+    def record(self, key: str, item: str, timestamp: Optional[float] = None):
+        """Count one occurrence of item in every window"""
+        if not item:
+            return
+        with self._lock:
+            for sketch in self.sketches[key].values():
+                sketch.offer(item, timestamp=timestamp)
+            self.version += 1
+        if self.share_dir and self.version % self.publish_every == 0:
+            self.publish()
+
+    def record_search(self, neighborhood: Optional[str], query: Optional[str] = None):
+        if neighborhood:
+            self.record('neighborhoods', neighborhood.strip().title())
+        if query:
+            self.record('queries', normalize_query(query))
+
+    def record_chat(self, query: str):
+        for neighborhood in detect_neighborhoods(query):
+            self.record('neighborhoods', neighborhood)
+        self.record('queries', normalize_query(query))
+
+    def top(self, key: str, window: str = 'day', k: int = 10, include_peers: bool = False) -> List[Dict]:
+        """Top-k items for a window as [{'name', 'score'}]"""
+        if window not in self.windows:
+            raise ValueError(f"Unknown window '{window}', expected one of {list(self.windows)}")
+        if include_peers and self.share_dir:
+            # A private merged copy, never mutated once built
+            items = self._merged_with_peers(key, window).top(k)
+        else:
+            with self._lock:
+                items = self.sketches[key][window].top(k)
+        return [{'name': item, 'score': round(score, 3)} for item, score in items]
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                key: {name: sketch.to_dict() for name, sketch in windows.items()}
+                for key, windows in self.sketches.items()
+            }
+
+    @property
+    def _own_path(self) -> str:
+        return os.path.join(self.share_dir, f'trending_{os.getpid()}.json')
+
+    def publish(self):
+        """Write this worker's summaries so other workers can merge them"""
+        if not self.share_dir:
+            return
+        os.makedirs(self.share_dir, exist_ok=True)
+        version = self.version
+        tmp_path = self._own_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, self._own_path)
+        self._published_version = version
+
+    def _publish_loop(self):
+        """Publish unpublished events every publish_seconds; otherwise refresh the file so peers keep it"""
+        while not self._stop.wait(self.publish_seconds):
+            try:
+                if self.version != self._published_version or not os.path.exists(self._own_path):
+                    self.publish()
+                else:
+                    os.utime(self._own_path)
+            except OSError as e:
+                logger.warning(f"⚠️  Could not publish trending summaries: {e}")
+
+    def close(self):
+        """Stop the publisher and remove this worker's file"""
+        self._stop.set()
+        if self.share_dir:
+            try:
+                os.remove(self._own_path)
+            except OSError:
+                pass
+
+    def peers(self) -> Dict[str, Dict]:
+        """Other workers' summaries; files are re-read only when their mtime changes
+
+        The share directory is rescanned at most every peer_scan_seconds, and
+        files not refreshed within peer_ttl (dead workers) are deleted.
+        """
+        if not self.share_dir:
+            return {}
+        with self._peer_lock:
+            now = time.time()
+            if now - self._peers_scanned < self.peer_scan_seconds:
+                return {path: data for path, (_, data) in self._peer_files.items()}
+            self._peers_scanned = now
+            files = {}
+            for path in glob.glob(os.path.join(self.share_dir, 'trending_*.json')):
+                if path == self._own_path:
+                    continue
+                try:
+                    mtime = os.stat(path).st_mtime
+                    if now - mtime > self.peer_ttl:
+                        os.remove(path)
+                        logger.info(f"🧹 Removed stale trending summary {path}")
+                        continue
+                    cached = self._peer_files.get(path)
+                    if cached and cached[0] == mtime:
+                        files[path] = cached
+                        continue
+                    with open(path) as f:
+                        files[path] = (mtime, json.load(f))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️  Skipping trending summary {path}: {e}")
+            if files.keys() != self._peer_files.keys() or any(
+                    files[path][0] != self._peer_files[path][0] for path in files):
+                self.peers_version += 1
+            self._peer_files = files
+            return {path: data for path, (_, data) in files.items()}
+
+    @property
+    def shared_version(self) -> str:
+        """Changes whenever this worker's or a peer's counts change"""
+        self.peers()
+        return f"{self.version}.{self.peers_version}"
+
+    def _merged_with_peers(self, key: str, window: str) -> SpaceSaving:
+        peers = self.peers()
+        with self._lock:
+            stamp = (self.version, self.peers_version)
+            cached = self._merged.get((key, window))
+            if cached and cached[0] == stamp:
+                return cached[1]
+            merged = SpaceSaving.from_dict(self.sketches[key][window].to_dict())
+        for path, peer in peers.items():
+            try:
+                merged.merge(SpaceSaving.from_dict(peer[key][window]))
+            except (KeyError, ValueError) as e:
+                logger.warning(f"⚠️  Skipping trending summary {path}: {e}")
+        self._merged[(key, window)] = (stamp, merged)
+        return merged
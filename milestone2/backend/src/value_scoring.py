@@ -0,0 +1,219 @@
+"""
+Offline batch scoring of the property catalog with the price model
+
+Scores every processed property with out-of-fold predictions of the trained
+price model (each row is estimated by a copy fitted without it, so the deltas
+are not shrunk by the model having memorised the assessments) and writes
+predicted-vs-assessed deltas plus per-neighborhood rollups to parquet. The API serves undervalued
+properties and the dashboard's market insights from those files.
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import KFold, cross_val_predict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processed_data import DATA_PATH, RESULTS_PATH
+from src.price_model import MODEL_PATH, PriceModel, load_training_data
+from src.property_store import normalize_property_id
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCORES_PATH = os.getenv('VALUE_SCORES_PATH', os.path.join(RESULTS_PATH, 'value_scores.parquet'))
+
+CHUNK_SIZE = 8192
+CV_FOLDS = int(os.getenv('VALUE_SCORING_FOLDS', 5))
+# Assessed at least this far below the model's estimate counts as undervalued
+UNDERVALUED_THRESHOLD = 0.10
+MIN_NEIGHBORHOOD_SIZE = 20
+
+
+def rollups_path(scores_path: str) -> str:
+    return os.path.splitext(scores_path)[0] + '_neighborhoods.parquet'
+
+
+def out_of_fold_predictions(df: pd.DataFrame, model: PriceModel, folds: int = CV_FOLDS,
+                            workers: int = None, random_state: int = 42) -> np.ndarray:
+    """Price estimate of each row from a copy of the model fitted on the other folds"""
+    X = model._matrix(df)
+    y = np.log(df['price'].to_numpy(dtype=float))
+    cv = KFold(n_splits=folds, shuffle=True, random_state=random_state)
+    return np.exp(cross_val_predict(clone(model.model), X, y, cv=cv, n_jobs=workers))
+
+
+def score_catalog(df: pd.DataFrame, model: PriceModel, chunk_size: int = CHUNK_SIZE,
+                  workers: int = None, folds: int = CV_FOLDS) -> pd.DataFrame:
+    """Predict every row, out of fold when folds > 1 (the catalog is the training data)
+
+    With folds <= 1 the fitted model scores rows in chunks; the tree predictor
+    releases the GIL, so threads use all cores.
+    """
+    workers = workers or os.cpu_count() or 1
+    if folds > 1 and len(df) >= folds:
+        predicted = out_of_fold_predictions(df, model, folds, workers)
+    else:
+        chunks = [df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            predicted = np.concatenate(list(pool.map(model.predict_frame, chunks))) if chunks else np.array([])
+
+    assessed = df['price'].to_numpy(dtype=float)
+    scores = pd.DataFrame({
+        'property_id': df['property_id'].map(normalize_property_id),
+        'address': df['address'],
+        'neighborhood': df['neighborhood'],
+        'zip_code': df['zip_code'],
+        'bedrooms': pd.to_numeric(df['bedrooms'], errors='coerce'),
+        'sqft': pd.to_numeric(df['sqft'], errors='coerce'),
+        'assessed_value': assessed,
+        'predicted_value': predicted.round(2),
+        'delta': (predicted - assessed).round(2),
+        # share of the model estimate by which the assessment falls short
+        'delta_pct': ((predicted - assessed) / predicted).round(4)
+    })
+    scores['model_version'] = model.version
+    return scores
+
+
+def neighborhood_rollups(scores: pd.DataFrame) -> pd.DataFrame:
+    """Per-neighborhood medians and undervalued share"""
+    scores = scores.assign(undervalued=scores['delta_pct'] >= UNDERVALUED_THRESHOLD)
+    rollups = scores.dropna(subset=['neighborhood']).groupby('neighborhood').agg(
+        properties=('property_id', 'size'),
+        median_assessed=('assessed_value', 'median'),
+        median_predicted=('predicted_value', 'median'),
+        median_delta_pct=('delta_pct', 'median'),
+        undervalued_share=('undervalued', 'mean')
+    ).reset_index()
+    return rollups.round({'median_assessed': 2, 'median_predicted': 2, 'median_delta_pct': 4, 'undervalued_share': 4})
+
+
+def build_value_scores(data_path: str = None, model_path: str = None, output_path: str = None,
+                       workers: int = None, folds: int = CV_FOLDS) -> Dict:
+    """Score the processed catalog and write scores + rollups"""
+    output_path = output_path or SCORES_PATH
+    model = PriceModel(model_path or MODEL_PATH).load()
+    df = load_training_data(data_path or DATA_PATH)
+
+    start = time.perf_counter()
+    scores = score_catalog(df, model, workers=workers, folds=folds)
+    elapsed = time.perf_counter() - start
+    rollups = neighborhood_rollups(scores)
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    for frame, path in [(scores, output_path), (rollups, rollups_path(output_path))]:
+        tmp_path = path + '.tmp'
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    summary = {
+        'rows': len(scores),
+        'neighborhoods': len(rollups),
+        'scoring_seconds': round(elapsed, 3),
+        'rows_per_second': int(len(scores) / elapsed) if elapsed else None,
+        'folds': folds,
+        'model_version': model.version
+    }
+    logger.info(f"✅ Value scores saved: {output_path} ({summary})")
+    return summary
+
+
+class ValueInsights:
+    """Serves undervalued properties and neighborhood insights from the scored catalog"""
+
+    def __init__(self, scores_path: str = None):
+        self.scores_path = scores_path or SCORES_PATH
+        self._scores = None
+        self._rollups = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._scores is None:
+            with self._lock:
+                if self._scores is None:
+                    try:
+                        scores = pd.read_parquet(self.scores_path)
+                        self._rollups = pd.read_parquet(rollups_path(self.scores_path))
+                        self._scores = scores.sort_values('delta_pct', ascending=False, ignore_index=True)
+                        logger.info(f"✅ Value scores loaded: {len(scores)} properties")
+                    except (OSError, ValueError, ImportError) as e:
+                        logger.warning(f"⚠️  Value scores unavailable ({e})")
+                        self._scores, self._rollups = pd.DataFrame(), pd.DataFrame()
+        return self._scores
+
+    @property
+    def available(self) -> bool:
+        return len(self._load()) > 0
+
+    @property
+    def version(self) -> Optional[str]:
+        scores = self._load()
+        return str(scores['model_version'].iloc[0]) if len(scores) else None
+
+    def reload(self):
+        with self._lock:
+            self._scores, self._rollups = None, None
+        self._load()
+
+    def top_undervalued(self, limit: int = 20, neighborhood: str = None, max_price: float = None) -> List[Dict]:
+        """Properties assessed furthest below the model's estimate"""
+        scores = self._load()
+        if not len(scores):
+            return []
+        mask = np.ones(len(scores), dtype=bool)
+        if neighborhood:
+            mask &= (scores['neighborhood'].str.lower() == neighborhood.lower()).fillna(False).to_numpy()
+        if max_price:
+            mask &= scores['assessed_value'].to_numpy() <= max_price
+        top = scores[mask].head(limit).drop(columns='model_version')
+        return top.astype(object).where(top.notna(), None).to_dict('records')
+
+    def neighborhoods(self, min_properties: int = MIN_NEIGHBORHOOD_SIZE) -> List[Dict]:
+        self._load()
+        if not len(self._rollups):
+            return []
+        rollups = self._rollups[self._rollups['properties'] >= min_properties]
+        rollups = rollups.sort_values('median_delta_pct', ascending=False)
+        return rollups.astype(object).where(rollups.notna(), None).to_dict('records')
+
+    def market_insights(self) -> Optional[Dict]:
+        """Dashboard insight strings derived from the rollups"""
+        hoods = self.neighborhoods()
+        if not hoods:
+            return None
+        best_value = hoods[0]
+        opportunity = max(hoods, key=lambda h: h['undervalued_share'])
+        priciest = max(hoods, key=lambda h: h['median_assessed'])
+        return {
+            "best_value": f"{best_value['neighborhood']} ({best_value['median_delta_pct']:.0%} under model value)",
+            "investment_opportunity": (
+                f"{opportunity['neighborhood']} ({opportunity['undervalued_share']:.0%} of properties undervalued)"
+            ),
+            "most_expensive": f"{priciest['neighborhood']} (median ${priciest['median_assessed']:,.0f})",
+            "model_version": self.version
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score the property catalog with the price model")
+    parser.add_argument('--data-path', default=DATA_PATH)
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default=SCORES_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--folds', type=int, default=CV_FOLDS,
+                        help="Out-of-fold scoring folds (1 scores with the fitted model)")
+    args = parser.parse_args()
+
+    summary = build_value_scores(args.data_path, args.model, args.output, args.workers, args.folds)
+    print(f"\n💰 Value scoring: {summary}")
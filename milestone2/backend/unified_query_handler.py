@@ -3,17 +3,24 @@ PropBot Unified Query Handler
 Searches across ALL ChromaDB collections and returns comprehensive results
 """
 
+import os
+import sys
 import chromadb
 from chromadb.config import Settings
 from typing import Dict, List, Any
 import json
 from datetime import datetime
-import hashlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.collection_aliases import CollectionAliases
+from src.embeddings import EmbeddingMismatch, check_collection, get_provider
 
 class UnifiedQueryHandler:
-    def __init__(self, chroma_host="localhost", chroma_port=8000):
-        """Initialize connection to ChromaDB"""
-        self.client = chromadb.HttpClient(
+    def __init__(self, chroma_host="localhost", chroma_port=8000, provider=None, client=None):
+        """Initialize connection to ChromaDB (or use client) and the query embedding provider"""
+        self.embedder = get_provider(provider)
+        self.client = client or chromadb.HttpClient(
             host=chroma_host,
             port=chroma_port,
             settings=Settings(anonymized_telemetry=False)
@@ -42,35 +49,47 @@ class UnifiedQueryHandler:
             'boston_crime': 'crime_data'
         }
         
-        # Load all collections
-        self.collections = {}
-        for collection_name, purpose in self.collection_map.items():
-            try:
-                self.collections[collection_name] = self.client.get_collection(collection_name)
-                print(f"✅ Loaded collection: {collection_name}")
-            except:
-                print(f"⚠️  Collection not found: {collection_name}")
+        # Logical names resolve through the alias table to the live versioned collections
+        self.aliases = CollectionAliases(self.client)
+        self.loaded = {}
+        self.skipped = set()
+        self.missing = set()
+        self.collections = self.resolve_collections()
     
-    def create_simple_embedding(self, text: str, dim: int = 384) -> List[float]:
-        """Create embedding for query (same as used during indexing)"""
-        hash_object = hashlib.sha256(text.encode())
-        hash_hex = hash_object.hexdigest()
-        
-        embedding = []
-        for i in range(0, min(len(hash_hex), dim * 2), 2):
-            value = int(hash_hex[i:i+2], 16) / 255.0
-            embedding.append(value)
-        
-        while len(embedding) < dim:
-            embedding.append(0.0)
-        
-        return embedding[:dim]
+    def resolve_collections(self) -> Dict[str, Any]:
+        """Logical name -> live collection embedded with the query model (re-resolved, so alias switches apply)"""
+        targets = self.aliases.aliases()
+        collections = {}
+        for collection_name in self.collection_map:
+            physical = self.aliases.resolve(collection_name, targets)
+            collection = self.loaded.get(physical)
+            if collection is None:
+                if physical in self.skipped:
+                    continue
+                try:
+                    collection = self.client.get_collection(physical)
+                    check_collection(collection, self.embedder)
+                except EmbeddingMismatch as e:
+                    print(f"⚠️  Skipping collection: {e}")
+                    self.skipped.add(physical)
+                    continue
+                except Exception:
+                    # Looked up again next time (it may be built later), reported once
+                    if physical not in self.missing:
+                        print(f"⚠️  Collection not found: {collection_name}")
+                        self.missing.add(physical)
+                    continue
+                self.loaded[physical] = collection
+                print(f"✅ Loaded collection: {collection_name} ({physical})")
+            collections[collection_name] = collection
+        return collections
     
     def search_all_collections(self, query: str, n_results: int = 5) -> Dict[str, Any]:
         """Search across ALL collections and return unified results"""
         print(f"\n🔍 Searching for: '{query}'")
         
-        query_embedding = self.create_simple_embedding(query)
+        query_embedding = self.embedder.encode([query])[0].tolist()
+        self.collections = self.resolve_collections()
         
         all_results = {
             'query': query,
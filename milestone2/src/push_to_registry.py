@@ -45,6 +45,11 @@ class ModelRegistryPusher:
         if os.path.exists(f'{self.results_dir}/bias_metrics/bias_detection_report.json'):
             shutil.copy(f'{self.results_dir}/bias_metrics/bias_detection_report.json', package_dir)
         
+        # Copy price model artifact, its metadata and benchmark
+        for name in ['price_model.joblib', 'price_model.json', 'price_model_benchmark.json']:
+            if os.path.exists(f'{self.results_dir}/{name}'):
+                shutil.copy(f'{self.results_dir}/{name}', package_dir)
+        
         logger.info(f"✅ Model packaged at: {package_dir}")
         return package_dir
     
@@ -61,6 +66,16 @@ class ModelRegistryPusher:
             'artifacts': os.listdir(package_dir)
         }
         
+        price_model_path = os.path.join(package_dir, 'price_model.json')
+        if os.path.exists(price_model_path):
+            with open(price_model_path) as f:
+                price_model = json.load(f)
+            metadata['price_model'] = {
+                'version': price_model.get('version'),
+                'framework': 'scikit-learn',
+                'metrics': price_model.get('metrics')
+            }
+        
         metadata_path = os.path.join(package_dir, 'metadata.json')
         with open(metadata_path, 'w') as f:
             json.dump(metadata, f, indent=2)
@@ -0,0 +1,220 @@
+"""
+PropBot - Property Geo-Enrichment
+Adds nearest-station distance, amenity and crime counts within radius, and
+ZIP demographics to every cleaned property
+"""
+
+import glob
+import os
+import sys
+import time
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from scipy.spatial import cKDTree
+
+PROCESSED_DIR = 'data/processed'
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'milestone2', 'backend')
+GEOCODER_INDEX = os.getenv('GEOCODER_PATH', os.path.join(BACKEND_DIR, 'results', 'geocoder_index.parquet'))
+
+# Equirectangular projection around Boston (metres)
+ORIGIN_LAT = 42.33
+METERS_PER_DEGREE = 111_320.0
+
+AMENITY_RADII = [250, 500, 1000]
+CRIME_RADII = [250, 500]
+CHUNK_SIZE = 10_000
+
+
+def latest(keyword, exclude=None):
+    """Newest processed CSV whose name contains keyword"""
+    files = [
+        f for f in glob.glob(f'{PROCESSED_DIR}/*.csv')
+        if keyword in os.path.basename(f).lower() and not (exclude and exclude in os.path.basename(f).lower())
+    ]
+    return max(files, key=os.path.getmtime) if files else None
+
+
+def find_column(df, *candidates):
+    lookup = {c.lower(): c for c in df.columns}
+    return next((lookup[c.lower()] for c in candidates if c.lower() in lookup), None)
+
+
+def to_xy(lat, lon):
+    """Project lat/long to planar metres so KD-tree distances are metric"""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    x = (lon + 71.06) * METERS_PER_DEGREE * np.cos(np.radians(ORIGIN_LAT))
+    y = (lat - ORIGIN_LAT) * METERS_PER_DEGREE
+    return np.column_stack([x, y])
+
+
+def load_points(keyword):
+    """Processed file with valid coordinates, or None"""
+    path = latest(keyword)
+    if not path:
+        print(f"  ⚠️  No {keyword} file in {PROCESSED_DIR}")
+        return None
+    df = pd.read_csv(path, low_memory=False)
+    lat_col = find_column(df, 'latitude', 'lat')
+    lon_col = find_column(df, 'longitude', 'long', 'lon')
+    if not lat_col or not lon_col:
+        print(f"  ⚠️  {os.path.basename(path)} has no coordinates")
+        return None
+    df['_lat'] = pd.to_numeric(df[lat_col], errors='coerce')
+    df['_lon'] = pd.to_numeric(df[lon_col], errors='coerce')
+    df = df[df['_lat'].between(40, 44) & df['_lon'].between(-73, -69)].reset_index(drop=True)
+    print(f"  ✅ {keyword}: {len(df):,} points ({os.path.basename(path)})")
+    return df
+
+
+def geocode_missing(properties, lat, lon):
+    """Fill missing coordinates from the offline geocoder (address, street or ZIP centroid)"""
+    missing = np.isnan(lat) | np.isnan(lon)
+    address_col = find_column(properties, 'full_address', 'address', 'Location')
+    if not missing.any() or not address_col:
+        return lat, lon, None
+    sys.path.insert(0, BACKEND_DIR)
+    from src.geocoder import Geocoder
+
+    zip_col = find_column(properties, 'zip_code', 'ZIPCODE')
+    coded = Geocoder(GEOCODER_INDEX, PROCESSED_DIR, build=True).geocode_frame(
+        properties.loc[missing, address_col], properties.loc[missing, zip_col] if zip_col else None
+    )
+    lat, lon = lat.copy(), lon.copy()
+    lat[missing] = coded['latitude'].to_numpy(dtype=float)
+    lon[missing] = coded['longitude'].to_numpy(dtype=float)
+    precision = np.full(len(properties), 'source', dtype=object)
+    precision[missing] = coded['precision'].to_numpy()
+    print(f"🗺️  Geocoded: {coded['precision'].value_counts().to_dict()}")
+    return lat, lon, precision
+
+
+def count_within(tree, xy, radius):
+    """Points of tree within radius of each row of xy, chunked across all cores"""
+    counts = np.zeros(len(xy), dtype=np.int32)
+    for start in range(0, len(xy), CHUNK_SIZE):
+        chunk = xy[start:start + CHUNK_SIZE]
+        counts[start:start + CHUNK_SIZE] = tree.query_ball_point(chunk, radius, return_length=True, workers=-1)
+    return counts
+
+
+def calculate_distances():
+    """
+    Enrich cleaned properties with spatial and demographic features
+    """
+
+    print("=" * 80)
+    print("PROPBOT: PROPERTY GEO-ENRICHMENT")
+    print("=" * 80)
+    print(f"Start: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    prop_file = latest('properties', exclude='enriched')
+    if not prop_file:
+        print(f"❌ No cleaned properties file in {PROCESSED_DIR}")
+        return None
+
+    properties = pd.read_csv(prop_file, low_memory=False)
+    print(f"📂 Properties: {len(properties):,} ({os.path.basename(prop_file)})\n")
+
+    started = time.perf_counter()
+
+    lat_col = find_column(properties, 'latitude', 'lat')
+    lon_col = find_column(properties, 'longitude', 'long', 'lon')
+    if lat_col and lon_col:
+        lat = pd.to_numeric(properties[lat_col], errors='coerce').to_numpy()
+        lon = pd.to_numeric(properties[lon_col], errors='coerce').to_numpy()
+    else:
+        lat = lon = np.full(len(properties), np.nan)
+    lat, lon, precision = geocode_missing(properties, lat, lon)
+    located = ~(np.isnan(lat) | np.isnan(lon))
+    xy = to_xy(lat[located], lon[located])
+    print(f"📍 Properties with coordinates: {located.sum():,} / {len(properties):,}\n")
+
+    features = {}
+    if precision is not None:
+        features['latitude'], features['longitude'], features['geocode_precision'] = lat, lon, precision
+
+    def put(name, values, dtype=float):
+        column = np.full(len(properties), np.nan)
+        column[located] = values
+        features[name] = column if dtype is float else pd.array(column, dtype='Int32')
+
+    # 1. Nearest transit station
+    print("1️⃣  TRANSIT")
+    print("─" * 80)
+    stations = load_points('transit')
+    if stations is not None and len(stations) and located.any():
+        tree = cKDTree(to_xy(stations['_lat'], stations['_lon']))
+        distance, nearest = tree.query(xy, workers=-1)
+        put('nearest_station_m', distance.round(1))
+        names = np.full(len(properties), None, dtype=object)
+        name_col = find_column(stations, 'station_name', 'name')
+        if name_col:
+            names[located] = stations[name_col].to_numpy()[nearest]
+        features['nearest_station'] = names
+
+    # 2. Amenities by category and radius
+    print("\n2️⃣  AMENITIES")
+    print("─" * 80)
+    amenities = load_points('amenities')
+    if amenities is not None and len(amenities) and located.any():
+        category_col = find_column(amenities, 'category')
+        groups = amenities.groupby(category_col) if category_col else [('all', amenities)]
+        categories = 0
+        for category, group in groups:
+            tree = cKDTree(to_xy(group['_lat'], group['_lon']))
+            for radius in AMENITY_RADII:
+                put(f'{category}_within_{radius}m', count_within(tree, xy, radius), int)
+            categories += 1
+        print(f"  ✅ {categories} categories x {len(AMENITY_RADII)} radii")
+
+    # 3. Crime within radius
+    print("\n3️⃣  CRIME")
+    print("─" * 80)
+    crime = load_points('crime')
+    if crime is not None and len(crime) and located.any():
+        tree = cKDTree(to_xy(crime['_lat'], crime['_lon']))
+        for radius in CRIME_RADII:
+            put(f'crime_within_{radius}m', count_within(tree, xy, radius), int)
+
+    enriched = pd.concat([properties.drop(columns=[c for c in features if c in properties.columns]), pd.DataFrame(features, index=properties.index)], axis=1)
+
+    # 4. ZIP demographics
+    print("\n4️⃣  DEMOGRAPHICS")
+    print("─" * 80)
+    demo_file = latest('demographics')
+    zip_col = find_column(enriched, 'zip_code', 'ZIPCODE')
+    if demo_file and zip_col:
+        demographics = pd.read_csv(demo_file, dtype={'zip_code': str})
+        demographics['zip_code'] = demographics['zip_code'].str.zfill(5)
+        demographics = demographics.drop_duplicates('zip_code').add_prefix('zip_')
+        demographics = demographics.rename(columns={'zip_zip_code': '_zip'})
+        enriched['_zip'] = enriched[zip_col].astype(str).str.replace(r'\.0$', '', regex=True).str.zfill(5)
+        enriched = enriched.merge(demographics, on='_zip', how='left').drop(columns='_zip')
+        print(f"  ✅ Joined {len(demographics.columns) - 1} demographic columns on ZIP")
+
+    elapsed = time.perf_counter() - started
+
+    output = f'{PROCESSED_DIR}/properties_ENRICHED_{datetime.now().strftime("%Y%m%d")}.csv'
+    enriched.to_csv(output, index=False)
+
+    print("\n" + "=" * 80)
+    print("✅ ENRICHMENT COMPLETE")
+    print("=" * 80)
+    print(f"Properties: {len(enriched):,}")
+    print(f"New columns: {len(enriched.columns) - len(properties.columns)}")
+    print(f"Runtime: {elapsed:.1f}s")
+    print(f"💾 Saved: {output}")
+    print("=" * 80)
+
+    return output
+
+
+if __name__ == "__main__":
+    Path(PROCESSED_DIR).mkdir(parents=True, exist_ok=True)
+    result = calculate_distances()
+
+    if result:
+        print(f"\n✅ Enriched properties: {result}")
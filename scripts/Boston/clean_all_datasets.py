@@ -4,11 +4,38 @@ Master script to clean all raw data
 Week 2 - Day 1 Complete Task
 """
 
+import sys
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'data' / 'database'))
+
+from streaming import CsvStream, scan_csv, write_chunks
+
+
+def stream_crime(files, profile, streams):
+    """Crime chunks with upper-case columns, deduplicated on INCIDENT_NUMBER across all files"""
+    seen = set()
+    for file in files:
+        stream = CsvStream(file, profile=profile)
+        streams.append(stream)
+        kept = 0
+        for df in stream:
+            df.columns = df.columns.str.upper()
+            if 'INCIDENT_NUMBER' in df.columns:
+                df = df.dropna(subset=['INCIDENT_NUMBER'])
+                keys = df['INCIDENT_NUMBER']
+            else:
+                keys = pd.util.hash_pandas_object(df, index=False)
+            new = np.fromiter((k not in seen for k in keys.tolist()), dtype=bool, count=len(df))
+            keep = new & ~keys.duplicated().to_numpy()
+            seen.update(keys[keep].tolist())
+            kept += int(keep.sum())
+            yield df[keep]
+        print(f"✅ {Path(file).name}: {stream.rows:,} read, {kept:,} new clean records")
+
 def clean_all_datasets():
     """
     Clean all PropBot datasets
@@ -34,26 +61,18 @@ def clean_all_datasets():
         'data/raw/boston_crime_2023_2025_api_20251024_232735.csv'
     ]
     
-    crime_dfs = []
-    for file in crime_files:
-        if Path(file).exists():
-            df = pd.read_csv(file)
-            df.columns = df.columns.str.upper()
-            df = df.drop_duplicates()
-            if 'INCIDENT_NUMBER' in df.columns:
-                df = df.dropna(subset=['INCIDENT_NUMBER'])
-            print(f"✅ {Path(file).name}: {len(df):,} clean records")
-            crime_dfs.append(df)
-    
-    if crime_dfs:
-        df_crime = pd.concat(crime_dfs, ignore_index=True)
-        if 'INCIDENT_NUMBER' in df_crime.columns:
-            df_crime = df_crime.drop_duplicates(subset=['INCIDENT_NUMBER'])
+    # Streamed in chunks: the merged file is never held in memory
+    crime_files = [file for file in crime_files if Path(file).exists()]
+    if crime_files:
+        profile = scan_csv(crime_files)
+        columns = list(dict.fromkeys(col.upper() for col in profile['columns']))
+        streams = []
         output = f'data/processed/crime_2020_2025_CLEAN_{datetime.now().strftime("%Y%m%d")}.csv'
-        df_crime.to_csv(output, index=False)
+        total = write_chunks(stream_crime(crime_files, profile, streams), output, columns=columns)
         print(f"💾 Merged clean crime: {output}")
-        print(f"   Total: {len(df_crime):,} records\n")
-        cleaned_files.append(('Crime', len(df_crime)))
+        print(f"   Total: {total:,} records")
+        print(f"   🧠 Peak RSS {max(stream.monitor.peak_mb for stream in streams):.0f} MB\n")
+        cleaned_files.append(('Crime', total))
     
     # 2. Clean Demographics
     print("2️⃣  CLEANING DEMOGRAPHICS")
@@ -181,7 +200,7 @@ def clean_all_datasets():
     print("=" * 80)
     print("1. Calculate crime rates: python scripts\\calculate_crime_rates.py")
     print("2. Generate trends: python scripts\\generate_crime_trends.py")
-    print("3. Calculate distances: python scripts\\calculate_distances.py")
+    print("3. Calculate distances: python scripts\\Boston\\calculate_distances.py")
     print("=" * 80)
     
     return cleaned_files
@@ -5,6 +5,7 @@ import pytest
 import pandas as pd
 from pathlib import Path
 import tempfile
+import uuid
 
 @pytest.fixture
 def sample_property_data():
@@ -52,3 +53,14 @@ def mock_env_vars(monkeypatch):
     monkeypatch.setenv("POSTGRES_DB", "test_propbot")
     monkeypatch.setenv("POSTGRES_USER", "test_user")
     monkeypatch.setenv("POSTGRES_PASSWORD", "test_pass")
+
+@pytest.fixture
+def client():
+    """In-memory ChromaDB client (state is shared per process, so use unique names)"""
+    chromadb = pytest.importorskip('chromadb')
+    return chromadb.EphemeralClient()
+
+@pytest.fixture
+def collection(client):
+    """Empty, uniquely named collection that takes precomputed embeddings"""
+    return client.get_or_create_collection(f"test_{uuid.uuid4().hex[:8]}", embedding_function=None)
@@ -0,0 +1,85 @@
+"""
+Tests for JWT-claim based authentication (no DB access per request)
+"""
+import os
+import sys
+import time
+from datetime import timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+jose = pytest.importorskip("jose")
+pytest.importorskip("passlib")
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from auth import utils
+
+
+def _bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+class TestClaims:
+    """Test claim validation"""
+
+    def test_anonymous_request(self):
+        """No token means anonymous, not an error"""
+        assert utils.get_current_claims(None) is None
+
+    def test_valid_token(self):
+        """A valid token resolves to its claims"""
+        token = utils.create_access_token({"user_id": 1, "is_guest": False})
+        claims = utils.get_current_claims(_bearer(token))
+        assert claims["user_id"] == 1
+
+    def test_invalid_token(self):
+        """A garbage token is rejected"""
+        with pytest.raises(HTTPException) as exc:
+            utils.get_current_claims(_bearer("not-a-jwt"))
+        assert exc.value.status_code == 401
+
+    def test_expired_guest(self):
+        """Guest expiry is enforced from the claims alone"""
+        token = utils.create_access_token({
+            "user_id": 2,
+            "is_guest": True,
+            "guest_expires_at": int(time.time()) - 60
+        }, expires_delta=timedelta(minutes=5))
+        with pytest.raises(HTTPException) as exc:
+            utils.get_current_claims(_bearer(token))
+        assert exc.value.status_code == 403
+
+
+class TestRevocationCache:
+    """Test the revoked-user TTL cache"""
+
+    def test_revoked_token_rejected(self):
+        """Tokens issued before revocation are rejected"""
+        cache = utils.RevocationCache(ttl_seconds=60)
+        issued_at = int(time.time()) - 10
+        cache.revoke(3)
+        assert cache.is_revoked(3, issued_at)
+        assert not cache.is_revoked(4, issued_at)
+
+    def test_entries_expire(self):
+        """Entries disappear after their TTL"""
+        cache = utils.RevocationCache(ttl_seconds=0)
+        cache.revoke(5)
+        time.sleep(0.01)
+        assert not cache.is_revoked(5, int(time.time()) - 10)
+        assert len(cache) == 0
+
+    def test_login_right_after_logout(self):
+        """A token issued just after revocation, even within the same second, is accepted"""
+        old = utils.create_access_token({"user_id": 6, "is_guest": False})
+        utils.revoked_users.revoke(6)
+        new = utils.create_access_token({"user_id": 6, "is_guest": False})
+        try:
+            with pytest.raises(HTTPException):
+                utils.get_current_claims(_bearer(old))
+            assert utils.get_current_claims(_bearer(new))["user_id"] == 6
+        finally:
+            utils.revoked_users._entries.pop(6, None)
@@ -0,0 +1,50 @@
+"""
+Tests for address autocomplete
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+from src.autocomplete import AutocompleteIndex
+
+
+@pytest.fixture
+def index():
+    return AutocompleteIndex(pd.DataFrame({
+        'property_id': ['1', '2', '3', '4'],
+        'address': ['10 NEWBURY ST, Boston, MA 02116', '12 NEWBURY ST', '5 NEWTON ST #2', '7 BEACON ST'],
+        'neighborhood': ['Back Bay', 'Back Bay', 'Brighton', 'Beacon Hill']
+    }), neighborhoods=['Back Bay', 'Newton Corner'])
+
+
+class TestAutocomplete:
+    """Test prefix ranking and typo tolerance"""
+
+    def test_prefix_matches(self, index):
+        """Neighborhoods and streets come before addresses; busier streets first"""
+        suggestions = index.suggest('new')
+        assert [s['text'] for s in suggestions[:3]] == ['Newton Corner', 'Newbury St', 'Newton St']
+        assert suggestions[1]['properties'] == 2
+        addresses = index.suggest('12 newbury street')
+        assert [(s['type'], s['property_id']) for s in addresses] == [('address', '2')]
+
+    def test_typo_tolerance(self, index):
+        """Misspelled streets and neighborhoods still match via trigrams"""
+        assert index.suggest('newbery st')[0]['text'] == 'Newbury St'
+        assert index.suggest('bak bay')[0]['text'] == 'Back Bay'
+        assert [s['property_id'] for s in index.suggest('10 newbery st')] == ['1']
+
+    def test_limit_and_empty(self, index):
+        assert len(index.suggest('n', limit=2)) == 2
+        assert index.suggest('   ') == []
+        assert index.suggest('zzzzzz') == []
+
+    def test_store_without_addresses(self):
+        """A missing property store still serves neighborhood suggestions"""
+        index = AutocompleteIndex(pd.DataFrame(columns=['property_id']), neighborhoods=['Back Bay'])
+        assert [s['text'] for s in index.suggest('back')] == ['Back Bay']
+        assert index.suggest('10 newbury') == []
@@ -0,0 +1,53 @@
+"""
+Tests for the property geo-enrichment script
+"""
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'Boston', 'calculate_distances.py')
+
+
+def _load_script():
+    spec = importlib.util.spec_from_file_location('calculate_distances', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestCalculateDistances:
+    """Test enrichment features against hand-computed values"""
+
+    def test_enrichment(self, test_data_dir, monkeypatch):
+        """Distances, radius counts and the ZIP join are added per property"""
+        processed = test_data_dir / 'data' / 'processed'
+        processed.mkdir(parents=True)
+        pd.DataFrame({
+            'PID': [1, 2, 3],
+            'zip_code': [2116, 2119, 2116],
+            'latitude': [42.3500, 42.3000, np.nan],
+            'longitude': [-71.0800, -71.0800, np.nan]
+        }).to_csv(processed / 'properties_CLEAN_20251025.csv', index=False)
+        pd.DataFrame({'station_name': ['Back Bay'], 'latitude': [42.3510], 'longitude': [-71.0800]}).to_csv(
+            processed / 'transit_CLEAN_20251025.csv', index=False)
+        pd.DataFrame({
+            'name': ['A', 'B'], 'category': ['cafes', 'cafes'],
+            'latitude': [42.3501, 42.3560], 'longitude': [-71.0800, -71.0800]
+        }).to_csv(processed / 'amenities_CLEAN_20251025.csv', index=False)
+        pd.DataFrame({'Lat': [42.3502, -1.0], 'Long': [-71.0800, -1.0]}).to_csv(
+            processed / 'crime_2020_2025_CLEAN_20251025.csv', index=False)
+        pd.DataFrame({'zip_code': ['02116'], 'median_household_income': [120000]}).to_csv(
+            processed / 'demographics_CLEAN_20251025.csv', index=False)
+
+        monkeypatch.chdir(test_data_dir)
+        output = _load_script().calculate_distances()
+        enriched = pd.read_csv(output)
+
+        assert abs(enriched.loc[0, 'nearest_station_m'] - 111.3) < 1
+        assert enriched.loc[0, 'nearest_station'] == 'Back Bay'
+        assert list(enriched['cafes_within_250m'].fillna(-1)) == [1, 0, -1]
+        assert enriched.loc[0, 'cafes_within_1000m'] == 2
+        assert enriched.loc[0, 'crime_within_250m'] == 1
+        assert list(enriched['zip_median_household_income'].fillna(0)) == [120000, 0, 120000]
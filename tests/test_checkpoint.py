@@ -0,0 +1,124 @@
+"""
+Tests for checkpointed, resumable ingestion
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'database')))
+
+from checkpoint import Checkpoint, row_batches, row_positions
+from documents import build_documents
+from incremental import IncrementalSync, keyed
+from streaming import CsvStream
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'crime.csv'
+    pd.DataFrame({
+        'INCIDENT_NUMBER': [f"I{i}" for i in range(100)],
+        'OFFENSE': ['LARCENY', 'VANDALISM', ' ', 'ASSAULT'] * 25,
+        'STREET': ['WASHINGTON ST'] * 100
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_row_batches_follow_a_fixed_grid():
+    positions = np.array([3, 4, 9, 12, 14])
+    batches = list(row_batches(3, 15, positions, 5))
+    assert [(lo, hi) for lo, hi, _ in batches] == [(3, 5), (5, 10), (10, 15)]
+    assert [positions[docs].tolist() for _, _, docs in batches] == [[3, 4], [9], [12, 14]]
+
+
+def test_row_positions_skip_dropped_rows():
+    index = pd.Index(['A', 'B', 'C'])
+    assert row_positions(index, 'crime', ['crime_A', 'crime_C'], 10).tolist() == [10, 12]
+
+
+def test_commit_fail_and_reload(source, tmp_path):
+    checkpoint = Checkpoint('crime', source, checkpoint_dir=str(tmp_path))
+    checkpoint.commit(0, 10)
+    checkpoint.commit(20, 30)
+    checkpoint.fail(10, 20, RuntimeError("timeout"))
+    assert checkpoint.watermark == 10
+    assert checkpoint.finish(30)['complete'] is False
+
+    resumed = Checkpoint('crime', source, 'resume', checkpoint_dir=str(tmp_path))
+    assert resumed.resumed and resumed.failed == [(10, 20)]
+    assert not resumed.wanted(0, 10) and resumed.wanted(10, 20) and resumed.wanted(30, 40)
+
+    retry = Checkpoint('crime', source, 'retry-failed', checkpoint_dir=str(tmp_path))
+    assert retry.wanted(10, 20) and retry.wanted(15, 25) and not retry.wanted(30, 40)
+    retry.commit(10, 20)
+    assert retry.failed == [] and retry.watermark == 30
+    assert retry.finish(30)['complete'] is True
+
+    state = json.loads((tmp_path / 'crime.json').read_text())
+    assert state['committed'] == [[0, 30]] and state['last_batch'] == [10, 20]
+
+
+def test_changed_file_starts_over(source, tmp_path):
+    Checkpoint('crime', source, checkpoint_dir=str(tmp_path)).commit(0, 10)
+    with open(source, 'a') as f:
+        f.write('I100,ROBBERY,TREMONT ST\n')
+    checkpoint = Checkpoint('crime', source, 'resume', checkpoint_dir=str(tmp_path))
+    assert not checkpoint.resumed and checkpoint.mode == 'fresh' and checkpoint.wanted(0, 10)
+
+
+def ingest(collection, source, checkpoint, embed):
+    """The build -> embed -> write loop of the ingestion scripts, without threads"""
+    sync = IncrementalSync(collection)
+    stream = CsvStream(source, chunk_rows=30)
+    key, counts = 'INCIDENT_NUMBER', {}
+    for chunk in stream:
+        start = int(chunk.index[0])
+        chunk = keyed(chunk, counts, key)
+        texts, metas, ids = build_documents(chunk, 'crime', ['OFFENSE', 'STREET'], [])
+        positions = row_positions(chunk.index, 'crime', ids, start)
+        for lo, hi, docs in row_batches(start, start + len(chunk), positions, 10):
+            if not checkpoint.wanted(lo, hi):
+                sync.skip(ids[docs])
+                continue
+            batch = sync.changed(texts[docs], metas[docs], ids[docs])
+            try:
+                sync.write(*batch, embed(batch[0]))
+                checkpoint.commit(lo, hi)
+            except Exception as e:
+                checkpoint.fail(lo, hi, e)
+    checkpoint.finish(stream.profile['rows'])
+    return sync.finish(delete=checkpoint.mode != 'retry-failed')
+
+
+def embed_unless(word, calls=None):
+    def embed(texts):
+        if calls is not None:
+            calls.append(len(texts))
+        if any(word in t for t in texts):
+            raise RuntimeError("rate limited")
+        return [[float(len(t)), 1.0] for t in texts]
+    return embed
+
+
+@pytest.mark.parametrize('mode', ['resume', 'retry-failed'])
+def test_second_run_only_redoes_failed_rows(source, tmp_path, collection, mode):
+    df = pd.read_csv(source)
+    df.loc[42, 'OFFENSE'] = 'ROBBERY'
+    df.to_csv(source, index=False)
+
+    first = Checkpoint('crime', source, checkpoint_dir=str(tmp_path))
+    ingest(collection, source, first, embed_unless('ROBBERY'))
+    assert first.failed == [(40, 50)] and first.watermark == 40
+    assert collection.count() == 90
+
+    calls = []
+    second = Checkpoint('crime', source, mode, checkpoint_dir=str(tmp_path))
+    manifest = ingest(collection, source, second, embed_unless('NOTHING', calls))
+    assert calls == [10]
+    assert second.failed == [] and second.state['complete']
+    assert manifest['counts']['added'] == 10 and manifest['counts']['deleted'] == 0
+    assert collection.count() == 100
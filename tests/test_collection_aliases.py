@@ -0,0 +1,113 @@
+"""
+Tests for blue/green collection builds behind aliases
+"""
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+from src.collection_aliases import CollectionAliases, ValidationError, split_version, version_name
+
+
+@pytest.fixture
+def aliases(client):
+    return CollectionAliases(client, registry=f"aliases_{uuid.uuid4().hex[:8]}")
+
+
+@pytest.fixture
+def alias():
+    return f"props_{uuid.uuid4().hex[:8]}"
+
+
+def fill(collection, n, offset=0):
+    collection.add(ids=[f"p{i}" for i in range(n)], documents=[f"home {i}" for i in range(n)],
+                   embeddings=[[float(i + offset), 1.0, 0.5] for i in range(n)])
+    return collection
+
+
+def test_version_names_round_trip():
+    built = datetime(2026, 10, 16, 3, 0, 0)
+    assert version_name('boston_properties', built) == 'boston_properties__v20261016030000'
+    assert split_version('boston_properties__v20261016030000') == ('boston_properties', built)
+    assert split_version('boston_properties') == ('boston_properties', None)
+
+
+def test_build_is_invisible_until_promoted(aliases, alias):
+    first, building = aliases.open_build(alias)
+    assert building and alias not in aliases.logical_names()
+    fill(first, 10)
+    aliases.promote(alias, first, expected=10)
+    assert aliases.resolve(alias) == first.name
+
+    # A rebuild writes elsewhere; readers keep resolving to the first version until the switch
+    second, building = aliases.open_build(alias, rebuild=True)
+    fill(second, 5)
+    assert building and aliases.resolve(alias) == first.name
+    assert alias in aliases.logical_names() and second.name not in aliases.logical_names()
+
+    result = aliases.promote(alias, second, expected=5)
+    assert aliases.resolve(alias) == second.name and result['previous'] == first.name
+    # Within the grace period the replaced version is kept
+    assert aliases.versions(alias) == [first.name, second.name]
+
+    same, building = aliases.open_build(alias)
+    assert same.name == second.name and not building
+
+
+@pytest.mark.parametrize('count,expected,error', [
+    (0, 0, 'empty'),
+    (8, 10, 'expected 10'),
+    (3, 3, 'less than 50%')
+])
+def test_failed_validation_keeps_live_version(aliases, alias, count, expected, error):
+    live = fill(aliases.create_version(alias, datetime(2026, 10, 1)), 10)
+    aliases.switch(alias, live.name)
+
+    build = aliases.create_version(alias)
+    if count:
+        fill(build, count)
+    with pytest.raises(ValidationError, match=error):
+        aliases.promote(alias, build, expected=expected)
+    assert aliases.resolve(alias) == live.name
+
+
+def test_garbage_collect_after_grace(client, aliases, alias):
+    legacy = fill(client.create_collection(alias), 4)
+    now = datetime(2026, 10, 16, 3, 0, 0)
+    abandoned = fill(aliases.create_version(alias, now - timedelta(days=3)), 4)
+    build = fill(aliases.create_version(alias, now - timedelta(hours=1)), 4)
+    fresh = aliases.create_version(alias, now + timedelta(minutes=1))
+
+    # The first switch retires the unversioned legacy collection like any other version
+    assert aliases.switch(alias, build.name, now) == legacy.name
+    assert aliases.garbage_collect(alias, grace_hours=24, now=now + timedelta(hours=1)) == [abandoned.name]
+    assert aliases.garbage_collect(alias, grace_hours=24, now=now + timedelta(hours=25)) == [legacy.name, fresh.name]
+
+    names = aliases.collection_names()
+    assert build.name in names and legacy.name not in names
+    assert aliases.records()[alias]['retired'] == '{}'
+
+
+def test_rollback_to_previous_version(aliases, alias):
+    old = fill(aliases.create_version(alias, datetime(2026, 10, 1)), 4)
+    new = fill(aliases.create_version(alias, datetime(2026, 10, 2)), 4, offset=100)
+    aliases.switch(alias, old.name)
+    aliases.switch(alias, new.name)
+
+    assert aliases.rollback(alias) == old.name
+    assert aliases.resolve(alias) == old.name
+
+
+def test_resume_continues_the_interrupted_build(aliases, alias):
+    live = fill(aliases.create_version(alias, datetime(2026, 10, 1)), 4)
+    aliases.switch(alias, live.name)
+    build, _ = aliases.open_build(alias, rebuild=True)
+
+    resumed, building = aliases.open_build(alias, rebuild=True, resume=build.name)
+    assert resumed.name == build.name and building
+    resumed, building = aliases.open_build(alias, resume=live.name)
+    assert resumed.name == live.name and not building
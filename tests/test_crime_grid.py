@@ -0,0 +1,108 @@
+"""
+Tests for the crime-density grid
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+from src.crime_grid import CrimeGrid, build_crime_grid, offense_category, shooting_flags
+
+HOT = (42.3300, -71.0800)
+QUIET = (42.3800, -71.1500)
+
+
+def _crime_file(test_data_dir):
+    rows = (
+        [('ASSAULT - AGGRAVATED', 0, 2023, *HOT)] * 20 + [('LARCENY THEFT FROM BUILDING', 0, 2023, *HOT)] * 10
+        + [('ASSAULT - AGGRAVATED', 1, 2024, *HOT)] * 15 + [('INVESTIGATE PERSON', 'Y', 2024, *HOT)] * 5
+        + [('VANDALISM', 0, 2024, *QUIET)] + [('LARCENY', 0, 2024, -1, -1)]
+    )
+    df = pd.DataFrame(rows, columns=['OFFENSE_DESCRIPTION', 'SHOOTING', 'YEAR', 'Lat', 'Long'])
+    df['MONTH'] = 6
+    path = test_data_dir / 'processed' / 'crime_2020_2025_CLEAN_20251025.csv'
+    df.to_csv(path, index=False)
+    return str(test_data_dir / 'processed')
+
+
+class TestCrimeGrid:
+    """Test the grid build and lookups"""
+
+    def test_categories_and_shootings(self):
+        """Offense text and mixed SHOOTING encodings are normalized"""
+        categories = offense_category(pd.Series(['ASSAULT - SIMPLE', 'LARCENY SHOPLIFTING', 'TOWED MOTOR VEHICLE']))
+        assert list(categories) == [0, 1, 2]
+        assert list(shooting_flags(pd.Series([0, 1, 'Y', None]))) == [False, True, True, False]
+
+    def test_lookup(self, test_data_dir):
+        """Busy cells score lower, and counts/trends come from the 3x3 block"""
+        output = str(test_data_dir / 'crime_grid.npz')
+        summary = build_crime_grid(_crime_file(test_data_dir), output)
+        assert summary['outside_grid'] == 1
+
+        grid = CrimeGrid(output)
+        hot, quiet = grid.lookup(*HOT), grid.lookup(*QUIET)
+        assert hot['safety_score'] < quiet['safety_score']
+        assert hot['incidents_by_year'] == {2023: 30, 2024: 20}
+        assert hot['by_category']['violent'] == 15
+        assert hot['shootings'] == 20
+        assert hot['trend_yoy'] == round(-10 / 30, 4)
+        assert grid.lookup(40.0, -75.0) is None
+        assert 'Safety score' in grid.describe(*HOT)
+
+    def test_missing_grid(self, tmp_path):
+        """A missing artifact is reported as unavailable"""
+        assert CrimeGrid(str(tmp_path / 'none.npz')).available is False
+
+
+class TestCrimeCube:
+    """Test the crime statistics cube"""
+
+    def test_trends_and_deltas(self, test_data_dir):
+        """Slices sum the cube and year-over-year deltas line up"""
+        from src.crime_cube import CrimeCube, build_crime_cube
+
+        data_path = _crime_file(test_data_dir)
+        crime = pd.read_csv(os.path.join(data_path, 'crime_2020_2025_CLEAN_20251025.csv'))
+        crime['DISTRICT'] = np.where(crime['YEAR'] == 2023, 'B2', 'D4')
+        crime['HOUR'] = 22
+        crime.to_csv(os.path.join(data_path, 'crime_2020_2025_CLEAN_20251025.csv'), index=False)
+
+        output = str(test_data_dir / 'crime_cube.parquet')
+        assert build_crime_cube(data_path, output)['incidents'] == 52
+        cube = CrimeCube(output)
+
+        yearly = cube.trends('year')
+        assert [(r['year'], r['incidents']) for r in yearly] == [(2023, 30), (2024, 22)]
+        assert yearly[1]['yoy_change'] == round(-8 / 30, 4)
+        assert cube.trends('year', district='Roxbury') == [
+            {'year': 2023, 'incidents': 30, 'shootings': 0, 'yoy_change': None}
+        ]
+        monthly = cube.trends('month', year=2024)
+        assert monthly[0]['month'] == 6 and monthly[0]['yoy_change'] == round(-8 / 30, 4)
+        assert {r['offense_group']: r['incidents'] for r in cube.trends('offense_group', year=2024)} == {
+            'violent': 15, 'other': 5, 'property': 2
+        }
+        assert 'Back Bay' in cube.describe('Back Bay', label='Back Bay')
+
+    def test_partial_year_and_bounded_cache(self, test_data_dir):
+        """A year in progress is compared with the same months a year earlier"""
+        from src.crime_cube import CrimeCube, build_crime_cube
+
+        data_path = _crime_file(test_data_dir)
+        crime = pd.read_csv(os.path.join(data_path, 'crime_2020_2025_CLEAN_20251025.csv'))
+        # 2023 runs all year (6 of its 30 incidents by June), 2024 only through June
+        crime.loc[crime.index[6:30], 'MONTH'] = 11
+        crime.to_csv(os.path.join(data_path, 'crime_2020_2025_CLEAN_20251025.csv'), index=False)
+        output = str(test_data_dir / 'crime_cube.parquet')
+        build_crime_cube(data_path, output)
+
+        cube = CrimeCube(output, cache_size=2)
+        ytd = cube.year_to_date(year=2024)
+        assert ytd == {'year': 2024, 'through_month': 6, 'incidents': 22, 'previous_incidents': 6,
+                       'yoy_change': round(16 / 6, 4)}
+        assert '2024 through Jun vs the same months of 2023' in cube.describe()
+        assert len(cube._slices) == 2
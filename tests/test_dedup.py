@@ -0,0 +1,75 @@
+"""
+Tests for text-level deduplication before embedding
+"""
+import json
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'database')))
+
+from dedup import COUNT_FIELD, IDS_FIELD, VALUES_FIELD, TextDedup
+from documents import build_documents
+from incremental import IncrementalSync, keyed
+
+
+def test_unique_keeps_first_occurrence():
+    dedup = TextDedup(max_ids=2)
+    texts, metas, ids = dedup.unique(['a', 'b', 'a'], [{'n': 0}, {'n': 1}, {'n': 2}], ['r0', 'r1', 'r2'])
+    assert (texts, metas, ids) == (['a', 'b'], [{'n': 0}, {'n': 1}], ['r0', 'r1'])
+    # Later batches are deduplicated against everything seen so far
+    assert dedup.unique(['b', 'a', 'a', 'c'], [{}] * 4, ['r3', 'r4', 'r5', 'r6'])[2] == ['r6']
+
+    assert dedup.groups[next(iter(dedup.groups))][:3] == ['r0', 3, ['r2', 'r4']]
+    stats = dedup.stats()
+    assert stats['documents'] == 7 and stats['distinct'] == 3
+    assert stats['duplicates'] == stats['embeddings_saved'] == 4 and stats['duplicate_ratio'] == 0.5714
+
+
+def test_disabled_passes_everything_through():
+    dedup = TextDedup(enabled=False)
+    assert dedup.unique(['a', 'a'], [{}, {}], ['r0', 'r1'])[2] == ['r0', 'r1']
+    assert dedup.stats()['duplicates'] == 0
+
+
+def ingest(collection, df):
+    """Dedup -> diff -> embed -> write, as in the ingestion scripts"""
+    sync, dedup = IncrementalSync(collection), TextDedup()
+    texts, metas, ids = build_documents(keyed(df, {}, 'INCIDENT_NUMBER'), 'crime', ['OFFENSE', 'STREET'], ['YEAR'])
+    calls = []
+    for start in range(0, len(ids), 4):
+        batch = sync.changed(*dedup.unique(texts[start:start + 4], metas[start:start + 4], ids[start:start + 4]))
+        calls.extend(batch[0])
+        if batch[2]:
+            sync.write(*batch, [[float(len(t)), 1.0] for t in batch[0]])
+    sync.finish()
+    return calls, dedup.annotate(collection)
+
+
+def test_stores_each_text_once_with_references(collection):
+    df = pd.DataFrame({
+        'INCIDENT_NUMBER': [f"I{i}" for i in range(10)],
+        'OFFENSE': ['LARCENY', 'LARCENY', 'ASSAULT', 'LARCENY', 'VANDALISM'] * 2,
+        'STREET': ['WASHINGTON ST'] * 10,
+        'YEAR': [2024] * 9 + [2023]
+    })
+    calls, annotated = ingest(collection, df)
+    assert len(calls) == 3 and collection.count() == 3 and annotated == 3
+
+    stored = collection.get(ids=['crime_I0'], include=['metadatas'])['metadatas'][0]
+    assert stored[COUNT_FIELD] == 5
+    assert json.loads(stored[IDS_FIELD]) == ['crime_I1', 'crime_I3', 'crime_I5', 'crime_I6', 'crime_I8']
+    # The larcenies all share a YEAR; the vandalisms do not, so every YEAR seen is listed
+    assert VALUES_FIELD not in stored
+    vandalism = collection.get(ids=['crime_I4'], include=['metadatas'])['metadatas'][0]
+    assert vandalism[COUNT_FIELD] == 1 and json.loads(vandalism[VALUES_FIELD]) == {'YEAR': ['2023', '2024']}
+
+    # Unchanged rerun: nothing embedded, no reference rewritten
+    assert ingest(collection, df) == ([], 0)
+
+    # The assaults lose their duplicate; the larcenies keep theirs with fewer references
+    calls, annotated = ingest(collection, df[~df['INCIDENT_NUMBER'].isin(['I7', 'I8'])])
+    assert calls == [] and annotated == 2
+    assert COUNT_FIELD not in collection.get(ids=['crime_I2'], include=['metadatas'])['metadatas'][0]
+    assert collection.get(ids=['crime_I0'], include=['metadatas'])['metadatas'][0][COUNT_FIELD] == 4
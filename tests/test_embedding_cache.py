@@ -0,0 +1,110 @@
+"""
+Tests for the on-disk embedding cache
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'database')))
+
+from embedding_cache import EmbeddingCache, text_key
+
+
+class CountingEncoder:
+    """Deterministic fake model that records what it was asked to encode"""
+
+    def __init__(self, dim=4):
+        self.dim = dim
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[len(t) + i for i in range(self.dim)] for t in texts]
+
+
+def test_embeds_only_new_texts(tmp_path):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache('model-a', str(tmp_path))
+
+    first = cache.embed(['alpha', 'beta', 'alpha'], encoder)
+    second = cache.embed(['beta', 'gamma!'], encoder)
+
+    assert encoder.calls == [['alpha', 'beta'], ['gamma!']]
+    assert first.shape == (3, 4) and first.dtype == np.float32
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(second[0], first[1])
+    np.testing.assert_array_equal(second[1], [6, 7, 8, 9])
+    assert cache.stats()['hits'] == 1
+
+
+def test_persists_across_instances(tmp_path):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache('model-a', str(tmp_path), shard_rows=2)
+    expected = cache.embed([f"text {i}" for i in range(5)], encoder)
+    cache.flush()
+    assert len(list(cache.dir.glob('*.f32'))) == 3
+
+    reopened = EmbeddingCache('model-a', str(tmp_path), shard_rows=2)
+    np.testing.assert_array_equal(reopened.embed([f"text {i}" for i in range(5)], encoder), expected)
+    assert len(encoder.calls) == 1
+
+
+def test_key_includes_model(tmp_path):
+    assert text_key('model-a', 'x') != text_key('model-b', 'x')
+    encoder = CountingEncoder()
+    EmbeddingCache('model-a', str(tmp_path)).embed(['x'], encoder)
+    EmbeddingCache('model-b', str(tmp_path)).embed(['x'], encoder)
+    assert len(encoder.calls) == 2
+
+
+def test_unflushed_rows_are_not_reused(tmp_path):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache('model-a', str(tmp_path))
+    cache.embed(['kept'], encoder)
+    cache.flush()
+    # Appended but never indexed, as after a crash
+    cache.embed(['lost'], encoder)
+
+    reopened = EmbeddingCache('model-a', str(tmp_path))
+    np.testing.assert_array_equal(reopened.embed(['other text'], encoder)[0], [10, 11, 12, 13])
+    np.testing.assert_array_equal(reopened.embed(['kept'], encoder)[0], [4, 5, 6, 7])
+
+
+def test_compact_keeps_recent_within_cap(tmp_path):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache('model-a', str(tmp_path), shard_rows=3)
+    cache.embed(['old 1', 'old 2', 'old 3'], encoder)
+    cache.clock += 1
+    cache.embed(['new 1', 'new 2'], encoder)
+
+    result = cache.compact(max_bytes=2 * 4 * 4)
+    assert result['evicted'] == 3 and result['bytes_after'] == 32
+
+    reopened = EmbeddingCache('model-a', str(tmp_path))
+    np.testing.assert_array_equal(reopened.embed(['new 1', 'new 2'], encoder)[:, 0], [5, 5])
+    assert len(encoder.calls) == 2
+    reopened.embed(['old 1'], encoder)
+    assert encoder.calls[-1] == ['old 1']
+
+
+def test_flush_enforces_size_cap(tmp_path):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache('model-a', str(tmp_path), max_bytes=3 * 4 * 4)
+    cache.embed([f"text {i}" for i in range(10)], encoder)
+    cache.flush()
+    assert len(EmbeddingCache('model-a', str(tmp_path))) == 3
+    assert cache.disk_bytes() <= 3 * 4 * 4
+
+
+def test_threads_share_one_cache(tmp_path):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache('model-a', str(tmp_path))
+    batches = [[f"text {i % 7}", f"text {i}"] for i in range(40)]
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda batch: cache.embed(batch, encoder), batches))
+
+    assert len(cache) == 40
+    for batch, vectors in zip(batches, results):
+        np.testing.assert_array_equal(vectors[:, 0], [len(t) for t in batch])
@@ -0,0 +1,82 @@
+"""
+Tests for the embedding-provider registry
+"""
+import hashlib
+import os
+import sys
+import uuid
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+from src.collection_aliases import CollectionAliases
+from src.embeddings import (MODEL_FIELD, EmbeddingMismatch, EmbeddingProvider, HashProvider,
+                            SentenceTransformerProvider, check_collection, collection_metadata, get_provider,
+                            reembed)
+
+
+class TinyProvider(EmbeddingProvider):
+    """Deterministic 3-d stand-in for a real model"""
+
+    name = 'tiny'
+    model = 'tiny-model'
+    dim = 3
+
+    def encode(self, texts):
+        return np.array([[len(t), t.count(' '), 1.0] for t in texts], dtype=np.float32)
+
+
+def new_collection(client, provider=None):
+    metadata = collection_metadata(provider) if provider else None
+    return client.create_collection(f"test_{uuid.uuid4().hex[:8]}", metadata=metadata, embedding_function=None)
+
+
+def test_registry_returns_shared_instances():
+    assert get_provider('hash') is get_provider('hash')
+    with pytest.raises(ValueError, match="Unknown embedding provider"):
+        get_provider('word2vec')
+
+
+def test_hash_provider_matches_legacy_query_embedding():
+    text = "2 bedroom apartment near MIT"
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    legacy = [int(digest[i:i + 2], 16) / 255.0 for i in range(0, 64, 2)] + [0.0] * (384 - 32)
+    np.testing.assert_allclose(HashProvider().encode([text])[0], legacy, rtol=1e-6)
+
+
+def test_check_collection_refuses_other_models(client):
+    tiny = TinyProvider()
+    check_collection(new_collection(client, tiny), tiny)
+    with pytest.raises(EmbeddingMismatch, match="tiny-model"):
+        check_collection(new_collection(client, tiny), HashProvider())
+
+    # Unrecorded collections hold the legacy MiniLM vectors; only an empty one takes any model
+    legacy = new_collection(client)
+    check_collection(legacy, tiny)
+    legacy.add(ids=['a'], documents=['x'], embeddings=[[0.1] * 384])
+    check_collection(legacy, SentenceTransformerProvider())
+    with pytest.raises(EmbeddingMismatch, match="assumed to be all-MiniLM-L6-v2"):
+        # Same dimension, different embedding space
+        check_collection(legacy, HashProvider())
+    with pytest.raises(EmbeddingMismatch, match="384-d"):
+        check_collection(legacy, tiny)
+
+
+def test_reembed_builds_and_switches_a_new_version(client):
+    alias = f"props_{uuid.uuid4().hex[:8]}"
+    source = client.create_collection(alias, metadata=collection_metadata(HashProvider(), {'hnsw:space': 'cosine'}))
+    docs = [f"home number {i}" for i in range(25)]
+    source.add(ids=[f"p{i}" for i in range(25)], documents=docs, metadatas=[{'i': i} for i in range(25)],
+               embeddings=HashProvider().encode(docs))
+
+    result = reembed(client, alias, TinyProvider(), page_size=10)
+    target = client.get_collection(CollectionAliases(client).resolve(alias))
+    assert result['count'] == 25 and target.name == result['target'] != alias
+    assert target.metadata[MODEL_FIELD] == 'tiny-model' and target.metadata['hnsw:space'] == 'cosine'
+    check_collection(target, TinyProvider())
+
+    stored = target.get(ids=['p7'], include=['embeddings', 'metadatas'])
+    np.testing.assert_array_equal(stored['embeddings'][0], [13, 2, 1])
+    assert stored['metadatas'][0] == {'i': 7}
@@ -0,0 +1,162 @@
+"""
+Tests for the grid spatial index and commute estimates
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+from src.commute import CommuteEngine
+from src.geo_index import GridIndex, PointLayer, haversine_miles
+
+RNG = np.random.default_rng(0)
+LATS = RNG.uniform(42.23, 42.40, 2000)
+LONS = RNG.uniform(-71.19, -70.99, 2000)
+
+
+class TestGridIndex:
+    """Test grid queries against brute force"""
+
+    def test_haversine(self):
+        """Back Bay to Logan is about 3.8 miles as the crow flies"""
+        assert 3.5 < haversine_miles(42.3503, -71.0810, 42.3656, -71.0096) < 4.0
+
+    def test_nearest_matches_brute_force(self):
+        """Nearest k points equal a full distance scan"""
+        index = GridIndex(LATS, LONS)
+        for lat, lon in [(42.35, -71.06), (42.30, -71.10), (42.45, -71.00)]:
+            rows, distances = index.nearest(lat, lon, k=3)
+            expected = np.argsort(haversine_miles(lat, lon, LATS, LONS))[:3]
+            assert list(rows) == list(expected)
+            assert np.all(np.diff(distances) >= 0)
+
+    def test_radius_matches_brute_force(self):
+        """Radius query returns exactly the points within the radius"""
+        index = GridIndex(LATS, LONS)
+        rows, distances = index.radius(42.33, -71.08, 0.75)
+        expected = np.flatnonzero(haversine_miles(42.33, -71.08, LATS, LONS) <= 0.75)
+        assert sorted(rows) == sorted(expected)
+        assert np.all(distances <= 0.75)
+
+
+class TestCommuteEngine:
+    """Test commute estimates from station coordinates"""
+
+    def _engine(self):
+        stations = pd.DataFrame({
+            'station_name': ['Back Bay', 'Downtown Crossing', 'Ashmont'],
+            'latitude': [42.3474, 42.3555, 42.2846],
+            'longitude': [-71.0757, -71.0605, -71.0639]
+        })
+        addresses = {'1 DARTMOUTH ST': (42.3480, -71.0760), '5 ASHMONT ST': (42.2850, -71.0650)}
+        return CommuteEngine(PointLayer(stations, 'transit'), locate_address=lambda a: addresses.get(a.upper()))
+
+    def test_commute_depends_on_origin(self):
+        """Different properties get different commutes to the same destination"""
+        engine = self._engine()
+        destination = engine.geocode('Downtown')
+        near = engine.commute(engine.geocode('1 Dartmouth St'), destination)
+        far = engine.commute(engine.geocode('5 Ashmont St'), destination)
+        assert near['distance_miles'] < far['distance_miles']
+        assert near['commute_options']['transit']['board_station']['name'] == 'Back Bay'
+        assert far['commute_options']['transit']['board_station']['name'] == 'Ashmont'
+
+    def test_addresses_are_not_landmarks(self):
+        """Street addresses resolve to themselves, landmarks only by whole name"""
+        engine = self._engine()
+        assert engine.geocode('1 Dartmouth St')['name'] == '1 Dartmouth St'
+        # Known address on a street named after a landmark
+        engine.locate_address = lambda a: (42.3530, -71.1310) if a.startswith('45 Harvard') else None
+        assert engine.geocode('45 Harvard Ave, Allston')['latitude'] == 42.3530
+        # 'mit' inside a street name, unknown addresses
+        assert engine.geocode('12 Goldsmith St') is None
+        assert engine.geocode('88 Summit Ave') is None
+        assert engine.geocode('99 Harvard Ave') is None
+        assert engine.geocode('MIT')['name'] == 'MIT'
+        assert engine.geocode('near Boston University')['name'] == 'Boston University'
+        assert engine.geocode('Back Bay')['name'] == 'Back Bay' and engine.geocode('back  bay')['longitude'] == -71.0757
+
+    def test_unknown_places(self):
+        """Unresolvable places return None"""
+        assert self._engine().geocode('Narnia') is None
+
+
+class TestNearbyIndex:
+    """Test radius summaries over the processed point files"""
+
+    def _index(self, test_data_dir):
+        from src.nearby import NearbyIndex
+
+        processed = test_data_dir / 'processed'
+        pd.DataFrame({
+            'name': ['Cafe A', 'Cafe B', 'Gym C'],
+            'category': ['cafes', 'cafes', 'gyms'],
+            'latitude': [42.3500, 42.3510, 42.3700],
+            'longitude': [-71.0800, -71.0805, -71.0800]
+        }).to_csv(processed / 'amenities_CLEAN_20251024.csv', index=False)
+        pd.DataFrame({
+            'OFFENSE_DESCRIPTION': ['LARCENY', 'LARCENY', 'ASSAULT'],
+            'SHOOTING': [0, 0, 1],
+            'Lat': [42.3502, 42.3503, -1],
+            'Long': [-71.0801, -71.0802, -1]
+        }).to_csv(processed / 'crime_CLEAN_20251024.csv', index=False)
+        return NearbyIndex(str(processed))
+
+    def test_counts_by_type(self, test_data_dir):
+        """Counts only include points inside the radius; bad coordinates are dropped"""
+        results = self._index(test_data_dir).nearby(42.3500, -71.0800, radius=0.5)
+        assert results['amenities']['count'] == 2
+        assert results['amenities']['items'][0]['name'] == 'Cafe A'
+        assert results['crime']['count'] == 2
+        assert results['crime']['by_offense'] == {'LARCENY': 2}
+
+    def test_category_types_and_context(self, test_data_dir):
+        """Amenity categories are queryable and summarized for RAG context"""
+        from src.nearby import extract_address, types_for_query
+
+        index = self._index(test_data_dir)
+        assert index.nearby(42.3500, -71.0800, 2.0, ['gyms'])['gyms']['count'] == 1
+        assert 'Cafe A' in index.describe(42.3500, -71.0800, types=['cafes'])
+        assert types_for_query('Any cafes near 12 Beacon St?') == ['cafes']
+        assert extract_address('Any cafes near 12 Beacon St?') == '12 Beacon St'
+
+
+class TestMapIndex:
+    """Test viewport queries against brute force"""
+
+    def _index(self):
+        from src.map_index import MapIndex
+
+        return MapIndex(pd.DataFrame({'property_id': [str(i) for i in range(len(LATS))],
+                                      'latitude': LATS, 'longitude': LONS}))
+
+    def test_points_match_brute_force(self):
+        """High zoom returns exactly the properties inside the box"""
+        bbox = (-71.08, 42.34, -71.05, 42.36)
+        result = self._index().within(bbox, zoom=16, limit=2000)
+        expected = ((LONS >= bbox[0]) & (LONS <= bbox[2]) & (LATS >= bbox[1]) & (LATS <= bbox[3])).sum()
+        assert result['mode'] == 'points'
+        assert result['total'] == len(result['features']) == expected
+
+    def test_clusters_and_limit(self):
+        """Low zoom aggregates into capped clusters that cover the catalog"""
+        from src.map_index import parse_bbox
+
+        index = self._index()
+        result = index.within(parse_bbox('-71.3,42.1,-70.9,42.5'), zoom=11, limit=100)
+        assert result['mode'] == 'clusters'
+        assert result['total'] == len(LATS)
+        assert sum(f['count'] for f in result['features']) == len(LATS)
+        capped = index.within((-71.3, 42.1, -70.9, 42.5), zoom=14, limit=10)
+        assert len(capped['features']) == 10 and capped['truncated']
+
+    def test_store_without_coordinates(self):
+        """A missing property store leaves the index unavailable instead of failing"""
+        from src.map_index import MapIndex
+
+        index = MapIndex(pd.DataFrame(columns=['property_id']))
+        assert not index.available
+        assert index.within((-71.3, 42.1, -70.9, 42.5), zoom=16)['total'] == 0
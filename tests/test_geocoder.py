@@ -0,0 +1,84 @@
+"""
+Tests for the offline geocoder
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+from src.geocoder import BOSTON_ZIP_CENTROIDS, Geocoder, build_geocoder_index, normalize_street_address, street_name
+
+
+@pytest.fixture
+def geocoder(test_data_dir):
+    """Geocoder built from a small amenities + crime fixture"""
+    pd.DataFrame({
+        'name': ['Cafe', 'Gym'],
+        'address': ['10 Newbury Street, Boston, MA', '20 Newbury St'],
+        'zip_code': ['02116', '02116'],
+        'latitude': [42.3510, 42.3514],
+        'longitude': [-71.0750, -71.0760]
+    }).to_csv(test_data_dir / 'amenities_CLEAN_20251025.csv', index=False)
+    pd.DataFrame({
+        'STREET': ['PUTNAM ST', 'PUTNAM ST', 'NEWBURY ST'],
+        'Lat': [42.3770, 42.3780, 42.3500],
+        'Long': [-71.0300, -71.0310, -71.0800]
+    }).to_csv(test_data_dir / 'crime_2020_2025_CLEAN_20251025.csv', index=False)
+
+    index_path = str(test_data_dir / 'geocoder_index.parquet')
+    build_geocoder_index(str(test_data_dir), index_path)
+    return Geocoder(index_path)
+
+
+class TestGeocoder:
+    """Test normalization and precision fallbacks"""
+
+    def test_normalization(self):
+        """Suffixes, units and house numbers are normalized"""
+        normalized = normalize_street_address(pd.Series(['10 Newbury Street #3, Boston', '104 A 104 Putnam St.']))
+        assert list(normalized) == ['10 NEWBURY ST', '104 A 104 PUTNAM ST']
+        assert list(street_name(normalized)) == ['NEWBURY ST', 'PUTNAM ST']
+
+    def test_precision_fallbacks(self, geocoder):
+        """Exact address, then street in ZIP, then street, then ZIP centroid"""
+        coded = geocoder.geocode_frame(
+            pd.Series(['10 Newbury St', '99 Putnam Street, Boston, MA 02128', '5 Putnam St', '1 Nowhere Rd',
+                       'unknown']),
+            pd.Series(['02116', None, None, '02130', None])
+        )
+        assert list(coded['precision']) == ['address', 'street_zip', 'street', 'zip', None]
+        assert coded.loc[0, 'latitude'] == pytest.approx(42.3510)
+        assert coded.loc[1, 'latitude'] == pytest.approx(42.3775)
+        assert coded.loc[3, 'latitude'] == pytest.approx(BOSTON_ZIP_CENTROIDS['02130'][0])
+        assert pd.isna(coded.loc[4, 'latitude'])
+
+    def test_locate(self, geocoder):
+        """Single lookups skip ZIP-only matches"""
+        assert geocoder.locate('20 Newbury Street') == pytest.approx((42.3514, -71.0760))
+        assert geocoder.geocode('1 Nowhere Rd', '02130')['precision'] == 'zip'
+        assert geocoder.locate('1 Nowhere Rd, Boston, MA 02130') is None
+
+    def test_enriched_centroids_are_not_addresses(self, test_data_dir):
+        """Geocoded rows of an enriched property file do not become address-precision points"""
+        pd.DataFrame({
+            'full_address': ['1 MAIN ST', '5 ELM ST'],
+            'zip_code': ['02119', '02130'],
+            'latitude': [42.3242, 42.3312],
+            'longitude': [-71.0856, -71.1100],
+            'geocode_precision': ['zip', 'source']
+        }).to_csv(test_data_dir / 'properties_ENRICHED_20251026.csv', index=False)
+        index_path = str(test_data_dir / 'enriched_index.parquet')
+        build_geocoder_index(str(test_data_dir), index_path)
+        geocoder = Geocoder(index_path)
+        assert geocoder.geocode('1 MAIN ST', '02119')['precision'] == 'zip'
+        assert geocoder.locate('5 Elm Street') == pytest.approx((42.3312, -71.1100))
+
+    def test_lookup_cache_is_per_instance(self, geocoder, tmp_path):
+        """Instances over different indexes do not share memoized answers"""
+        assert geocoder.geocode('20 Newbury Street')['precision'] != 'zip'
+        centroids_only = Geocoder(str(tmp_path / 'missing.parquet'), cache_size=10)
+        assert centroids_only.geocode('20 Newbury Street') is None
+        assert centroids_only.geocode.cache_info().currsize == 1 and geocoder.geocode.cache_info().currsize == 1
@@ -0,0 +1,93 @@
+"""
+Tests for incremental (upsert) ChromaDB ingestion
+"""
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'database')))
+
+from documents import build_documents
+from incremental import IncrementalSync, keyed, write_manifest
+
+
+def fake_embed(texts):
+    return [[float(len(t)), 1.0] for t in texts]
+
+
+def ingest(collection, df):
+    texts, metas, ids = build_documents(keyed(df), 'crime', ['OFFENSE', 'STREET'], ['YEAR'])
+    sync = IncrementalSync(collection)
+    calls = []
+    sync.upsert(texts, metas, ids, lambda t: calls.append(list(t)) or fake_embed(t))
+    return sync.finish(), calls
+
+
+def test_keyed_uses_natural_key_and_disambiguates():
+    df = pd.DataFrame({'INCIDENT_NUMBER': ['I1', 'I2', 'I1'], 'x': [1, 2, 3]})
+    assert keyed(df).index.tolist() == ['I1', 'I2', 'I1#1']
+
+    numeric = pd.DataFrame({'property_id': [101.0, 102.0], 'x': [1, 2]})
+    assert keyed(numeric).index.tolist() == ['101', '102']
+
+
+def test_keyed_falls_back_to_row_hash():
+    df = pd.DataFrame({'a': ['x', 'y'], 'b': [1, 2]})
+    # Hash keys do not move when rows are reordered
+    assert keyed(df).index.tolist() == keyed(df.iloc[::-1]).index.tolist()[::-1]
+
+
+def test_second_run_only_touches_changes(collection):
+    first = pd.DataFrame({
+        'INCIDENT_NUMBER': ['I1', 'I2', 'I3'],
+        'OFFENSE': ['LARCENY', 'VANDALISM', 'ASSAULT'],
+        'STREET': ['WASHINGTON ST', 'BOYLSTON ST', 'BLUE HILL AVE'],
+        'YEAR': [2024, 2024, 2025]
+    })
+    manifest, calls = ingest(collection, first)
+    assert manifest['counts'] == {'added': 3, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+    # I1 unchanged, I2 edited, I3 gone, I4 new (and rows reordered)
+    second = pd.DataFrame({
+        'INCIDENT_NUMBER': ['I4', 'I2', 'I1'],
+        'OFFENSE': ['ROBBERY', 'VANDALISM', 'LARCENY'],
+        'STREET': ['TREMONT ST', 'NEWBURY ST', 'WASHINGTON ST'],
+        'YEAR': [2025, 2024, 2024]
+    })
+    manifest, calls = ingest(collection, second)
+    assert manifest['counts'] == {'added': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1}
+    assert manifest['added'] == ['crime_I4']
+    assert manifest['updated'] == ['crime_I2']
+    assert manifest['deleted'] == ['crime_I3']
+    assert calls == [['ROBBERY. TREMONT ST', 'VANDALISM. NEWBURY ST']]
+
+    stored = collection.get(ids=['crime_I2'], include=['documents'])
+    assert stored['documents'] == ['VANDALISM. NEWBURY ST']
+    assert collection.count() == 3
+
+    manifest, calls = ingest(collection, second)
+    assert manifest['counts']['unchanged'] == 3 and calls == []
+
+
+def test_failed_batch_stays_out_of_manifest(collection):
+    df = pd.DataFrame({'INCIDENT_NUMBER': ['I1'], 'OFFENSE': ['LARCENY'], 'STREET': ['A ST'], 'YEAR': [2024]})
+    texts, metas, ids = build_documents(keyed(df), 'crime', ['OFFENSE', 'STREET'], ['YEAR'])
+    sync = IncrementalSync(collection)
+
+    def failing(texts):
+        raise RuntimeError("embedding service down")
+
+    with pytest.raises(RuntimeError):
+        sync.upsert(texts, metas, ids, failing)
+    assert sync.finish()['counts']['added'] == 0
+
+
+def test_write_manifest(tmp_path, collection):
+    sync = IncrementalSync(collection, source='crime.csv')
+    path = write_manifest(sync.finish(), str(tmp_path))
+    latest = json.loads((tmp_path / f"{collection.name}_latest.json").read_text())
+    assert json.loads(path.read_text()) == latest
+    assert latest['source'] == 'crime.csv'
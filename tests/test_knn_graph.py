@@ -0,0 +1,77 @@
+"""
+Tests for the precomputed property kNN graph
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+from src.knn_graph import KNNGraph, build_knn_graph, compute_neighbors, update_knn_graph
+
+N = 500
+EMBEDDINGS = np.random.default_rng(1).normal(size=(N + 10, 16))
+
+
+def fake_embed(texts):
+    """Deterministic embedding keyed by the street number"""
+    return EMBEDDINGS[[int(t.split()[0]) for t in texts]]
+
+
+def _properties():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'property_id': [f'P{i}' for i in range(N)],
+        'full_address': [f'{i} MAIN ST' for i in range(N)],
+        'TOTAL_VALUE': rng.integers(200000, 2000000, N),
+        'BED_RMS': rng.integers(1, 6, N),
+        'FULL_BTH': rng.integers(1, 4, N),
+        'living_square_feet': rng.integers(500, 4000, N),
+        'zip_code': rng.choice(['2119', '2116', '2130'], N)
+    })
+
+
+class TestKNNGraph:
+    """Test kNN graph build, lookup and incremental update"""
+
+    def test_build_and_lookup(self, tmp_path):
+        """Graph is compact and lookups exclude the property itself"""
+        path = str(tmp_path / 'graph.npz')
+        build_knn_graph(_properties(), path, k=5, embed_fn=fake_embed)
+        data = np.load(path)
+        assert data['neighbors'].dtype == np.int32
+        assert data['scores'].dtype == np.float16
+
+        graph = KNNGraph(path)
+        similar = graph.similar('P0', 3)
+        assert len(similar) == 3
+        assert 'P0' not in [pid for pid, _ in similar]
+        assert graph.similar('missing') == []
+
+    def test_incremental_matches_full_rebuild(self, tmp_path):
+        """Patching changed rows gives the same graph as recomputing everything"""
+        path = str(tmp_path / 'graph.npz')
+        df = _properties()
+        build_knn_graph(df, path, k=5, embed_fn=fake_embed)
+
+        df.loc[5, 'TOTAL_VALUE'] = 999999
+        df = df.drop(index=7).reset_index(drop=True)
+        summary = update_knn_graph(df, path, k=5, embed_fn=fake_embed)
+        assert 0 < summary['rebuilt'] < len(df)
+
+        data = np.load(path)
+        expected, _ = compute_neighbors(data['features'].astype(np.float32), 5)
+        np.testing.assert_array_equal(np.sort(expected, 1), np.sort(data['neighbors'], 1))
+
+    def test_ids_match_the_property_store(self, tmp_path):
+        """Float-parsed ids are stored and looked up in the property store's canonical form"""
+        path = str(tmp_path / 'graph.npz')
+        df = _properties()
+        df['property_id'] = [100001000.0 + i for i in range(N)]
+        build_knn_graph(df, path, k=5, embed_fn=fake_embed)
+        graph = KNNGraph(path)
+        assert graph.ids[0] == '100001000' and '100001000' in graph
+        assert graph.similar(100001000.0, 2) == graph.similar('100001000', 2)
+        assert all(not pid.endswith('.0') for pid, _ in graph.similar('100001000', 5))
@@ -0,0 +1,84 @@
+"""
+Tests for the cleaned-CSV ChromaDB loader
+"""
+import os
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_processing')))
+
+chromadb = pytest.importorskip('chromadb')
+
+from load_to_chromadb import ChromaDBLoader
+import checkpoint
+import incremental
+from src.collection_aliases import CollectionAliases
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, 'CHECKPOINT_DIR', str(tmp_path / 'checkpoints'))
+    monkeypatch.setattr(incremental, 'MANIFEST_DIR', str(tmp_path / 'manifests'))
+
+    def make(**kwargs):
+        loader = ChromaDBLoader(client=chromadb.EphemeralClient(), provider='hash', use_cache=False, **kwargs)
+        loader.aliases = CollectionAliases(loader.client, registry=f"aliases_{uuid.uuid4().hex[:8]}")
+        return loader
+    return make
+
+
+def write_csv(path, names):
+    pd.DataFrame({'NAME': names, 'ADDRESS': [f"{i} Main St" for i in range(len(names))]}).to_csv(path, index=False)
+    return path
+
+
+def test_files_sharing_a_collection_keep_each_others_rows(loader, tmp_path):
+    name = f"schools_{uuid.uuid4().hex[:8]}"
+    public = write_csv(tmp_path / 'cleaned_public_schools.csv', ['Latin', 'Quincy', 'Eliot'])
+    colleges = write_csv(tmp_path / 'cleaned_colleges.csv', ['Emerson', 'Suffolk'])
+
+    first = loader()
+    assert first.load_collection(name, [public, colleges]) == []
+    collection = first.client.get_collection(first.aliases.resolve(name))
+    assert collection.count() == 5 and collection.name != name
+    ids = collection.get()['ids']
+    assert sum(i.startswith(f"{name}_colleges_") for i in ids) == 2
+    assert sum(i.startswith(f"{name}_public_schools_") for i in ids) == 3
+    # One checkpoint per source file, neither reset by the other
+    assert len(list((tmp_path / 'checkpoints').glob(f"{name}__*.json"))) == 2
+
+    # Unchanged rerun updates in place and deletes nothing
+    rerun = loader()
+    rerun.aliases = first.aliases
+    assert rerun.load_collection(name, [public, colleges]) == []
+    assert rerun.collections[name].name == collection.name and collection.count() == 5
+
+    # A row removed from one file is the only one deleted
+    write_csv(colleges, ['Emerson'])
+    assert rerun.load_collection(name, [public, colleges]) == []
+    assert collection.count() == 4 and not any('Suffolk' in doc for doc in collection.get()['documents'])
+
+
+class FakeEncoder:
+    """Records what it was asked to encode; a text's vector is [len, first char]"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=None):
+        self.calls.append(list(texts))
+        return np.array([[len(t), ord(t[0])] for t in texts], dtype=np.float32)
+
+
+def test_encode_sorts_by_length_and_restores_order(loader):
+    model = loader()
+    model.embedding_model = FakeEncoder()
+    texts = ['medium text', 'a', 'the longest text of all', 'bb', 'medium txt']
+
+    embeddings = model.encode(texts)
+    assert model.embedding_model.calls == [sorted(texts, key=len)]
+    np.testing.assert_array_equal(embeddings, [[len(t), ord(t[0])] for t in texts])
@@ -0,0 +1,26 @@
+"""
+Tests that the API module starts the way uvicorn loads it
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend'))
+
+for module in ('fastapi', 'sqlalchemy', 'email_validator', 'openai', 'dotenv', 'chromadb', 'sklearn'):
+    pytest.importorskip(module)
+
+
+def test_main_imports_from_the_backend_directory(tmp_path):
+    """`cd milestone2/backend && uvicorn main:app` puts only the backend on sys.path"""
+    code = (f"import sys; sys.path.insert(0, {BACKEND!r}); "
+            "import main, src.rag_pipeline; print(src.rag_pipeline.__file__)")
+    env = {**os.environ, 'DATABASE_URL': f"sqlite:///{tmp_path / 'propbot.db'}",
+           'EMBEDDING_PROVIDER': 'hash', 'OPENAI_API_KEY': 'test'}
+    # Run from an empty directory so relative artifact paths (chroma_db, ...) stay out of the tree
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip().splitlines()[-1] == os.path.join(BACKEND, 'src', 'rag_pipeline.py')
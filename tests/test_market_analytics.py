@@ -0,0 +1,93 @@
+"""
+Tests for the materialized dashboard analytics
+"""
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+from src.market_analytics import MarketAnalytics, build_analytics_snapshot
+
+
+def _write_processed(data_dir):
+    pd.DataFrame({
+        'property_id': ['P1', 'P2', 'P3', 'P4'],
+        'CITY': ['ROXBURY', 'ROXBURY', 'BACK BAY', 'BACK BAY'],
+        'TOTAL_VALUE': [400000, 600000, 1200000, 0],
+        'LU_DESC': ['CONDO', 'CONDO', 'SINGLE FAM', 'CONDO'],
+        'BED_RMS': [2, 3, 5, 1],
+        'year_built': [1925, 1931, 2001, 1990]
+    }).to_csv(data_dir / 'properties_CLEAN_20251025.csv', index=False)
+    pd.DataFrame({
+        'DISTRICT': ['B2', 'B2', 'D4'],
+        'YEAR': [2023, 2024, 2024],
+        'SHOOTING': [0, 1, 0]
+    }).to_csv(data_dir / 'crime_2020_2025_CLEAN_20251025.csv', index=False)
+
+
+class TestAnalyticsSnapshot:
+    """Test snapshot build and serving"""
+
+    def test_snapshot_aggregates(self, test_data_dir):
+        """Snapshot values are computed from the processed data"""
+        processed = test_data_dir / 'processed'
+        _write_processed(processed)
+        snapshot = build_analytics_snapshot(str(processed), str(test_data_dir / 'snapshot.json'))
+
+        assert snapshot['total_properties'] == 3
+        assert snapshot['median_price'] == 600000
+        assert snapshot['neighborhood_prices']['Roxbury']['mean'] == 500000
+        assert snapshot['bedroom_distribution'] == {'2BR': 1, '3BR': 1, '4BR+': 1}
+        assert snapshot['crime']['by_district'] == {'B2': 2, 'D4': 1}
+
+    def test_dashboard_counters_and_etag(self, test_data_dir):
+        """Searches update counters incrementally and change the ETag"""
+        processed = test_data_dir / 'processed'
+        _write_processed(processed)
+        build_analytics_snapshot(str(processed), str(test_data_dir / 'snapshot.json'))
+        analytics = MarketAnalytics(str(test_data_dir / 'snapshot.json'))
+
+        etag = analytics.etag()
+        assert analytics.dashboard() is analytics.dashboard()
+
+        analytics.record_search({'neighborhood': 'Roxbury', 'bedrooms': 2})
+        assert analytics.etag() != etag
+        dashboard = analytics.dashboard()
+        assert dashboard['total_searches'] == 1
+        # Searches never replace the inventory distribution
+        assert dashboard['bedroom_distribution'] == {'2BR': 1, '3BR': 1, '4BR+': 1}
+        assert dashboard['bedroom_searches'] == {'2BR': 1}
+        assert dashboard['hottest_neighborhoods'][0] == {
+            'name': 'Roxbury', 'search_count': 1, 'avg_price': 500000
+        }
+
+    def test_missing_snapshot_falls_back(self, test_data_dir):
+        """Without a snapshot the dashboard still renders"""
+        analytics = MarketAnalytics(str(test_data_dir / 'missing.json'))
+        dashboard = analytics.dashboard()
+        assert dashboard['version'] == 'fallback' and dashboard['source'] == 'fallback'
+        assert 'total_properties' in dashboard['fallback_fields']
+
+    def test_rebuilt_snapshot_is_reloaded(self, test_data_dir):
+        """A snapshot built after startup is served without a restart"""
+        path = test_data_dir / 'snapshot.json'
+        analytics = MarketAnalytics(str(path), reload_seconds=0)
+        etag = analytics.etag()
+
+        processed = test_data_dir / 'processed'
+        _write_processed(processed)
+        build_analytics_snapshot(str(processed), str(path))
+        assert analytics.etag() != etag
+        dashboard = analytics.dashboard()
+        assert dashboard['source'] == 'snapshot' and dashboard['fallback_fields'] == []
+        assert dashboard['total_properties'] == 3
+
+        snapshot = json.loads(path.read_text())
+        snapshot['total_properties'], snapshot['version'] = 4, 'rebuilt'
+        path.write_text(json.dumps(snapshot))
+        os.utime(path, (time.time() + 1, time.time() + 1))
+        assert analytics.dashboard()['total_properties'] == 4
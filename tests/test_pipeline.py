@@ -0,0 +1,70 @@
+"""
+Tests for the pipelined ingestion stages
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'database')))
+
+from pipeline import Pipeline, Stage, summary
+
+
+def sleeper(seconds):
+    def step(item):
+        time.sleep(seconds)
+        return item
+    return step
+
+
+def test_every_item_reaches_the_sink():
+    written = []
+    metrics = Pipeline([
+        Stage('build', lambda n: (n * 10 + i for i in range(3)), fan_out=True),
+        Stage('embed', lambda n: None if n % 2 else n, workers=3),
+        Stage('write', written.append, workers=2)
+    ]).run(range(5))
+
+    assert sorted(written) == [n * 10 + i for n in range(5) for i in range(3) if (n * 10 + i) % 2 == 0]
+    assert metrics['stages']['read']['items'] == 5
+    assert metrics['stages']['embed']['items'] == 15
+    assert metrics['stages']['write']['items'] == len(written)
+    assert 'bottleneck' in summary(metrics)
+
+
+def test_wall_time_tracks_slowest_stage():
+    items, delay = 20, 0.02
+    metrics = Pipeline([
+        Stage('build', sleeper(delay)),
+        Stage('embed', sleeper(delay)),
+        Stage('write', sleeper(delay))
+    ]).run(range(items))
+
+    sequential = items * delay * 3
+    assert metrics['wall_s'] < 0.7 * sequential
+    for stage in ('build', 'embed', 'write'):
+        assert metrics['stages'][stage]['busy_s'] >= items * delay * 0.9
+
+
+def test_backpressure_bounds_queues():
+    metrics = Pipeline([
+        Stage('build', lambda n: n),
+        Stage('write', sleeper(0.01))
+    ], queue_size=2).run(range(30))
+
+    assert metrics['bottleneck'] == 'write'
+    assert metrics['stages']['write']['queue_depth_max'] <= 2
+    # The fast upstream stage spent its time waiting on the full queue
+    assert metrics['stages']['build']['blocked_s'] > metrics['stages']['build']['busy_s']
+
+
+def test_stage_error_stops_the_run():
+    def fail_on_three(n):
+        if n == 3:
+            raise ValueError("bad batch")
+        return n
+
+    with pytest.raises(ValueError, match="bad batch"):
+        Pipeline([Stage('embed', fail_on_three), Stage('write', sleeper(0.001))]).run(range(1000))
@@ -0,0 +1,123 @@
+"""
+Tests for the trained price model
+"""
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+pytest.importorskip("sklearn")
+from src.price_model import PriceModel, benchmark, load_training_data
+
+
+@pytest.fixture
+def trained(test_data_dir):
+    rng = np.random.default_rng(0)
+    n = 600
+    beds = rng.integers(1, 6, n)
+    sqft = rng.integers(500, 4000, n)
+    zips = rng.choice([2116, 2119], n)
+    value = 300 * sqft * np.where(zips == 2116, 2.0, 1.0) + 20000 * beds
+    pd.DataFrame({
+        'BED_RMS': beds,
+        'FULL_BTH': rng.integers(1, 4, n),
+        'living_square_feet': sqft,
+        'year_built': rng.integers(1880, 2020, n),
+        'zip_code': zips,
+        'CITY': np.where(zips == 2116, 'BACK BAY', 'ROXBURY'),
+        'TOTAL_VALUE': value
+    }).to_csv(test_data_dir / 'processed' / 'properties_CLEAN_20251025.csv', index=False)
+    path = str(test_data_dir / 'price_model.joblib')
+    PriceModel.train(load_training_data(str(test_data_dir / 'processed'))).save(path)
+    return path
+
+
+class TestPriceModel:
+    """Test training, persistence and batch scoring"""
+
+    def test_batch_matches_single(self, trained):
+        """Vectorized scoring agrees with row-by-row scoring"""
+        model = PriceModel(trained).load()
+        rows = [
+            {'bedrooms': 3, 'sqft': 2000, 'zip_code': '02116'},
+            {'bedrooms': 2, 'sqft': 900, 'zip_code': 2119},
+            {'bedrooms': 2, 'sqft': 900, 'neighborhood': 'Back Bay'}
+        ]
+        batch = model.predict_batch(rows)
+        for i, row in enumerate(rows):
+            assert model.predict(row)['price'] == pytest.approx(batch['price'][i])
+        assert (batch['low'] <= batch['price']).all() and (batch['price'] <= batch['high']).all()
+        # Zip is learned; the neighborhood falls back to its most common zip
+        assert batch['price'][0] > batch['price'][1]
+        assert batch['price'][2] > batch['price'][1]
+
+    def test_versioned_artifact_and_benchmark(self, trained):
+        """Sidecar metadata and benchmark are written next to the artifact"""
+        assert os.path.exists(trained.replace('.joblib', '.json'))
+        results = benchmark(trained, batch_size=1000, repeats=5)
+        assert results['rows_per_second'] > 0
+        assert os.path.exists(trained.replace('.joblib', '_benchmark.json'))
+
+    def test_missing_artifact(self, tmp_path):
+        """A missing artifact reports unavailable instead of raising"""
+        assert PriceModel(str(tmp_path / 'none.joblib')).available is False
+
+    def test_unreadable_artifact(self, trained, tmp_path):
+        """Truncated or incompatible artifacts are unavailable too, not a 500 per request"""
+        truncated = tmp_path / 'truncated.joblib'
+        with open(trained, 'rb') as f:
+            truncated.write_bytes(f.read()[:200])
+        incompatible = str(tmp_path / 'incompatible.joblib')
+        joblib.dump({'model': None}, incompatible)
+        for path in (str(truncated), incompatible):
+            assert PriceModel(path).available is False
+
+    def test_missing_artifact_backs_off(self, trained, tmp_path, monkeypatch):
+        """A failed load is not retried until the backoff has passed"""
+        clock = [1000.0]
+        monkeypatch.setattr('src.price_model.time.monotonic', lambda: clock[0])
+        path = str(tmp_path / 'later.joblib')
+        model = PriceModel(path, retry_seconds=60)
+        assert model.available is False
+
+        # Trained in the meantime, but picked up only once the backoff has passed
+        os.replace(trained, path)
+        assert model.available is False
+        clock[0] += 61
+        assert model.available is True and model.version
+
+
+class TestValueScoring:
+    """Test catalog scoring and the insights served from it"""
+
+    def test_scores_rollups_and_insights(self, trained, test_data_dir):
+        """Scores and rollups are written and served sorted by undervaluation"""
+        from src.value_scoring import ValueInsights, build_value_scores
+
+        output = str(test_data_dir / 'value_scores.parquet')
+        summary = build_value_scores(str(test_data_dir / 'processed'), trained, output, workers=2)
+        assert summary['rows'] == 600 and summary['neighborhoods'] == 2
+
+        insights = ValueInsights(output)
+        top = insights.top_undervalued(5)
+        assert len(top) == 5
+        assert top[0]['delta_pct'] >= top[-1]['delta_pct']
+        assert all(p['neighborhood'] == 'Roxbury' for p in insights.top_undervalued(3, neighborhood='roxbury'))
+        assert {h['neighborhood'] for h in insights.neighborhoods()} == {'Back Bay', 'Roxbury'}
+        assert insights.market_insights()['model_version'] == insights.version
+        assert {'best_value', 'investment_opportunity', 'most_expensive'} <= set(insights.market_insights())
+
+    def test_scores_are_out_of_fold(self, trained, test_data_dir):
+        """Catalog rows are not scored by a model that was fitted on them"""
+        from src.value_scoring import score_catalog
+
+        model = PriceModel(trained).load()
+        df = load_training_data(str(test_data_dir / 'processed'))
+        in_sample = score_catalog(df, model, folds=1)['delta'].abs().mean()
+        out_of_fold = score_catalog(df, model, folds=5)['delta'].abs().mean()
+        assert out_of_fold > in_sample
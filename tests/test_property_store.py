@@ -0,0 +1,82 @@
+"""
+Tests for the canonical property store
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+pytest.importorskip("pyarrow")
+from src.property_store import PropertyStore, build_property_store, normalize_property_id
+
+
+@pytest.fixture
+def store(test_data_dir):
+    processed = test_data_dir / 'processed'
+    pd.DataFrame({
+        'property_id': [100001000, 100002000, 100002000],
+        'full_address': ['1 MAIN ST, Boston, MA 02119', '2 OAK ST', '2 OAK ST, Boston, MA 02116'],
+        'zip_code': [2119, 2116, 2116],
+        'TOTAL_VALUE': [500000, 700000, 750000],
+        'BED_RMS': [3, 2, 2],
+        'FULL_BTH': [2, 1, 1],
+        'living_square_feet': [1800, None, 950]
+    }).to_csv(processed / 'properties_CLEAN_20251025.csv', index=False)
+    path = str(test_data_dir / 'store.parquet')
+    build_property_store(str(processed), path)
+    return PropertyStore(path, cache_size=1)
+
+
+class TestPropertyStore:
+    """Test batch hydration"""
+
+    def test_normalize_ids(self):
+        """Float and string ids map to the same key"""
+        assert normalize_property_id(100001000.0) == '100001000'
+        assert normalize_property_id('100001000.0') == '100001000'
+        assert normalize_property_id(float('nan')) is None
+
+    def test_batch_fetch(self, store):
+        """Many ids resolve in one call; unknown ids are absent"""
+        records = store.get_properties(['100001000', 100002000.0, 'nope'])
+        assert list(records) == ['100001000', '100002000']
+        assert records['100001000']['sqft'] == 1800
+        assert records['100001000']['zip_code'] == '02119'
+        # Last duplicate wins
+        assert records['100002000']['price'] == 750000
+
+    def test_read_through_cache(self, store):
+        """Repeat lookups are served from the LRU cache"""
+        store.get_properties(['100001000'])
+        store.get_properties(['100001000'])
+        assert store.hits == 1
+        store.get_properties(['100002000'])
+        assert len(store._cache) == 1
+
+    def test_geocoded_coordinates(self, store):
+        """Properties without coordinates fall back to ZIP centroids, which locate() ignores"""
+        record = store.get_property('100001000')
+        assert record['geocode_precision'] == 'zip'
+        assert 42.2 < record['latitude'] < 42.4
+        assert store.locate('1 MAIN ST') is None
+
+    def test_enriched_centroids_are_not_source_coordinates(self, test_data_dir):
+        """Centroids written by the enrichment step are re-labelled, not served as exact locations"""
+        processed = test_data_dir / 'processed'
+        pd.DataFrame({
+            'property_id': [1, 2],
+            'full_address': ['1 MAIN ST', '5 ELM ST'],
+            'zip_code': ['02119', '02130'],
+            'latitude': [42.3242, 42.3312],
+            'longitude': [-71.0856, -71.1100],
+            'geocode_precision': ['zip', 'source']
+        }).to_csv(processed / 'properties_ENRICHED_20251026.csv', index=False)
+        path = str(test_data_dir / 'enriched.parquet')
+        build_property_store(str(processed), path)
+        store = PropertyStore(path)
+        assert store.get_property('1')['geocode_precision'] == 'zip'
+        assert store.locate('1 MAIN ST') is None
+        assert store.locate('5 ELM ST') == pytest.approx((42.3312, -71.1100))
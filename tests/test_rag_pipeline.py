@@ -0,0 +1,41 @@
+"""
+Tests for the RAG pipeline's collection access
+"""
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+pytest.importorskip('chromadb')
+pytest.importorskip('openai')
+pytest.importorskip('dotenv')
+
+from src.collection_aliases import CollectionAliases
+from src.embeddings import HashProvider, collection_metadata
+from src.rag_pipeline import PropBotRAG
+
+
+def build(aliases, docs):
+    version, _ = aliases.open_build('properties', rebuild=True, metadata=collection_metadata(HashProvider()))
+    version.add(ids=[f"p{i}" for i in range(len(docs))], documents=docs, embeddings=HashProvider().encode(docs))
+    aliases.promote('properties', version, expected=len(docs))
+    return version
+
+
+def test_collection_follows_the_alias_after_promotion(client, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    aliases = CollectionAliases(client, registry=f"aliases_{uuid.uuid4().hex[:8]}")
+    first = build(aliases, ['12 Beacon St', '4 Elm St'])
+
+    rag = PropBotRAG(client=client)
+    rag.aliases = aliases
+    assert rag.collection.name == first.name
+
+    # Promote a rebuild and drop the old version, as the loader does after the grace period
+    second = build(aliases, ['12 Beacon St', '4 Elm St', '9 Oak St'])
+    assert aliases.garbage_collect('properties', grace_hours=0) == [first.name]
+    listed = rag.collection.get(include=['documents'], limit=20)
+    assert rag.collection.name == second.name and len(listed['ids']) == 3
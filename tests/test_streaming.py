@@ -0,0 +1,81 @@
+"""
+Tests for chunked CSV streaming
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'database')))
+
+import streaming
+from documents import build_documents, synthetic_crime
+from incremental import keyed, natural_key
+from streaming import CsvStream, scan_csv, write_chunks
+
+TEXT_COLUMNS = ['OFFENSE_DESCRIPTION', 'STREET', 'ZIP']
+META_COLUMNS = ['YEAR', 'SHOOTING', 'Lat', 'ZIP', 'FLAG']
+
+
+@pytest.fixture
+def crime_csv(tmp_path):
+    df = synthetic_crime(12000)
+    df['YEAR'] = df['YEAR'].astype('Int64')
+    # A gap only in the last chunk, digits-then-text, and a bool column
+    df.loc[11500, 'YEAR'] = pd.NA
+    df['ZIP'] = ['02115'] * 6000 + ['A1'] * 6000
+    df['FLAG'] = [True, False] * 6000
+    path = tmp_path / 'crime.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_chunks_match_whole_file_read(crime_csv):
+    expected = build_documents(pd.read_csv(crime_csv, low_memory=False), 'c', TEXT_COLUMNS, META_COLUMNS)
+
+    stream = CsvStream(crime_csv, chunk_rows=1000)
+    texts, metas, ids = [], [], []
+    for chunk in stream:
+        t, m, i = build_documents(chunk, 'c', TEXT_COLUMNS, META_COLUMNS)
+        texts, metas, ids = texts + t, metas + m, ids + i
+
+    assert (texts, metas, ids) == expected
+    assert stream.rows == 12000
+    assert stream.profile['dtypes']['YEAR'] == 'float64'
+    assert stream.profile['dtypes']['MONTH'] == 'int64'
+    assert stream.profile['dtypes']['ZIP'] is str
+
+
+def test_scan_reports_empty_and_nullable(tmp_path):
+    path = tmp_path / 'a.csv'
+    pd.DataFrame({'id': [1, 2, 3], 'empty': [None] * 3, 'gappy': ['x', None, 'y']}).to_csv(path, index=False)
+    profile = scan_csv(path, chunk_rows=2)
+    assert profile['empty'] == ['empty']
+    assert profile['nullable'] == ['empty', 'gappy']
+    assert profile['rows'] == 3
+
+
+def test_chunk_size_shrinks_over_rss_cap(crime_csv, monkeypatch):
+    monkeypatch.setattr(streaming, 'rss_mb', lambda: 10000.0)
+    stream = CsvStream(crime_csv, chunk_rows=4000, max_rss_mb=100)
+    sizes = [len(chunk) for chunk in stream]
+    assert sizes[:3] == [4000, 2000, 1000]
+    assert sum(sizes) == 12000
+    assert 'peak RSS 10000 MB' in stream.monitor.summary()
+
+
+def test_keyed_numbers_repeats_across_chunks(tmp_path):
+    path = tmp_path / 'k.csv'
+    pd.DataFrame({'INCIDENT_NUMBER': ['I1', 'I2', 'I1', 'I1'], 'x': [1, 2, 3, 4]}).to_csv(path, index=False)
+    stream = CsvStream(path, chunk_rows=2)
+    key, counts = natural_key(profile=stream.profile), {}
+    ids = [i for chunk in stream for i in keyed(chunk, counts, key).index]
+    assert ids == ['I1', 'I2', 'I1#1', 'I1#2']
+
+
+def test_write_chunks_aligns_columns(tmp_path):
+    out = tmp_path / 'out.csv'
+    chunks = [pd.DataFrame({'A': [1], 'B': [2]}), pd.DataFrame({'B': [3], 'C': [4]})]
+    assert write_chunks(iter(chunks), out, columns=['A', 'B', 'C']) == 2
+    assert out.read_text().splitlines() == ['A,B,C', '1,2,', ',3,4']
@@ -0,0 +1,148 @@
+"""
+Tests for the heavy-hitter trending sketch
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+from src.trending import SpaceSaving, TrendingTracker, detect_neighborhoods
+
+
+class TestSpaceSaving:
+    """Test Space-Saving summary"""
+
+    def test_exact_below_capacity(self):
+        """Counts are exact while there are fewer items than counters"""
+        sketch = SpaceSaving(capacity=10)
+        for item in ['a'] * 5 + ['b'] * 3 + ['c']:
+            sketch.offer(item)
+        assert sketch.top(2) == [('a', 5.0), ('b', 3.0)]
+
+    def test_heavy_hitter_survives_eviction(self):
+        """A frequent item stays on top of a stream of singletons"""
+        sketch = SpaceSaving(capacity=5)
+        for i in range(200):
+            sketch.offer('hot')
+            sketch.offer(f'cold-{i}')
+        assert sketch.top(1)[0][0] == 'hot'
+        assert len(sketch.counts) == 5
+
+    def test_time_decay(self):
+        """Old events weigh less than recent ones"""
+        sketch = SpaceSaving(capacity=10, tau=3600, landmark=0)
+        for _ in range(3):
+            sketch.offer('old', timestamp=0)
+        sketch.offer('new', timestamp=3 * 3600)
+        top = dict(sketch.top(2, now=3 * 3600))
+        assert top['new'] > top['old']
+        assert top['old'] == pytest.approx(3 * 2.718281828 ** -3, rel=1e-6)
+
+    def test_merge(self):
+        """Merging summaries from two workers sums their counts"""
+        a = SpaceSaving(capacity=10, tau=3600, landmark=0)
+        b = SpaceSaving(capacity=10, tau=3600, landmark=100)
+        a.offer('x', timestamp=100)
+        b.offer('x', timestamp=100)
+        b.offer('y', timestamp=100)
+        a.merge(SpaceSaving.from_dict(b.to_dict()))
+        top = dict(a.top(2, now=100))
+        assert top['x'] == pytest.approx(2.0)
+        assert top['y'] == pytest.approx(1.0)
+
+
+class TestTrendingTracker:
+    """Test tracker wiring"""
+
+    def test_chat_detects_neighborhoods(self):
+        """Neighborhood names in chat text are counted"""
+        assert detect_neighborhoods("condos in back bay or South End?") == ['Back Bay', 'South End']
+        tracker = TrendingTracker()
+        tracker.record_chat("Show me homes in Roxbury")
+        tracker.record_search("roxbury", "Show me properties in roxbury")
+        assert tracker.top('neighborhoods', 'hour', 1)[0]['name'] == 'Roxbury'
+
+    def test_unknown_window(self):
+        """Unknown windows are rejected"""
+        with pytest.raises(ValueError):
+            TrendingTracker().top('queries', 'year')
+
+    def test_reads_during_concurrent_records(self):
+        """top() and to_dict() never iterate a summary another thread is changing"""
+        tracker = TrendingTracker(capacity=20)
+        errors = []
+
+        def write(offset):
+            for i in range(3000):
+                tracker.record('queries', f"q{(i * 7 + offset) % 200}")
+
+        def read():
+            try:
+                for _ in range(300):
+                    tracker.top('queries', 'hour', 5)
+                    json.dumps(tracker.to_dict())
+            except RuntimeError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(3)] + \
+                  [threading.Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == [] and len(tracker.top('queries', 'hour', 50)) == 20
+
+
+class TestSharedTrending:
+    """Test publishing and merging summaries across workers"""
+
+    def _peer(self, share_dir, name, count, pid=999999):
+        peer = TrendingTracker()
+        for _ in range(count):
+            peer.record('neighborhoods', name)
+        path = share_dir / f'trending_{pid}.json'
+        path.write_text(json.dumps(peer.to_dict()))
+        return path
+
+    def test_publishes_on_a_timer(self, tmp_path):
+        """A worker with fewer than publish_every events still publishes"""
+        tracker = TrendingTracker(share_dir=str(tmp_path), publish_every=50, publish_seconds=0.05)
+        try:
+            tracker.record('neighborhoods', 'Roxbury')
+            deadline = time.time() + 5
+            while not os.path.exists(tracker._own_path) and time.time() < deadline:
+                time.sleep(0.02)
+            with open(tracker._own_path) as f:
+                assert 'Roxbury' in json.load(f)['neighborhoods']['day']['counts']
+        finally:
+            tracker.close()
+        assert not os.path.exists(tracker._own_path)
+
+    def test_peers_cached_versioned_and_expired(self, tmp_path):
+        """Peer files are merged, re-read only when they change, and dropped once stale"""
+        tracker = TrendingTracker(share_dir=str(tmp_path), publish_seconds=3600, peer_scan_seconds=0, peer_ttl=60)
+        try:
+            tracker.record('neighborhoods', 'Fenway')
+            path = self._peer(tmp_path, 'Roxbury', 3)
+            top = tracker.top('neighborhoods', 'day', 2, include_peers=True)
+            assert top[0]['name'] == 'Roxbury' and top[0]['score'] == pytest.approx(3, rel=1e-3)
+            version = tracker.shared_version
+            merged = tracker._merged_with_peers('neighborhoods', 'day')
+            assert tracker._merged_with_peers('neighborhoods', 'day') is merged
+
+            # A peer update changes the version (and so the dashboard ETag)
+            self._peer(tmp_path, 'Roxbury', 5)
+            os.utime(path, (time.time() + 1, time.time() + 1))
+            assert tracker.shared_version != version
+            assert tracker.top('neighborhoods', 'day', 1, include_peers=True)[0]['score'] == pytest.approx(5, rel=1e-3)
+
+            # A dead worker's file is removed
+            os.utime(path, (time.time() - 120, time.time() - 120))
+            assert tracker.peers() == {} and not path.exists()
+        finally:
+            tracker.close()
@@ -0,0 +1,34 @@
+"""
+Tests for the cross-collection query handler
+"""
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'milestone2', 'backend')))
+
+chromadb = pytest.importorskip('chromadb')
+
+from src.collection_aliases import CollectionAliases
+from src.embeddings import HashProvider, collection_metadata
+from unified_query_handler import UnifiedQueryHandler
+
+
+def test_searches_the_versioned_collection_behind_an_alias(client):
+    aliases = CollectionAliases(client, registry=f"aliases_{uuid.uuid4().hex[:8]}")
+    name = f"schools_{uuid.uuid4().hex[:8]}"
+    docs = ['Boston Latin School', 'Quincy Elementary']
+
+    # A first build only creates <name>__v<timestamp>
+    version, _ = aliases.open_build(name, metadata=collection_metadata(HashProvider()))
+    version.add(ids=['s0', 's1'], documents=docs, embeddings=HashProvider().encode(docs))
+    aliases.promote(name, version, expected=2)
+    assert name not in aliases.collection_names()
+
+    handler = UnifiedQueryHandler(provider='hash', client=client)
+    handler.aliases, handler.collection_map = aliases, {name: 'education'}
+    results = handler.search_all_collections('Boston Latin School', n_results=1)['results']
+    assert results[name]['documents'] == ['Boston Latin School']
+    assert handler.collections[name].name == version.name
@@ -4,6 +4,11 @@ const API = 'http://127.0.0.1:8002';
 let map, markers = [], selectedIdx = -1, properties = [], neighborhoods = [];
 let copilotInitialized = false;
 let currentUser = null;
+// Market insight keys the API may return (computed from value scores, or the static fallback)
+const INSIGHT_ICONS = [
+    ['fastest_growing', '🚀'], ['best_value', '💎'], ['most_competitive', '🏆'],
+    ['investment_opportunity', '💼'], ['most_expensive', '🏙️']
+];
 let conversationHistory = [];
 let currentMode = 'buy';
 let autoScrollInterval = null;
@@ -185,6 +190,9 @@ function showMainWebsite() {
 
 function handleLogout() {
     if (confirm('Are you sure you want to logout?')) {
+        if (currentUser?.access_token) {
+            fetch(`${API}/auth/logout`, {method: 'POST', headers: authHeaders()}).catch(() => {});
+        }
         currentUser = null;
         conversationHistory = [];
         localStorage.removeItem('propbot_user');
@@ -208,6 +216,13 @@ function checkStoredUser() {
     }
 }
 
+function authHeaders(){
+    // The API identifies the user from the bearer token, never from the request body
+    const headers = {'Content-Type':'application/json'};
+    if(currentUser?.access_token) headers['Authorization'] = `Bearer ${currentUser.access_token}`;
+    return headers;
+}
+
 async function safeFetchJson(url, options = {}, context = 'request') {
     try {
         const res = await fetch(url, options);
@@ -271,8 +286,8 @@ async function heroSearch(){
     try{
         const data = await safeFetchJson(`${API}/search`,{
             method:'POST',
-            headers:{'Content-Type':'application/json'},
-            body:JSON.stringify({neighborhood:q, user_id: currentUser?.user_id || 1})
+            headers:authHeaders(),
+            body:JSON.stringify({neighborhood:q})
         }, '/search');
         body.innerText = data.answer || "No results found.";
     }catch(e){
@@ -302,6 +317,7 @@ async function showDash(){
     try{
         const data = await safeFetchJson(`${API}/analytics/dashboard`,{}, '/analytics/dashboard');
         sec.innerHTML = `
+            ${data.source === 'fallback' ? `<div style="padding:8px 12px;background:#fef3c7;color:#92400e;border-radius:10px;margin-bottom:12px;font-size:12px;">⚠️ Placeholder figures: the analytics snapshot has not been built yet</div>` : ''}
             <div style="display:grid;grid-template-columns:repeat(2,minmax(0,1fr));gap:10px;margin-bottom:12px;">
                 <div style="padding:12px;background:#0f172a;color:white;border-radius:10px;">
                     <div style="font-size:11px;opacity:0.8;">Total Properties</div>
@@ -323,10 +339,8 @@ async function showDash(){
             <div style="padding:12px;background:white;border-radius:10px;">
                 <div style="font-size:13px;font-weight:600;color:#64748b;margin-bottom:8px;">Market Insights</div>
                 <div style="font-size:12px;line-height:1.6;color:#334155;">
-                    🚀 ${data.market_insights.fastest_growing}<br>
-                    💎 ${data.market_insights.best_value}<br>
-                    🏆 ${data.market_insights.most_competitive}<br>
-                    💼 ${data.market_insights.investment_opportunity}
+                    ${INSIGHT_ICONS.filter(([key]) => data.market_insights[key])
+                        .map(([key, icon]) => `${icon} ${data.market_insights[key]}`).join('<br>')}
                 </div>
             </div>`;
     }catch(e){
@@ -532,11 +546,10 @@ function openCopilotFromProperty(id, address, price, beds, baths){
 
 async function saveProp(id){
     try{
-        const userId = currentUser?.user_id || 1;
         await safeFetchJson(`${API}/save-property`,{
             method:'POST',
-            headers:{'Content-Type':'application/json'},
-            body:JSON.stringify({property_id:id, property_data:{}, user_id: userId})
+            headers:authHeaders(),
+            body:JSON.stringify({property_id:id, property_data:{}})
         }, '/save-property');
         
         alert('Property saved! ✅');
@@ -716,13 +729,11 @@ async function sendMsg(){
     const contextualQuery = `Previous conversation:\n${recentContext}\n\nCurrent question: ${txt}`;
     
     try{
-        const userId = currentUser?.user_id || 1;
         const data = await safeFetchJson(`${API}/chat`,{
             method:'POST',
-            headers:{'Content-Type':'application/json'},
+            headers:authHeaders(),
             body:JSON.stringify({
-                query: contextualQuery,
-                user_id: userId
+                query: contextualQuery
             })
         }, '/chat');
         
@@ -845,11 +856,10 @@ function sendMessage(txt){
 function sendMessageDirect(txt){
     conversationHistory.push({role: 'user', content: txt});
     
-    const userId = currentUser?.user_id || 1;
     safeFetchJson(`${API}/chat`,{
         method:'POST',
-        headers:{'Content-Type':'application/json'},
-        body:JSON.stringify({query: txt, user_id: userId})
+        headers:authHeaders(),
+        body:JSON.stringify({query: txt})
     }, '/chat').then(data => {
         setTimeout(()=>addMsg('bot', data.answer), 400);
         conversationHistory.push({role: 'assistant', content: data.answer});
@@ -907,11 +917,10 @@ async function submitSearch(){
     conversationHistory.push({role: 'user', content: queryText});
     
     try{
-        const userId = currentUser?.user_id || 1;
         const data = await safeFetchJson(`${API}/search`,{
             method:'POST',
-            headers:{'Content-Type':'application/json'},
-            body:JSON.stringify({neighborhood:hood, bedrooms:parseInt(beds), user_id: userId})
+            headers:authHeaders(),
+            body:JSON.stringify({neighborhood:hood, bedrooms:parseInt(beds)})
         }, '/search (copilot)');
         
         setTimeout(()=>addMsg('bot', data.answer), 400);
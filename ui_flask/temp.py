@@ -636,8 +636,9 @@ body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-
         <h1 class="hero-title">Find Your Dream Home</h1>
         <p class="hero-subtitle">Discover the perfect property in Boston with PropBot AI.</p>
         <div class="search-container">
-            <input type="text" class="search-input" id="heroInput"
+            <input type="text" class="search-input" id="heroInput" list="heroSuggestions" autocomplete="off"
                    placeholder="Search homes to buy in Boston (e.g., 3 BR in Back Bay under $1M)">
+            <datalist id="heroSuggestions"></datalist>
             <button class="search-btn" id="heroSearchBtn">🔍 Search</button>
         </div>
         <div class="hero-result" id="heroResult">
@@ -802,8 +803,14 @@ body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-
 const API = 'http://127.0.0.1:8000';
 
 let map, markers = [], selectedIdx = -1, properties = [], neighborhoods = [];
+let catalogLayer = null, catalogRequest = 0;
 let copilotInitialized = false;
 let currentUser = null;
+// Market insight keys the API may return (computed from value scores, or the static fallback)
+const INSIGHT_ICONS = [
+    ['fastest_growing', '🚀'], ['best_value', '💎'], ['most_competitive', '🏆'],
+    ['investment_opportunity', '💼'], ['most_expensive', '🏙️']
+];
 
 // LOGIN SYSTEM
 function handleLogin(event) {
@@ -844,13 +851,19 @@ function handleLogin(event) {
     showMainWebsite();
 }
 
-function loginAsGuest() {
-    // Auto-login as guest user
+async function loginAsGuest() {
+    // Auto-login as guest user (with a backend guest token when the API is up, so history is saved)
     currentUser = {
         email: 'guest@propbot.com',
         username: 'guest',
         fullName: 'Guest User'
     };
+    try {
+        const res = await fetch(`${API}/auth/guest`, {method: 'POST', headers: {'Content-Type': 'application/json'}});
+        if (res.ok) currentUser.access_token = (await res.json()).access_token;
+    } catch (e) {
+        console.error('Guest token unavailable:', e);
+    }
     
     sessionStorage.setItem('propbot_user', JSON.stringify(currentUser));
     showMainWebsite();
@@ -923,6 +936,13 @@ function checkStoredUser() {
     }
 }
 
+function authHeaders(){
+    // The API identifies the user from the bearer token, never from the request body
+    const headers = {'Content-Type':'application/json'};
+    if(currentUser?.access_token) headers['Authorization'] = `Bearer ${currentUser.access_token}`;
+    return headers;
+}
+
 async function safeFetchJson(url, options = {}, context = 'request') {
     try {
         const res = await fetch(url, options);
@@ -956,8 +976,8 @@ async function heroSearch(){
     try{
         const data = await safeFetchJson(`${API}/search`,{
             method:'POST',
-            headers:{'Content-Type':'application/json'},
-            body:JSON.stringify({neighborhood:q,user_id:currentUser?.username || 'default_user'})
+            headers:authHeaders(),
+            body:JSON.stringify({neighborhood:q})
         }, '/search');
         body.innerText = data.answer || "I couldn't find anything specific, try rephrasing your query.";
     }catch(e){
@@ -967,6 +987,24 @@ async function heroSearch(){
     }
 }
 
+let suggestTimer = null, suggestRequest = 0;
+function suggestAddresses(){
+    clearTimeout(suggestTimer);
+    suggestTimer = setTimeout(async ()=>{
+        const q = document.getElementById('heroInput').value.trim();
+        const list = document.getElementById('heroSuggestions');
+        if(q.length < 2){ list.innerHTML=''; return; }
+        const request = ++suggestRequest;
+        try{
+            const data = await safeFetchJson(`${API}/autocomplete?q=${encodeURIComponent(q)}&limit=8`,{}, '/autocomplete');
+            if(request !== suggestRequest) return;
+            list.innerHTML = data.suggestions.map(s=>`<option value="${s.text.replace(/"/g,'&quot;')}">${s.type}</option>`).join('');
+        }catch(e){
+            list.innerHTML='';
+        }
+    },120);
+}
+
 /* LEFT MENU */
 function toggleMenu(){
     document.getElementById('dropdownMenu').classList.toggle('active');
@@ -984,6 +1022,7 @@ async function showDash(){
     try{
         const data = await safeFetchJson(`${API}/analytics/dashboard`,{}, '/analytics/dashboard');
         sec.innerHTML = `
+            ${data.source === 'fallback' ? `<div style="padding:8px 12px;background:#fef3c7;color:#92400e;border-radius:10px;margin-bottom:12px;font-size:12px;">⚠️ Placeholder figures: the analytics snapshot has not been built yet</div>` : ''}
             <div style="display:grid;grid-template-columns:repeat(2,minmax(0,1fr));gap:10px;margin-bottom:12px;">
                 <div style="padding:12px;background:#0f172a;color:white;border-radius:10px;">
                     <div style="font-size:11px;opacity:0.8;">Total Properties</div>
@@ -1005,10 +1044,8 @@ async function showDash(){
             <div style="padding:12px;background:white;border-radius:10px;">
                 <div style="font-size:13px;font-weight:600;color:#64748b;margin-bottom:8px;">Market Insights</div>
                 <div style="font-size:12px;line-height:1.6;color:#334155;">
-                    🚀 ${data.market_insights.fastest_growing}<br>
-                    💎 ${data.market_insights.best_value}<br>
-                    🏆 ${data.market_insights.most_competitive}<br>
-                    💼 ${data.market_insights.investment_opportunity}
+                    ${INSIGHT_ICONS.filter(([key]) => data.market_insights[key])
+                        .map(([key, icon]) => `${icon} ${data.market_insights[key]}`).join('<br>')}
                 </div>
             </div>`;
     }catch(e){
@@ -1104,8 +1141,8 @@ async function saveProp(id){
     try{
         await safeFetchJson(`${API}/save-property`,{
             method:'POST',
-            headers:{'Content-Type':'application/json'},
-            body:JSON.stringify({property_id:id,property_data:{},user_id:currentUser?.username || 'default_user'})
+            headers:authHeaders(),
+            body:JSON.stringify({property_id:id,property_data:{}})
         }, '/save-property');
         alert('Property saved!');
     }catch(e){
@@ -1143,6 +1180,34 @@ function initMap(){
     L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png',{
         attribution:'© OpenStreetMap'
     }).addTo(map);
+    catalogLayer = L.layerGroup().addTo(map);
+    map.on('moveend', loadMapCatalog);
+    loadMapCatalog();
+}
+async function loadMapCatalog(){
+    const b = map.getBounds();
+    const bbox = [b.getWest(),b.getSouth(),b.getEast(),b.getNorth()].map(v=>v.toFixed(5)).join(',');
+    const request = ++catalogRequest;
+    try{
+        const data = await safeFetchJson(`${API}/properties/within?bbox=${bbox}&zoom=${map.getZoom()}&limit=500`,{}, '/properties/within');
+        if(request !== catalogRequest) return;
+        catalogLayer.clearLayers();
+        data.features.forEach(f=>{
+            if(f.type==='cluster'){
+                L.circleMarker([f.latitude,f.longitude],{radius:Math.min(8+Math.log2(f.count)*2,28),color:'#2563eb',fillOpacity:0.35})
+                    .bindTooltip(`${f.count.toLocaleString()} properties`)
+                    .on('click',()=>map.setView([f.latitude,f.longitude],map.getZoom()+2))
+                    .addTo(catalogLayer);
+            }else{
+                const price = f.price ? '$'+Math.round(f.price).toLocaleString() : '';
+                L.circleMarker([f.latitude,f.longitude],{radius:5,color:'#0f172a',fillOpacity:0.7})
+                    .bindPopup(`<b>${f.address || f.property_id}</b><br>${price}${f.bedrooms ? ' · '+f.bedrooms+' bd' : ''}`)
+                    .addTo(catalogLayer);
+            }
+        });
+    }catch(e){
+        console.error('properties/within error:',e);
+    }
 }
 async function loadNeighborhoods(){
     neighborhoods = [
@@ -1238,8 +1303,8 @@ async function sendMsg(){
     try{
         const data = await safeFetchJson(`${API}/chat`,{
             method:'POST',
-            headers:{'Content-Type':'application/json'},
-            body:JSON.stringify({query:txt,user_id:currentUser?.username || 'default_user'})
+            headers:authHeaders(),
+            body:JSON.stringify({query:txt})
         }, '/chat');
         setTimeout(()=>addMsg('bot',data.answer),400);
         const recData = await safeFetchJson(`${API}/recommendations/by-features`,{
@@ -1305,8 +1370,8 @@ async function submitSearch(){
     try{
         const data = await safeFetchJson(`${API}/search`,{
             method:'POST',
-            headers:{'Content-Type':'application/json'},
-            body:JSON.stringify({neighborhood:hood,bedrooms:parseInt(beds),user_id:currentUser?.username || 'default_user'})
+            headers:authHeaders(),
+            body:JSON.stringify({neighborhood:hood,bedrooms:parseInt(beds)})
         }, '/search (copilot)');
         setTimeout(()=>addMsg('bot',data.answer),400);
         const recData = await safeFetchJson(`${API}/recommendations/by-features`,{
@@ -1366,6 +1431,7 @@ window.addEventListener('load',()=>{
     checkStoredUser();
     document.getElementById('heroSearchBtn').addEventListener('click',heroSearch);
     document.getElementById('heroInput').addEventListener('keypress',e=>{if(e.key==='Enter')heroSearch();});
+    document.getElementById('heroInput').addEventListener('input',suggestAddresses);
 });
 </script>
 